@@ -0,0 +1,315 @@
+"""
+Benchmark harness for TaskManager and the calendar/task-list hot paths.
+
+Generates (and caches) synthetic databases, times the core queries, import/export
+and offscreen renders of BigCalendarWidget / refresh_task_list, and writes the
+results as JSON so runs from different commits can be compared:
+
+    python benchmark.py --tasks 10000,100000 --output after.json
+    python benchmark.py --tasks 10000 --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from task_manager import TaskManager
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+WORDS = ("会议 报告 整理 复盘 阅读 跑步 购物 学习 代码 设计 评审 邮件 预算 计划 健身 "
+         "review design budget meeting sprint report draft email follow-up deploy").split()
+STATUSES = ("待完成", "已完成")
+
+
+# --- Synthetic data ---
+def generate_db(path: str, n_tasks: int, n_tags: int = 20, desc_length: int = 200,
+                years: int = 5, seed: int = 42) -> None:
+    """Create a database at path with n_tasks tasks spread over `years` years ending today."""
+    rng = random.Random(seed)
+    manager = TaskManager(path)
+    end = time.time()
+    span_days = years * 365
+    tags = [(f"标签{i:02d}", "#%06X" % rng.randrange(0x1000000)) for i in range(n_tags)]
+    with manager.transaction() as cursor:
+        cursor.executemany("INSERT OR IGNORE INTO tags (name, color) VALUES (?, ?)", tags)
+        names = [name for name, _ in tags] + [name for name, _ in TaskManager.DEFAULT_TAGS]
+        tag_ids = [manager.get_tag_id(name) for name in names]
+        batch = []
+        for i in range(n_tasks):
+            day = time.strftime("%Y-%m-%d", time.localtime(end - rng.randrange(span_days) * 86400))
+            content = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))) + f" #{i}"
+            description = " ".join(rng.choice(WORDS) for _ in range(desc_length // 5))[:desc_length]
+            batch.append((day, content, rng.choice(STATUSES), rng.choice(tag_ids), rng.randint(0, 5), description))
+            if len(batch) >= 10000:
+                cursor.executemany(
+                    "INSERT INTO tasks (date_str, content, status, tag_id, priority, description) VALUES (?, ?, ?, ?, ?, ?)",
+                    batch)
+                batch.clear()
+        if batch:
+            cursor.executemany(
+                "INSERT INTO tasks (date_str, content, status, tag_id, priority, description) VALUES (?, ?, ?, ?, ?, ?)",
+                batch)
+    manager.close()
+
+
+def cached_db(db_dir: str, n_tasks: int, n_tags: int, desc_length: int) -> str:
+    path = os.path.join(db_dir, f"bench_{n_tasks}_{n_tags}_{desc_length}.db")
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        generate_db(path + ".part", n_tasks, n_tags, desc_length)
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(path + ".part" + suffix): os.remove(path + ".part" + suffix)
+        os.replace(path + ".part", path)
+        print(f"generated {n_tasks} tasks in {time.perf_counter() - started:.1f}s -> {path}", file=sys.stderr)
+    return path
+
+
+# --- Timing ---
+def measure(fn, repeat: int, warmup: int = 1) -> dict:
+    """Call fn() warmup + repeat times; report per-call timings in milliseconds."""
+    for _ in range(warmup): fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "runs": repeat,
+    }
+
+
+def sample_dates(manager: TaskManager, count: int, seed: int = 7):
+    rows = manager._connect().execute("SELECT DISTINCT date_str FROM tasks").fetchall()
+    rng = random.Random(seed)
+    return [row[0] for row in rng.sample(rows, min(count, len(rows)))]
+
+
+def bench_queries(path: str, repeat: int) -> dict:
+    manager = TaskManager(path)
+    tags = [tag.name for tag in manager.get_all_tags()]
+    dates = sample_dates(manager, 50)
+    months = sorted({(int(d[:4]), int(d[5:7])) for d in dates})[:12]
+    results = {}
+
+    def day_queries():
+        for date_str in dates: manager.get_tasks_by_date_and_tags(date_str, tags)
+    results["get_tasks_by_date_and_tags"] = measure(day_queries, repeat)
+    results["get_tasks_by_date_and_tags"]["calls"] = len(dates)
+
+    def month_summaries():
+        for year, month in months: manager.get_month_task_summary(year, month, tags)
+    results["get_month_task_summary"] = measure(month_summaries, repeat)
+    results["get_month_task_summary"]["calls"] = len(months)
+
+    for label, keyword in (("common", "会议"), ("rare", "#4242"), ("trigram", "review")):
+        results[f"search_tasks[{label}]"] = measure(lambda k=keyword: manager.search_tasks(k, limit=200), repeat)
+    results["search_range[page]"] = measure(
+        lambda: manager.search_range("0000-01-01", "9999-12-31", tags, -1, "design", 200, 0), repeat)
+    results["get_statistics[month]"] = measure(lambda: manager.get_statistics("month"), repeat)
+    manager.close()
+    return results
+
+
+def bench_import_export(path: str, work_dir: str, repeat: int) -> dict:
+    manager = TaskManager(path)
+    results = {}
+    plain = os.path.join(work_dir, "export.json")
+    compact = os.path.join(work_dir, "export.json.gz")
+    results["export_json"] = measure(lambda: manager.export_json(plain), repeat, warmup=0)
+    results["export_json[compact]"] = measure(lambda: manager.export_json(compact, compact=True), repeat, warmup=0)
+    manager.close()
+
+    def fresh_import():
+        target = os.path.join(work_dir, "import.db")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(target + suffix): os.remove(target + suffix)
+        importer = TaskManager(target)
+        importer.import_json(plain)
+        importer.close()
+    results["import_json[fresh]"] = measure(fresh_import, max(1, repeat // 2), warmup=0)
+
+    def reimport():
+        # Every task is already present, so this times the duplicate probe path
+        importer = TaskManager(os.path.join(work_dir, "import.db"))
+        importer.import_json(compact)
+        importer.close()
+    results["import_json[duplicates]"] = measure(reimport, max(1, repeat // 2), warmup=0)
+    return results
+
+
+def bench_gui(path: str, work_dir: str, repeat: int) -> dict:
+    """Offscreen renders; the app reads myday.db from the working directory."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    import main
+
+    gui_dir = os.path.join(work_dir, "gui")
+    os.makedirs(gui_dir, exist_ok=True)
+    shutil.copy(path, os.path.join(gui_dir, "myday.db"))
+    shutil.copy(os.path.join(HERE, "mac_style.qss"), gui_dir)
+    cwd = os.getcwd()
+    os.chdir(gui_dir)
+    try:
+        window = main.ManageMyDayApp()
+        window.resize(1200, 800)
+        window.show()
+        window.expand_panel()
+
+        def drain():
+            window.executor.wait()
+            app.processEvents()
+        drain()
+
+        calendar = window.calendar
+        results = {}
+
+        def calendar_cold():
+            calendar.cell_cache.clear()
+            calendar.update_cache()
+            drain()
+            calendar.grab()
+        results["calendar_render[cold]"] = measure(calendar_cold, repeat)
+        results["calendar_render[warm]"] = measure(calendar.grab, repeat)
+
+        def day_list_cold():
+            window.repo._clear() # drop the in-memory index without triggering a UI reset
+            window.search_mode = False
+            window.refresh_task_list()
+            drain()
+            window.task_list_view.grab()
+        results["refresh_task_list[day,cold]"] = measure(day_list_cold, repeat)
+
+        def day_list_warm():
+            window.refresh_task_list()
+            drain()
+            window.task_list_view.grab()
+        results["refresh_task_list[day,warm]"] = measure(day_list_warm, repeat)
+
+        from PyQt6.QtCore import QDate
+        window.search_filters = {"keyword": "design", "start_date": QDate(1970, 1, 1),
+                                 "end_date": QDate(9999, 12, 31), "tag": "全部", "min_priority": -1}
+
+        def search_list():
+            window.search_mode = True
+            window.refresh_task_list()
+            drain()
+            window.task_list_view.grab()
+        results["refresh_task_list[search]"] = measure(search_list, repeat)
+        window.close()
+        return results
+    finally:
+        os.chdir(cwd)
+
+
+def bench_startup(work_dir: str, repeat: int) -> dict:
+    """Wall time of `main.py --profile-startup=quit` (first paint) in a fresh process."""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    gui_dir = os.path.join(work_dir, "gui")
+    samples, totals = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, os.path.join(HERE, "main.py"), "--profile-startup=quit"],
+                              cwd=gui_dir, env=env, capture_output=True, text=True, timeout=120)
+        samples.append((time.perf_counter() - started) * 1000)
+        for line in proc.stderr.splitlines():
+            if line.startswith("total"): totals.append(float(line.split()[1]))
+    result = {"median_ms": round(statistics.median(samples), 3), "min_ms": round(min(samples), 3),
+              "mean_ms": round(statistics.fmean(samples), 3), "runs": repeat}
+    if totals: result["first_paint_ms"] = round(statistics.median(totals), 3)
+    return result
+
+
+# --- Reporting ---
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(results: dict, baseline_path: str, threshold: float) -> int:
+    """Print new/old median ratios; return the number of regressions above threshold."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)["results"]
+    regressions = 0
+    print(f"{'benchmark':<52}{'base ms':>10}{'new ms':>10}{'ratio':>8}")
+    for size, entries in results.items():
+        for name, entry in entries.items():
+            old = baseline.get(size, {}).get(name)
+            if not old: continue
+            ratio = entry["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+            flag = "  <-- slower" if ratio > threshold else ""
+            regressions += bool(flag)
+            print(f"{size + ' ' + name:<52}{old['median_ms']:>10.2f}{entry['median_ms']:>10.2f}{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", default="10000", help="comma-separated database sizes (e.g. 10000,100000,1000000)")
+    parser.add_argument("--tags", type=int, default=20, help="number of extra tags")
+    parser.add_argument("--desc-length", type=int, default=200, help="description length in characters")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--db-dir", default=os.path.join(tempfile.gettempdir(), "myday_bench"),
+                        help="where generated databases are cached between runs")
+    parser.add_argument("--skip-gui", action="store_true", help="skip the offscreen Qt benchmarks")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="ratio above which --compare reports a regression")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.db_dir, exist_ok=True)
+    results = {}
+    for n_tasks in (int(n) for n in args.tasks.split(",")):
+        path = cached_db(args.db_dir, n_tasks, args.tags, args.desc_length)
+        work_dir = tempfile.mkdtemp(prefix="myday_bench_")
+        try:
+            entries = bench_queries(path, args.repeat)
+            entries.update(bench_import_export(path, work_dir, args.repeat))
+            if not args.skip_gui:
+                entries.update(bench_gui(path, work_dir, args.repeat))
+                entries["startup"] = bench_startup(work_dir, args.repeat)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        results[str(n_tasks)] = entries
+        for name, entry in entries.items():
+            print(f"[{n_tasks}] {name:<36}{entry['median_ms']:>10.2f} ms", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "params": {"tags": args.tags, "desc_length": args.desc_length, "repeat": args.repeat},
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
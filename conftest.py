@@ -0,0 +1,11 @@
+import pytest
+
+from task_manager import TaskManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """A TaskManager on a fresh database file, closed after the test."""
+    m = TaskManager(str(tmp_path / "myday.db"))
+    yield m
+    m.close()
@@ -9,6 +9,7 @@ a = Analysis(
     datas=[
         ('mac_style.qss', '.'),
         ('task_manager.py', '.'),
+        ('lunar_calendar.py', '.'),
         ('ico_image', 'ico_image'),
     ],
     hiddenimports=[],
@@ -0,0 +1,136 @@
+import datetime
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+SOLAR_FESTIVALS = {
+    (1, 1): "元旦", (5, 1): "劳动节", (10, 1): "国庆",
+    (12, 25): "圣诞", (3, 8): "妇女节", (6, 1): "儿童节"
+}
+
+LUNAR_FESTIVALS = {
+    (1, 1): "春节", (1, 15): "元宵", (5, 5): "端午",
+    (7, 7): "七夕", (8, 15): "中秋", (9, 9): "重阳",
+    (12, 8): "腊八", (12, 23): "小年", (12, 30): "除夕"
+}
+
+CN_DAYS = ["", "初一", "初二", "初三", "初四", "初五", "初六", "初七", "初八", "初九", "初十",
+    "十一", "十二", "十三", "十四", "十五", "十六", "十七", "十八", "十九", "二十",
+    "廿一", "廿二", "廿三", "廿四", "廿五", "廿六", "廿七", "廿八", "廿九", "三十"]
+CN_MONTHS = ["", "正月", "二月", "三月", "四月", "五月", "六月", "七月", "八月", "九月", "十月", "冬月", "腊月"]
+
+
+class LunarCalendar:
+    """
+    Lunar month/day and festival labels, precomputed one Gregorian year at a time.
+
+    Year tables are kept in a bounded LRU so lookups are a list index, and the
+    raw lunar dates are optionally persisted to a small JSON file (one int per
+    day, month * 100 + day) so later launches never need to call ZhDate at all.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None, max_years: int = 8):
+        self.cache_path = cache_path
+        self.max_years = max_years
+        self._years: "OrderedDict[int, List[Tuple[str, bool]]]" = OrderedDict()
+        self._disk: Optional[Dict[str, List[int]]] = None
+        self._lock = threading.Lock()
+        self._zhdate = None
+        self._zhdate_loaded = False
+
+    # --- Public API ---
+    def lookup(self, year: int, month: int, day: int) -> Tuple[str, bool]:
+        """Return (label, is_festival) for a Gregorian date, ("", False) if unknown."""
+        table = self._year_table(year)
+        if table is None: return "", False
+        try:
+            return table[datetime.date(year, month, day).timetuple().tm_yday - 1]
+        except ValueError:
+            return "", False
+
+    def precompute(self, start_year: int, end_year: int) -> None:
+        """Build (and persist) the tables for an inclusive year range ahead of time."""
+        for year in range(start_year, end_year + 1):
+            self._year_table(year)
+
+    # --- Internals ---
+    def _year_table(self, year: int) -> Optional[List[Tuple[str, bool]]]:
+        with self._lock:
+            table = self._years.get(year)
+            if table is not None:
+                self._years.move_to_end(year)
+                return table
+
+            codes = self._load_disk().get(str(year))
+            if codes is None:
+                codes = self._compute_codes(year)
+                if codes is None: return None
+                self._disk[str(year)] = codes
+                self._save_disk()
+
+            table = [self._label(year, index, code) for index, code in enumerate(codes)]
+            self._years[year] = table
+            while len(self._years) > self.max_years:
+                self._years.popitem(last=False)
+            return table
+
+    def _label(self, year: int, index: int, code: int) -> Tuple[str, bool]:
+        if not code: return "", False
+        solar = datetime.date(year, 1, 1) + datetime.timedelta(days=index)
+        if (solar.month, solar.day) in SOLAR_FESTIVALS:
+            return SOLAR_FESTIVALS[(solar.month, solar.day)], True
+        lunar_month, lunar_day = divmod(code, 100)
+        if (lunar_month, lunar_day) in LUNAR_FESTIVALS:
+            return LUNAR_FESTIVALS[(lunar_month, lunar_day)], True
+        if lunar_day == 1: return CN_MONTHS[lunar_month], False
+        if 1 <= lunar_day < len(CN_DAYS): return CN_DAYS[lunar_day], False
+        return "", False
+
+    def _compute_codes(self, year: int) -> Optional[List[int]]:
+        ZhDate = self._load_zhdate()
+        if ZhDate is None: return None
+        codes = []
+        day = datetime.datetime(year, 1, 1)
+        while day.year == year:
+            try:
+                zd = ZhDate.from_datetime(day)
+                codes.append(zd.lunar_month * 100 + zd.lunar_day)
+            except Exception:
+                codes.append(0)  # outside the range zhdate supports
+            day += datetime.timedelta(days=1)
+        return codes
+
+    def _load_zhdate(self):
+        # Imported on first use so startup never pays for it when tables are cached
+        if not self._zhdate_loaded:
+            self._zhdate_loaded = True
+            try:
+                from zhdate import ZhDate
+                self._zhdate = ZhDate
+            except ImportError:
+                self._zhdate = None
+        return self._zhdate
+
+    def _load_disk(self) -> Dict[str, List[int]]:
+        if self._disk is None:
+            self._disk = {}
+            if self.cache_path and os.path.exists(self.cache_path):
+                try:
+                    with open(self.cache_path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    if isinstance(data, dict): self._disk = data
+                except (OSError, ValueError):
+                    pass
+        return self._disk
+
+    def _save_disk(self) -> None:
+        if not self.cache_path: return
+        tmp_path = self.cache_path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._disk, f, separators=(',', ':'))
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
@@ -1,10 +1,14 @@
+import time
+_START_TIME = time.perf_counter() # --profile-startup 的计时起点 (包含下面的模块导入)
 import sys
 import os
-import shutil
-import json
-import urllib.request
+import html
+import bisect
+import threading
 import datetime
-import sqlite3 
+import traceback
+from collections import OrderedDict
+from dataclasses import replace
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QCalendarWidget, QLabel, QListWidget, QListWidgetItem, 
@@ -12,20 +16,52 @@ from PyQt6.QtWidgets import (
     QFrame, QGraphicsDropShadowEffect, QCheckBox, QSplitter,
     QColorDialog, QScrollArea, QGridLayout, QSizePolicy, QMenu, QToolTip,
     QDateEdit, QAbstractItemView, QStyle, QFileDialog, QProgressBar, QFormLayout,
-    QTextEdit
+    QTextEdit, QListView, QStyledItemDelegate, QProgressDialog, QSpinBox, QInputDialog
 )
-from PyQt6.QtCore import QDate, Qt, QPoint, QRect, QSize, pyqtSignal, QEvent, QSettings
-from PyQt6.QtGui import QColor, QPainter, QFont, QPen, QAction, QIcon, QPixmap, QTextCharFormat
+from PyQt6.QtCore import (
+    QDate, Qt, QPoint, QRect, QRectF, QSize, pyqtSignal, QEvent, QSettings, QAbstractListModel, QModelIndex,
+    QObject, QRunnable, QThreadPool, QTimer
+)
+from PyQt6.QtGui import QColor, QPainter, QFont, QFontMetrics, QPen, QAction, QIcon, QPixmap, QTextCharFormat, QTextDocument
 
 # 引入数据管理模块 (请确保 task_manager.py 在同级目录)
-from task_manager import TaskManager, Task, Tag
-
-# --- 农历支持 ---
-try:
-    from zhdate import ZhDate
-    HAS_LUNAR = True
-except ImportError:
-    HAS_LUNAR = False
+from task_manager import TaskManager, TaskRepository, Task, Tag, ExportCancelled, ImportCancelled
+
+# --- 农历支持 --- (zhdate 在 lunar_calendar 中按需导入, 结果按年缓存并落盘)
+from lunar_calendar import LunarCalendar
+LUNAR = LunarCalendar(cache_path="lunar_cache.json")
+
+# [New] 启动耗时分析: python main.py --profile-startup[=quit]
+# 各阶段耗时在首帧绘制后输出到 stderr; "=quit" 时随即退出, 超出目标时返回码为 1 (供基准脚本使用)
+STARTUP_TARGET_MS = 400
+
+class StartupProfiler:
+    def __init__(self, argv, start_time):
+        flag = next((a for a in argv if a.startswith("--profile-startup")), None)
+        self.enabled = flag is not None
+        self.quit_after = flag == "--profile-startup=quit"
+        self.start = self.last = start_time
+        self.phases = []
+
+    def mark(self, name):
+        if not self.enabled: return
+        now = time.perf_counter()
+        self.phases.append((name, (now - self.last) * 1000))
+        self.last = now
+
+    def finish(self, app):
+        """在事件循环处理完首次显示/绘制后调用."""
+        if not self.enabled: return
+        self.mark("first paint")
+        total = (self.last - self.start) * 1000
+        for name, ms in self.phases:
+            print(f"{name:<14}{ms:8.1f} ms", file=sys.stderr)
+        verdict = "ok" if total <= STARTUP_TARGET_MS else "OVER TARGET"
+        print(f"{'total':<14}{total:8.1f} ms  (target {STARTUP_TARGET_MS} ms, {verdict})", file=sys.stderr)
+        if self.quit_after: app.exit(0 if total <= STARTUP_TARGET_MS else 1)
+
+PROFILER = StartupProfiler(sys.argv, _START_TIME)
+PROFILER.mark("imports")
 
 # --- 图标资源配置 ---
 ICON_URLS = {
@@ -51,6 +87,30 @@ ICON_URLS = {
     "about": "https://img.icons8.com/ios-glyphs/60/ffffff/info--v1.png"
 }
 
+# [New] 内嵌的矢量图标 (ico_image/ 中没有随程序提供的那几个), 无需联网
+_SVG = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="#ffffff">{}</svg>'
+_NOTE_SVG = _SVG.format('<path d="M5 3h14v11h-6v7H5z"/><path d="M15 16h4l-4 4z"/>')
+EMBEDDED_ICONS = {
+    "add_task": _SVG.format('<path d="M4 4h9v2H6v12h12v-7h2v9H4z"/><path d="M17.6 2.6l3.8 3.8L12 15.8H8.2V12z"/>'),
+    "filter": _SVG.format('<path d="M3 4h18l-7 8.5V19l-4 2v-8.5z"/>'),
+    "pin": _SVG.format('<path d="M9 2h6v2l-1 1v5l3 3v2h-4v6l-1 1-1-1v-6H7v-2l3-3V5L9 4z"/>'),
+    "note": _NOTE_SVG,
+    "mini_mode": _NOTE_SVG,
+}
+
+# 高级搜索每页加载的结果数
+SEARCH_PAGE_SIZE = 200
+# 列表内筛选的输入防抖间隔
+LIVE_FILTER_DELAY_MS = 150
+# 便签模式检查跨天/外部修改的间隔
+MINI_WATCH_INTERVAL_MS = 60 * 1000
+# 主窗口检查外部修改 (命令行 / HTTP 接口写入) 的间隔, 窗口激活时也会检查
+WATCH_INTERVAL_MS = 60 * 1000
+# 备份目录, 保留份数, 以及自动备份间隔 (数据无变化时跳过)
+BACKUP_DIR = "backups"
+BACKUP_KEEP = 20
+AUTO_BACKUP_INTERVAL_MS = 30 * 60 * 1000
+
 def resource_path(relative_path):
     if hasattr(sys, '_MEIPASS'):
         base_path = sys._MEIPASS
@@ -68,60 +128,167 @@ def get_font(size=10, bold=False):
 class DateUtils:
     @staticmethod
     def get_lunar_text(qdate: QDate):
-        if not HAS_LUNAR: return "", False
-        try:
-            dt = datetime.datetime(qdate.year(), qdate.month(), qdate.day())
-            zd = ZhDate.from_datetime(dt)
-            lunar_month = zd.lunar_month
-            lunar_day = zd.lunar_day
-            
-            solar_festivals = {
-                (1, 1): "元旦", (5, 1): "劳动节", (10, 1): "国庆",
-                (12, 25): "圣诞", (3, 8): "妇女节", (6, 1): "儿童节"
-            }
-            if (qdate.month(), qdate.day()) in solar_festivals:
-                return solar_festivals[(qdate.month(), qdate.day())], True
-            
-            lunar_festivals = {
-                (1, 1): "春节", (1, 15): "元宵", (5, 5): "端午",
-                (7, 7): "七夕", (8, 15): "中秋", (9, 9): "重阳", 
-                (12, 8): "腊八", (12, 23): "小年", (12, 30): "除夕"
-            }
-            if (lunar_month, lunar_day) in lunar_festivals:
-                return lunar_festivals[(lunar_month, lunar_day)], True
-            
-            cn_days = ["", "初一", "初二", "初三", "初四", "初五", "初六", "初七", "初八", "初九", "初十",
-                "十一", "十二", "十三", "十四", "十五", "十六", "十七", "十八", "十九", "二十",
-                "廿一", "廿二", "廿三", "廿四", "廿五", "廿六", "廿七", "廿八", "廿九", "三十"]
-            cn_months = ["", "正月", "二月", "三月", "四月", "五月", "六月", "七月", "八月", "九月", "十月", "冬月", "腊月"]
-            
-            if lunar_day == 1: return cn_months[lunar_month], False
-            if 1 <= lunar_day < len(cn_days): return cn_days[lunar_day], False
-        except: return "", False
-        return "", False
+        return LUNAR.lookup(qdate.year(), qdate.month(), qdate.day())
 
 class IconLoader:
+    """
+    图标查找顺序: 进程内缓存 -> 随程序打包/已下载的 ico_image/*.png -> 内嵌 SVG。
+    启动路径上不做任何网络请求; 都没有时返回空图标, 并在后台线程尝试下载供下次启动使用。
+    """
     SAVE_DIR = "ico_image"
+    _cache = {}
+    _pending = set()
+
     @classmethod
     def ensure_dir(cls):
         if not os.path.exists(cls.SAVE_DIR):
             try: os.makedirs(cls.SAVE_DIR)
             except: pass
+
     @classmethod
     def get(cls, name):
-        cls.ensure_dir()
-        url = ICON_URLS.get(name)
-        if not url: return QIcon()
+        icon = cls._cache.get(name)
+        if icon is not None: return icon
+        icon = cls.load_local(name)
+        if icon.isNull():
+            cls.fetch_async(name)
+        cls._cache[name] = icon
+        return icon
+
+    @classmethod
+    def load_local(cls, name):
         filename = f"{name}.png"
-        filepath = os.path.join(cls.SAVE_DIR, filename)
-        if os.path.exists(filepath): return QIcon(filepath)
+        candidates = (
+            resource_path(os.path.join(cls.SAVE_DIR, filename)), # 打包后的资源目录
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), cls.SAVE_DIR, filename), # 源码旁的 ico_image
+            os.path.join(cls.SAVE_DIR, filename), # 之前下载到工作目录的
+        )
+        for filepath in candidates:
+            if os.path.exists(filepath): return QIcon(filepath)
+        svg = EMBEDDED_ICONS.get(name)
+        if svg:
+            pixmap = QPixmap()
+            if pixmap.loadFromData(svg.encode("utf-8"), "SVG"): return QIcon(pixmap)
+        return QIcon()
+
+    @classmethod
+    def fetch_async(cls, name):
+        url = ICON_URLS.get(name)
+        if not url or name in cls._pending: return
+        cls._pending.add(name)
+        threading.Thread(target=cls._download, args=(name, url), daemon=True).start()
+
+    @classmethod
+    def _download(cls, name, url):
+        # 后台线程: 只写文件, 不碰 Qt 对象; 用单次请求头代替全局 install_opener
+        import urllib.request
+        cls.ensure_dir()
+        filepath = os.path.join(cls.SAVE_DIR, f"{name}.png")
+        try:
+            request = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
+            with urllib.request.urlopen(request, timeout=10) as response:
+                data = response.read()
+            with open(filepath + ".part", 'wb') as f:
+                f.write(data)
+            os.replace(filepath + ".part", filepath)
+        except Exception:
+            pass
+
+# --- 后台查询执行器 ---
+# 数据库读取放到线程池执行 (TaskManager 为每个线程保留独立连接), 结果经信号回到 GUI 线程。
+# 同一 key 只保留最新一次请求: 尚未开始的旧请求直接跳过, 已完成的旧结果在投递时丢弃。
+class _QuerySignals(QObject):
+    finished = pyqtSignal(str, int, object, object) # key, generation, result, error
+    progress = pyqtSignal(str, int, object) # key, generation, payload
+
+class _QueryTask(QRunnable):
+    def __init__(self, executor, key, generation, fn, args, with_progress=False):
+        super().__init__()
+        self.executor = executor
+        self.key = key
+        self.generation = generation
+        self.fn = fn
+        self.args = args
+        self.with_progress = with_progress
+
+    def report(self, *payload):
+        """后台回调: 把进度转发到界面线程; 任务被取消/替换后返回 False."""
+        if not self.executor.is_current(self.key, self.generation): return False
+        self.executor.signals.progress.emit(self.key, self.generation, payload)
+        return True
+
+    def run(self):
+        if not self.executor.is_current(self.key, self.generation): return
         try:
-            opener = urllib.request.build_opener()
-            opener.addheaders = [('User-Agent', 'Mozilla/5.0')]
-            urllib.request.install_opener(opener)
-            urllib.request.urlretrieve(url, filepath)
-            return QIcon(filepath)
-        except: return QIcon()
+            kwargs = {"progress": self.report} if self.with_progress else {}
+            result, error = self.fn(*self.args, **kwargs), None
+        except Exception as e:
+            result, error = None, e
+        self.executor.signals.finished.emit(self.key, self.generation, result, error)
+
+class QueryExecutor(QObject):
+    def __init__(self, parent=None, max_threads=2):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.pool.setExpiryTimeout(-1) # 线程常驻, 其 SQLite 连接保持热状态
+        self.signals = _QuerySignals()
+        self.signals.finished.connect(self._deliver)
+        self.signals.progress.connect(self._deliver_progress)
+        self._generations = {}
+        self._callbacks = {}
+        self._progress_callbacks = {}
+
+    def submit(self, key, fn, *args, on_result=None, on_error=None, on_progress=None):
+        """on_progress 不为空时, fn 会收到 progress=回调 关键字参数."""
+        generation = self._generations.get(key, 0) + 1
+        self._generations[key] = generation
+        self._callbacks[key] = (generation, on_result, on_error)
+        if on_progress: self._progress_callbacks[key] = (generation, on_progress)
+        else: self._progress_callbacks.pop(key, None)
+        self.pool.start(_QueryTask(self, key, generation, fn, args, with_progress=on_progress is not None))
+        return generation
+
+    def cancel(self, key):
+        self._generations[key] = self._generations.get(key, 0) + 1
+        self._callbacks.pop(key, None)
+        self._progress_callbacks.pop(key, None)
+
+    def is_current(self, key, generation):
+        return self._generations.get(key) == generation
+
+    def wait(self):
+        self.pool.waitForDone()
+
+    def _deliver(self, key, generation, result, error):
+        entry = self._callbacks.get(key)
+        if entry is None or entry[0] != generation: return # 过期结果
+        del self._callbacks[key]
+        self._progress_callbacks.pop(key, None)
+        _, on_result, on_error = entry
+        if error is not None:
+            if on_error: on_error(error)
+            else: traceback.print_exception(type(error), error, error.__traceback__)
+        elif on_result:
+            on_result(result)
+
+    def _deliver_progress(self, key, generation, payload):
+        entry = self._progress_callbacks.get(key)
+        if entry is None or entry[0] != generation: return
+        entry[1](*payload)
+
+def run_query(executor, key, fn, *args, on_result=None, on_error=None):
+    """有执行器时后台执行, 否则同步执行 (离屏基准/测试)."""
+    if executor is None:
+        try:
+            result = fn(*args)
+        except Exception as e:
+            if on_error is None: raise
+            on_error(e)
+            return
+        if on_result: on_result(result)
+    else:
+        executor.submit(key, fn, *args, on_result=on_result, on_error=on_error)
 
 # --- 自定义控件 ---
 
@@ -129,9 +296,10 @@ class IconLoader:
 class MiniModeWidget(QWidget):
     restore_signal = pyqtSignal()
 
-    def __init__(self, task_manager):
+    def __init__(self, repository, executor=None):
         super().__init__()
-        self.db = task_manager
+        self.repo = repository
+        self.executor = executor
         # 无边框 + 工具窗口 + 置顶
         self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.Tool | Qt.WindowType.WindowStaysOnTopHint)
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
@@ -194,10 +362,10 @@ class MiniModeWidget(QWidget):
         title_box.setSpacing(2)
         title = QLabel("📝 今日待办")
         title.setFont(QFont("Microsoft YaHei UI", 13, QFont.Weight.Bold))
-        date_lbl = QLabel(QDate.currentDate().toString("M月d日 dddd"))
-        date_lbl.setStyleSheet("font-size: 11px; color: #78350f;")
+        self.date_lbl = QLabel(QDate.currentDate().toString("M月d日 dddd"))
+        self.date_lbl.setStyleSheet("font-size: 11px; color: #78350f;")
         title_box.addWidget(title)
-        title_box.addWidget(date_lbl)
+        title_box.addWidget(self.date_lbl)
         
         btn_restore = QPushButton("🗖") 
         btn_restore.setFixedSize(30, 30)
@@ -237,65 +405,132 @@ class MiniModeWidget(QWidget):
         self.layout.addWidget(self.container)
         self.old_pos = None
 
+        # [New] 今日任务常驻内存, 由仓库变更通知逐项更新
+        self.loaded_date = None
+        self.tasks = {}
+        self.items = {}
+        self.placeholder_item = None
+        self.repo.subscribe(self.on_task_changed)
+        # 显示期间每分钟检查一次跨天/外部修改
+        self.watch_timer = QTimer(self)
+        self.watch_timer.setInterval(MINI_WATCH_INTERVAL_MS)
+        self.watch_timer.timeout.connect(self.check_for_changes)
+
     def load_data(self):
-        self.list_widget.clear()
         today_str = QDate.currentDate().toString("yyyy-MM-dd")
-        tags = [t.name for t in self.db.get_all_tags()]
-        tasks = self.db.get_tasks_by_date_and_tags(today_str, tags)
-        
-        total_tasks = len(tasks)
-        done_tasks = 0
-        
-        if not tasks:
-            item = QListWidgetItem("今天没有待办事项 🎉")
-            item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            item.setFlags(Qt.ItemFlag.NoItemFlags)
+        self.date_lbl.setText(QDate.currentDate().toString("M月d日 dddd"))
+        self.loaded_date = today_str
+        run_query(self.executor, "mini", self.fetch_tasks, today_str,
+                  on_result=lambda tasks: self.show_tasks(tasks, today_str))
+
+    def fetch_tasks(self, date_str):
+        return self.repo.get_tasks(date_str, list(self.repo.tag_colors()))
+
+    def ensure_loaded(self):
+        """只有跨天或数据被标记为过期时才重新读取."""
+        if self.loaded_date != QDate.currentDate().toString("yyyy-MM-dd"): self.load_data()
+
+    def show_tasks(self, tasks, date_str=None):
+        self.loaded_date = date_str
+        self.tasks = {t.id: t for t in tasks}
+        self.items = {}
+        self.placeholder_item = None
+        self.list_widget.clear()
+        for t in tasks:
+            item = QListWidgetItem()
+            self.apply_task(item, t)
+            self.items[t.id] = item
             self.list_widget.addItem(item)
+        self.update_progress()
+
+    def apply_task(self, item, t):
+        """把单个任务的状态写到列表项上 (文字/删除线/颜色/行高)."""
+        status_icon = "✅" if t.status == "已完成" else "⬜"
+        
+        # [修改] 组合显示内容：标题 + (换行)详细描述
+        display_text = f"{status_icon} {t.content}" + (" 🔁" if t.id < 0 else "")
+        if t.description and t.description.strip():
+            # 截取前30个字符，避免太长
+            desc_preview = t.description.strip().replace('\n', ' ')
+            if len(desc_preview) > 30: desc_preview = desc_preview[:30] + "..."
+            display_text += f"\n      ↳ {desc_preview}"
+        item.setText(display_text)
+        item.setData(Qt.ItemDataRole.UserRole, t)
+        
+        # 如果有描述，适当增加行高
+        item.setSizeHint(QSize(-1, 50) if t.description and t.description.strip() else QSize())
+        
+        # 已完成样式
+        done = t.status == "已完成"
+        font = item.font()
+        font.setStrikeOut(done)
+        item.setFont(font)
+        if done: item.setForeground(QColor("#a8a29e")) # 灰色
+        else: item.setData(Qt.ItemDataRole.ForegroundRole, None)
+
+    def update_progress(self):
+        # 空列表时显示占位提示
+        if self.placeholder_item is not None:
+            self.list_widget.takeItem(self.list_widget.row(self.placeholder_item))
+            self.placeholder_item = None
+        if not self.tasks:
+            self.placeholder_item = QListWidgetItem("今天没有待办事项 🎉")
+            self.placeholder_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+            self.placeholder_item.setFlags(Qt.ItemFlag.NoItemFlags)
+            self.list_widget.addItem(self.placeholder_item)
             self.progress_bar.setValue(0)
             return
-
-        for t in tasks:
-            if t.status == "已完成":
-                done_tasks += 1
-                
-            status_icon = "✅" if t.status == "已完成" else "⬜"
-            
-            # [修改] 组合显示内容：标题 + (换行)详细描述
-            display_text = f"{status_icon} {t.content}"
-            if t.description and t.description.strip():
-                # 截取前30个字符，避免太长
-                desc_preview = t.description.strip().replace('\n', ' ')
-                if len(desc_preview) > 30: desc_preview = desc_preview[:30] + "..."
-                display_text += f"\n      ↳ {desc_preview}"
-            
-            item = QListWidgetItem(display_text)
-            item.setData(Qt.ItemDataRole.UserRole, t)
-            
-            # 如果有描述，适当增加行高
-            if t.description and t.description.strip():
-                item.setSizeHint(QSize(item.sizeHint().width(), 50))
-            
-            # 已完成样式
-            if t.status == "已完成":
-                font = item.font()
-                font.setStrikeOut(True)
-                item.setFont(font)
-                item.setForeground(QColor("#a8a29e")) # 灰色
-                
-            self.list_widget.addItem(item)
-            
-        # 更新进度条
-        if total_tasks > 0:
-            self.progress_bar.setValue(int(done_tasks / total_tasks * 100))
+        done_tasks = sum(1 for t in self.tasks.values() if t.status == "已完成")
+        self.progress_bar.setValue(int(done_tasks / len(self.tasks) * 100))
+
+    # [New] 仓库变更通知: 只增/删/改受影响的那一项
+    def on_task_changed(self, change):
+        if change.kind == "reset" or not self.isVisible():
+            self.loaded_date = None # 隐藏时只标记过期, 下次显示再读取
+            if self.isVisible(): self.load_data()
+            return
+        if self.loaded_date not in change.dates: return
+        task = change.task
+        old = self.tasks.get(task.id)
+        keep = (change.kind != "deleted" and task.date_str == self.loaded_date
+                and task.tag in self.repo.tag_colors())
+        if old is not None and keep and (old.priority, old.tag) == (task.priority, task.tag):
+            # 位置不变 (如勾选完成): 原地更新
+            self.tasks[task.id] = task
+            self.apply_task(self.items[task.id], task)
         else:
-            self.progress_bar.setValue(0)
+            if old is not None:
+                del self.tasks[task.id]
+                self.list_widget.takeItem(self.list_widget.row(self.items.pop(task.id)))
+            if keep:
+                self.tasks[task.id] = task
+                # 与 get_tasks 相同的排序: 优先级降序, id 升序
+                row = sum(1 for t in self.tasks.values() if (-t.priority, t.id) < (-task.priority, task.id))
+                item = QListWidgetItem()
+                self.apply_task(item, task)
+                self.items[task.id] = item
+                self.list_widget.insertItem(row, item)
+        self.update_progress()
+
+    def check_for_changes(self):
+        """定时检查: 其他进程改过数据库则整体失效; 跨天则重新读取."""
+        self.repo.sync()
+        self.ensure_loaded()
+
+    def showEvent(self, event):
+        self.watch_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.watch_timer.stop()
+        super().hideEvent(event)
 
     def toggle_task(self, item):
         task = item.data(Qt.ItemDataRole.UserRole)
         if not task: return
         new_status = "已完成" if task.status != "已完成" else "待完成"
-        self.db.update_task_status(task.id, new_status)
-        self.load_data()
+        # 变更通知会原地更新这一项, 并同步主界面
+        self.repo.update_task_status(task.id, new_status)
 
     # [新增] 右键菜单功能
     def show_context_menu(self, pos):
@@ -354,6 +589,15 @@ class AddTagDialog(QDialog):
         return self.input_name.text(), self.colors[self.combo_color.currentIndex()][0]
 
 class TaskDialog(QDialog):
+    # (显示文字, (freq, weekdays)); 间隔由旁边的数字框决定
+    REPEAT_CHOICES = [
+        ("不重复", None),
+        ("每天", ("daily", None)),
+        ("每个工作日", ("weekly", [0, 1, 2, 3, 4])),
+        ("每周", ("weekly", None)),
+        ("每月", ("monthly", None)),
+    ]
+
     def __init__(self, tag_dict, parent=None, task: Task = None):
         super().__init__(parent)
         self.task = task
@@ -362,7 +606,7 @@ class TaskDialog(QDialog):
         self.setStyleSheet("""
             QDialog { background-color: #2C2C2E; border-radius: 10px; }
             QLabel { color: #BBBBBB; font-size: 14px; }
-            QLineEdit, QComboBox, QTextEdit { background-color: #333; border: 1px solid #555; padding: 8px; border-radius: 6px; color: white; font-size: 14px; }
+            QLineEdit, QComboBox, QTextEdit, QSpinBox { background-color: #333; border: 1px solid #555; padding: 8px; border-radius: 6px; color: white; font-size: 14px; }
             QTextEdit { padding: 5px; }
         """)
         layout = QVBoxLayout(self)
@@ -390,6 +634,25 @@ class TaskDialog(QDialog):
         row_meta.addWidget(self.combo_priority)
         
         form.addLayout(row_meta)
+
+        # [New] 重复规则 (仅新建时): 规则只存一条, 各日期的事项按需生成
+        self.combo_repeat = None
+        if not task:
+            row_repeat = QHBoxLayout()
+            row_repeat.addWidget(QLabel("重复"))
+            self.combo_repeat = QComboBox()
+            for text, rule in self.REPEAT_CHOICES:
+                self.combo_repeat.addItem(text, rule)
+            row_repeat.addWidget(self.combo_repeat)
+            row_repeat.addSpacing(20)
+            row_repeat.addWidget(QLabel("间隔"))
+            self.spin_interval = QSpinBox()
+            self.spin_interval.setRange(1, 30)
+            self.spin_interval.setEnabled(False)
+            self.combo_repeat.currentIndexChanged.connect(
+                lambda: self.spin_interval.setEnabled(self.combo_repeat.currentData() is not None))
+            row_repeat.addWidget(self.spin_interval)
+            form.addLayout(row_repeat)
         layout.addLayout(form)
         
         layout.addWidget(QLabel("详细描述 (可选):"))
@@ -422,9 +685,17 @@ class TaskDialog(QDialog):
             "tag": self.combo_tag.currentText(),
             "status": self.task.status if self.task else "待完成",
             "priority": priorities[self.combo_priority.currentIndex()],
-            "description": self.input_desc.toPlainText()
+            "description": self.input_desc.toPlainText(),
+            "repeat": self.get_repeat()
         }
 
+    def get_repeat(self):
+        """返回 (freq, interval, weekdays), 不重复时为 None."""
+        rule = self.combo_repeat.currentData() if self.combo_repeat else None
+        if rule is None: return None
+        freq, weekdays = rule
+        return freq, self.spin_interval.value(), weekdays
+
 class AdvancedSearchDialog(QDialog):
     def __init__(self, tag_list, parent=None):
         super().__init__(parent)
@@ -487,9 +758,70 @@ class AdvancedSearchDialog(QDialog):
             "min_priority": self.combo_priority.currentData()
         }
 
+# [New] 趋势柱状图: 灰色为任务总数, 蓝色为已完成
+class TrendChart(QWidget):
+    MAX_BUCKETS = {"day": 31, "week": 26, "month": 24, "year": 20}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.buckets = []
+        self.setMinimumHeight(160)
+        self.setMouseTracking(True)
+
+    def set_data(self, trend, granularity):
+        self.buckets = trend[-self.MAX_BUCKETS.get(granularity, 24):]
+        self.update()
+
+    def bar_rects(self):
+        if not self.buckets: return []
+        area = QRectF(self.rect()).adjusted(4, 8, -4, -22)
+        peak = max(total for _, total, _ in self.buckets) or 1
+        slot = area.width() / len(self.buckets)
+        width = max(2.0, slot * 0.7)
+        rects = []
+        for i, (_, total, done) in enumerate(self.buckets):
+            x = area.left() + i * slot + (slot - width) / 2
+            h_total = area.height() * total / peak
+            h_done = area.height() * done / peak
+            rects.append((QRectF(x, area.bottom() - h_total, width, h_total),
+                          QRectF(x, area.bottom() - h_done, width, h_done)))
+        return rects
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        if not self.buckets:
+            painter.setPen(QColor("#8E8E93"))
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "暂无数据")
+            return
+        painter.setPen(Qt.PenStyle.NoPen)
+        for total_rect, done_rect in self.bar_rects():
+            painter.setBrush(QColor("#48484A"))
+            painter.drawRoundedRect(total_rect, 2, 2)
+            painter.setBrush(QColor("#0A84FF"))
+            painter.drawRoundedRect(done_rect, 2, 2)
+        # 只标注首尾两个区间, 其余通过悬停提示查看
+        painter.setPen(QColor("#8E8E93"))
+        painter.setFont(get_font(10))
+        label_rect = QRect(4, self.height() - 18, self.width() - 8, 16)
+        painter.drawText(label_rect, Qt.AlignmentFlag.AlignLeft, self.buckets[0][0])
+        painter.drawText(label_rect, Qt.AlignmentFlag.AlignRight, self.buckets[-1][0])
+
+    def mouseMoveEvent(self, event):
+        for (bucket, total, done), (total_rect, _) in zip(self.buckets, self.bar_rects()):
+            if total_rect.left() - 2 <= event.position().x() <= total_rect.right() + 2:
+                QToolTip.showText(event.globalPosition().toPoint(), f"{bucket}: 完成 {done} / {total}", self)
+                return
+        QToolTip.hideText()
+
 class StatsDialog(QDialog):
-    def __init__(self, stats_data, parent=None):
+    GRANULARITIES = [("按日", "day"), ("按周", "week"), ("按月", "month"), ("按年", "year")]
+
+    def __init__(self, parent=None, loader=None, tag_colors=None, executor=None):
         super().__init__(parent)
+        self.loader = loader # granularity -> stats, 用于切换趋势粒度
+        self.tag_colors = tag_colors or {}
+        self.executor = executor
         self.setWindowTitle("数据统计分析")
         self.setFixedWidth(400)
         self.setStyleSheet("""
@@ -504,33 +836,269 @@ class StatsDialog(QDialog):
         title = QLabel("📊 任务概览")
         title.setFont(get_font(16, True))
         layout.addWidget(title)
+        # [修改] 先搭好空控件, 统计结果由后台查询回填
         grid = QGridLayout()
         grid.addWidget(QLabel("总任务数:"), 0, 0)
-        grid.addWidget(QLabel(f"<b>{stats_data['total']}</b>"), 0, 1)
+        self.lbl_total = QLabel("<b>…</b>")
+        grid.addWidget(self.lbl_total, 0, 1)
         grid.addWidget(QLabel("已完成:"), 1, 0)
-        lbl_done = QLabel(f"<b>{stats_data['done']}</b>")
-        lbl_done.setStyleSheet("color: #30D158;")
-        grid.addWidget(lbl_done, 1, 1)
+        self.lbl_done = QLabel("<b>…</b>")
+        self.lbl_done.setStyleSheet("color: #30D158;")
+        grid.addWidget(self.lbl_done, 1, 1)
         grid.addWidget(QLabel("待办中:"), 2, 0)
-        lbl_todo = QLabel(f"<b>{stats_data['todo']}</b>")
-        lbl_todo.setStyleSheet("color: #FF9F0A;")
-        grid.addWidget(lbl_todo, 2, 1)
+        self.lbl_todo = QLabel("<b>…</b>")
+        self.lbl_todo.setStyleSheet("color: #FF9F0A;")
+        grid.addWidget(self.lbl_todo, 2, 1)
         layout.addLayout(grid)
         layout.addSpacing(10)
         layout.addWidget(QLabel("完成率:"))
-        progress = QProgressBar()
-        progress.setRange(0, 100)
-        rate = 0
-        if stats_data['total'] > 0:
-            rate = int((stats_data['done'] / stats_data['total']) * 100)
-        progress.setValue(rate)
-        layout.addWidget(progress)
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 100)
+        layout.addWidget(self.progress)
         layout.addSpacing(10)
-        layout.addWidget(QLabel(f"重要任务 (★3+): {stats_data['high_prio']} 个"))
+        self.lbl_high = QLabel("重要任务 (★3+): …")
+        layout.addWidget(self.lbl_high)
+
+        # [New] 各标签完成情况
+        self.tag_grid = QGridLayout()
+        layout.addLayout(self.tag_grid)
+
+        # [New] 完成趋势
+        trend_header = QHBoxLayout()
+        trend_header.addWidget(QLabel("完成趋势:"))
+        trend_header.addStretch()
+        self.combo_granularity = QComboBox()
+        for text, key in self.GRANULARITIES:
+            self.combo_granularity.addItem(text, key)
+        self.combo_granularity.setCurrentIndex(2)
+        self.combo_granularity.setEnabled(loader is not None)
+        self.combo_granularity.currentIndexChanged.connect(self.change_granularity)
+        trend_header.addWidget(self.combo_granularity)
+        layout.addLayout(trend_header)
+        self.chart = TrendChart()
+        layout.addWidget(self.chart)
+
         btn_close = QPushButton("关闭")
         btn_close.setObjectName("PrimaryButton")
         btn_close.clicked.connect(self.accept)
         layout.addWidget(btn_close)
+        if loader is not None: self.change_granularity()
+
+    def change_granularity(self):
+        granularity = self.combo_granularity.currentData()
+        run_query(self.executor, "stats", self.loader, granularity,
+                  on_result=lambda stats: self.set_stats(stats, granularity), on_error=self.show_error)
+
+    def show_error(self, error):
+        QMessageBox.critical(self, "错误", f"统计分析失败: {str(error)}")
+
+    def set_stats(self, stats_data, granularity):
+        self.lbl_total.setText(f"<b>{stats_data['total']}</b>")
+        self.lbl_done.setText(f"<b>{stats_data['done']}</b>")
+        self.lbl_todo.setText(f"<b>{stats_data['todo']}</b>")
+        rate = 0
+        if stats_data['total'] > 0:
+            rate = int((stats_data['done'] / stats_data['total']) * 100)
+        self.progress.setValue(rate)
+        self.lbl_high.setText(f"重要任务 (★3+): {stats_data['high_prio']} 个")
+        while self.tag_grid.count():
+            self.tag_grid.takeAt(0).widget().deleteLater()
+        by_tag = stats_data.get("by_tag", {})
+        for row, (tag, (total, done)) in enumerate(sorted(by_tag.items(), key=lambda kv: -kv[1][0])):
+            color = self.tag_colors.get(tag, "#8E8E93")
+            self.tag_grid.addWidget(QLabel(f"<span style='color:{color}'>●</span> {html.escape(tag)}"), row, 0)
+            bar = QProgressBar()
+            bar.setRange(0, max(total, 1))
+            bar.setValue(done)
+            bar.setFormat(f"{done}/{total}")
+            self.tag_grid.addWidget(bar, row, 1)
+        self.chart.set_data(stats_data.get("trend", []), granularity)
+
+# [New] 年度热力图: 每年 7 行 x 53 列, 颜色深浅表示当天任务量, 色相表示完成度
+class YearHeatmapWidget(QWidget):
+    date_clicked = pyqtSignal(QDate)
+    EMPTY_COLOR = "#3A3A3C"
+    # 完成度分档: 未完成 / 部分完成 / 全部完成
+    RATIO_COLORS = ["#FF9F0A", "#0A84FF", "#30D158"]
+    LOAD_ALPHAS = [90, 150, 205, 255]
+    YEAR_LABEL_HEIGHT = 20
+    YEAR_SPACING = 12
+    LEFT_MARGIN = 28
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.years = []
+        self.load = {}
+        self.cells = [] # (QRectF, date, total, done, high), 在 set_data / resize 时计算一次
+        self.batches = {} # 画刷颜色 -> [QRectF], paintEvent 中每种颜色只绘制一次
+        self.setMouseTracking(True)
+        self.setMinimumSize(560, 150)
+
+    def set_data(self, years, load):
+        self.years = list(years)
+        self.load = load
+        self.update_min_height()
+        self.layout_cells()
+        self.update()
+
+    def update_min_height(self):
+        # 格子大小随宽度变化, 最小高度按实际格子计算, 否则最后一年被截断且无法滚动到
+        height = 4 + len(self.years) * self.year_block_height(self.cell_size())
+        if height != self.minimumHeight(): self.setMinimumHeight(max(150, height))
+
+    def cell_size(self):
+        return max(6.0, min(16.0, (self.width() - self.LEFT_MARGIN - 8) / 54))
+
+    def year_block_height(self, cell):
+        return int(self.YEAR_LABEL_HEIGHT + cell * 7 + self.YEAR_SPACING)
+
+    def color_key(self, total, done, peak):
+        if total <= 0: return self.EMPTY_COLOR, 255
+        level = min(len(self.LOAD_ALPHAS) - 1, (total * len(self.LOAD_ALPHAS) - 1) // max(peak, 1))
+        ratio = 2 if done >= total else (1 if done else 0)
+        return self.RATIO_COLORS[ratio], self.LOAD_ALPHAS[level]
+
+    def layout_cells(self):
+        self.cells, self.batches = [], {}
+        if not self.years: return
+        cell = self.cell_size()
+        gap = 2.0 if cell >= 9 else 1.0
+        peak = max((v[0] for v in self.load.values()), default=1)
+        top = 4.0
+        for year in self.years:
+            first = datetime.date(year, 1, 1)
+            offset = first.weekday() # 周一为每列第一行
+            day = first
+            while day.year == year:
+                index = (day - first).days + offset
+                col, row = divmod(index, 7)
+                rect = QRectF(self.LEFT_MARGIN + col * cell, top + self.YEAR_LABEL_HEIGHT + row * cell,
+                              cell - gap, cell - gap)
+                date_str = day.isoformat()
+                total, done, high = self.load.get(date_str, (0, 0, 0))
+                self.cells.append((rect, day, total, done, high))
+                self.batches.setdefault(self.color_key(total, done, peak), []).append(rect)
+                day += datetime.timedelta(days=1)
+            top += self.year_block_height(cell)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_min_height()
+        self.layout_cells()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        if not self.years:
+            painter.setPen(QColor("#8E8E93"))
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "暂无数据")
+            return
+        painter.setPen(Qt.PenStyle.NoPen)
+        for (color, alpha), rects in self.batches.items():
+            brush = QColor(color)
+            brush.setAlpha(alpha)
+            painter.setBrush(brush)
+            painter.drawRects(rects)
+
+        painter.setPen(QColor("#8E8E93"))
+        painter.setFont(get_font(10))
+        cell = self.cell_size()
+        top = 4
+        for year in self.years:
+            painter.drawText(QRect(self.LEFT_MARGIN, top, 80, self.YEAR_LABEL_HEIGHT - 4),
+                             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, f"{year}年")
+            for row, name in ((0, "一"), (2, "三"), (4, "五")):
+                painter.drawText(QRect(0, int(top + self.YEAR_LABEL_HEIGHT + row * cell), self.LEFT_MARGIN - 6, int(cell)),
+                                 Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, name)
+            top += self.year_block_height(cell)
+
+    def cell_at(self, pos):
+        for entry in self.cells:
+            if entry[0].contains(pos): return entry
+        return None
+
+    def mouseMoveEvent(self, event):
+        entry = self.cell_at(event.position())
+        if entry is None:
+            QToolTip.hideText()
+            return
+        _, day, total, done, high = entry
+        text = f"{day.isoformat()}: 完成 {done} / {total}" if total else f"{day.isoformat()}: 无任务"
+        if high: text += f", 重要 {high}"
+        QToolTip.showText(event.globalPosition().toPoint(), text, self)
+
+    def mousePressEvent(self, event):
+        entry = self.cell_at(event.position())
+        if entry is not None and event.button() == Qt.MouseButton.LeftButton:
+            day = entry[1]
+            self.date_clicked.emit(QDate(day.year, day.month, day.day))
+
+class HeatmapDialog(QDialog):
+    MAX_YEARS = 5
+
+    def __init__(self, loader, parent=None, executor=None):
+        super().__init__(parent)
+        self.loader = loader # (start, end) -> {date_str: (total, done, high)}
+        self.executor = executor
+        self.setWindowTitle("年度热力图")
+        self.resize(860, 420)
+        self.setStyleSheet("""
+            QDialog { background-color: #2C2C2E; color: white; border-radius: 8px; }
+            QLabel { color: #DDDDDD; font-size: 14px; }
+            QScrollArea, QScrollArea > QWidget > QWidget { background: transparent; }
+        """)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        header = QHBoxLayout()
+        header.addWidget(QLabel("截止年份:"))
+        this_year = datetime.date.today().year
+        self.spin_year = QSpinBox()
+        self.spin_year.setRange(1970, this_year + 10)
+        self.spin_year.setValue(this_year)
+        header.addWidget(self.spin_year)
+        header.addWidget(QLabel("显示年数:"))
+        self.spin_span = QSpinBox()
+        self.spin_span.setRange(1, self.MAX_YEARS)
+        header.addWidget(self.spin_span)
+        header.addStretch()
+        self.lbl_summary = QLabel()
+        header.addWidget(self.lbl_summary)
+        layout.addLayout(header)
+
+        self.heatmap = YearHeatmapWidget()
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        scroll.setFrameShape(QFrame.Shape.NoFrame)
+        scroll.setWidget(self.heatmap)
+        layout.addWidget(scroll, 1)
+
+        legend = QLabel(" ".join(f"<span style='color:{c}'>■</span> {t}" for c, t in
+                                 zip(YearHeatmapWidget.RATIO_COLORS, ["未完成", "部分完成", "全部完成"]))
+                        + "  (颜色越深任务越多, 点击日期跳转)")
+        legend.setFont(get_font(11))
+        layout.addWidget(legend)
+
+        self.spin_year.valueChanged.connect(self.reload)
+        self.spin_span.valueChanged.connect(self.reload)
+        self.reload()
+
+    def reload(self):
+        # [修改] 分组查询在后台执行, 连续调整年份时只应用最新一次结果
+        last = self.spin_year.value()
+        years = list(range(last - self.spin_span.value() + 1, last + 1))
+        self.lbl_summary.setText("加载中…")
+        run_query(self.executor, "heatmap", self.loader, f"{years[0]:04d}-01-01", f"{last + 1:04d}-01-01",
+                  on_result=lambda load: self.apply_load(years, load), on_error=self.show_error)
+
+    def show_error(self, error):
+        self.lbl_summary.setText("")
+        QMessageBox.critical(self, "错误", f"热力图加载失败: {str(error)}")
+
+    def apply_load(self, years, load):
+        total = sum(v[0] for v in load.values())
+        done = sum(v[1] for v in load.values())
+        self.lbl_summary.setText(f"{len(load)} 天有任务, 完成 {done} / {total}")
+        self.heatmap.set_data(years, load)
 
 class PreferencesDialog(QDialog):
     def __init__(self, current_settings, parent=None):
@@ -555,6 +1123,14 @@ class PreferencesDialog(QDialog):
         self.chk_show_completed.setChecked(current_settings.get("show_completed_cal", True))
         self.chk_show_completed.setEnabled(False) 
         layout.addWidget(self.chk_show_completed)
+        # [New] 备份设置
+        layout.addWidget(QLabel("备份", font=get_font(15, True)))
+        self.chk_auto_backup = QCheckBox("每 30 分钟自动备份 (无改动时跳过)")
+        self.chk_auto_backup.setChecked(current_settings.get("auto_backup", True))
+        layout.addWidget(self.chk_auto_backup)
+        self.chk_backup_compress = QCheckBox("压缩备份文件 (.gz)")
+        self.chk_backup_compress.setChecked(current_settings.get("backup_compress", False))
+        layout.addWidget(self.chk_backup_compress)
         btn_layout = QHBoxLayout()
         btn_save = QPushButton("保存")
         btn_save.setObjectName("PrimaryButton")
@@ -566,15 +1142,20 @@ class PreferencesDialog(QDialog):
     def get_settings(self):
         return {
             "confirm_delete": self.chk_confirm_delete.isChecked(),
-            "show_completed_cal": self.chk_show_completed.isChecked()
+            "show_completed_cal": self.chk_show_completed.isChecked(),
+            "auto_backup": self.chk_auto_backup.isChecked(),
+            "backup_compress": self.chk_backup_compress.isChecked()
         }
 
 class BigCalendarWidget(QCalendarWidget):
     dayDoubleClicked = pyqtSignal(QDate)
+    CELL_CACHE_LIMIT = 256 # 约 6 屏格子, 超出后整体清空
 
-    def __init__(self, task_manager, parent=None):
+    def __init__(self, task_manager, parent=None, executor=None, repository=None):
         super().__init__(parent)
         self.task_manager = task_manager
+        self.executor = executor
+        self.repo = repository
         self.active_tags_list = []
         self.tag_colors = {}
         self.date_rects = {} 
@@ -599,58 +1180,154 @@ class BigCalendarWidget(QCalendarWidget):
                     Qt.DayOfWeek.Thursday, Qt.DayOfWeek.Friday, Qt.DayOfWeek.Saturday, Qt.DayOfWeek.Sunday]:
             self.setWeekdayTextFormat(day, fmt)
         self.summary_cache = {} 
+        self.summary_by_day = {}
+        self.month_tasks = {}
+        self.grid_range = ("", "")
+        self.tooltip_cache = {}
+        self.cell_dates = {}
+        self.cell_cache = {}
+        self.font_day = get_font(14, bold=True)
+        self.font_lunar = get_font(10)
+        self.font_tag = get_font(9)
         self.currentPageChanged.connect(self.update_cache)
         
     def set_config(self, tags_list, colors_dict):
         self.active_tags_list = tags_list
         self.tag_colors = colors_dict
+        self.cell_cache.clear()
         self.update_cache()
 
     def update_cache(self):
         year = self.yearShown()
         month = self.monthShown()
-        self.summary_cache = self.task_manager.get_month_task_summary(year, month, self.active_tags_list)
+        run_query(self.executor, "calendar", self.load_month, year, month, list(self.active_tags_list),
+                  on_result=self.apply_month)
+
+    def load_month(self, year, month, tags):
+        """后台线程执行: 月度摘要 + 当前 6 行网格覆盖的全部任务 (悬停提示直接读内存)."""
+        summary = self.task_manager.get_month_task_summary(year, month, tags)
+        first = QDate(year, month, 1)
+        grid_range = (first.addDays(-7).toString("yyyy-MM-dd"), first.addDays(41).toString("yyyy-MM-dd"))
+        grid_tasks = self.task_manager.search_range(grid_range[0], grid_range[1], tags, include_recurring=True)
+        return summary, grid_tasks, grid_range
+
+    def apply_month(self, result):
+        summary, grid_tasks, self.grid_range = result
+        self.summary_cache = summary
+        self.summary_by_day = {QDate.fromString(d, "yyyy-MM-dd").toJulianDay(): info for d, info in summary.items()}
+        self.month_tasks = {}
+        for t in grid_tasks:
+            self.month_tasks.setdefault(t.date_str, []).append(t)
+        self.tooltip_cache = {}
         self.date_rects = {}
+        self.cell_dates = {}
         self.update()
 
+    def on_task_changed(self, change):
+        """只刷新受影响日期的摘要/提示, 并只重绘对应格子."""
+        if change.kind == "reset" or self.repo is None:
+            self.update_cache()
+            return
+        for date_str in change.dates:
+            if not (self.grid_range[0] <= date_str <= self.grid_range[1]): continue
+            # [修改] 冷月份的同步加载放到后台, 每个日期只保留最新一次请求
+            run_query(self.executor, f"calendar_day:{date_str}", self.load_day, date_str, list(self.active_tags_list),
+                      on_result=self.apply_day)
+
+    def load_day(self, date_str, tags):
+        """后台线程执行: 单日任务 + 摘要."""
+        return date_str, tags, self.repo.get_tasks(date_str, tags), self.repo.day_summary(date_str, tags)
+
+    def apply_day(self, result):
+        date_str, tags, tasks, info = result
+        # 标签已切换或已翻页时, 整月重载会覆盖这一天
+        if tags != list(self.active_tags_list) or not (self.grid_range[0] <= date_str <= self.grid_range[1]): return
+        if tasks: self.month_tasks[date_str] = tasks
+        else: self.month_tasks.pop(date_str, None)
+        self.tooltip_cache.pop(date_str, None)
+        date = QDate.fromString(date_str, "yyyy-MM-dd")
+        if info and date.month() == self.monthShown():
+            self.summary_cache[date_str] = info
+            self.summary_by_day[date.toJulianDay()] = info
+        else:
+            self.summary_cache.pop(date_str, None)
+            self.summary_by_day.pop(date.toJulianDay(), None)
+        rect = self.date_rects.get(date)
+        if rect is not None and self.view: self.view.viewport().update(rect)
+        else: self.update()
+
+    def date_at(self, pos):
+        """视口坐标 -> (日期, 格子矩形), 由表格视图直接定位单元格."""
+        index = self.view.indexAt(pos)
+        if not index.isValid(): return None, None
+        if not self.cell_dates:
+            # (行, 列) -> 日期 只随月份变化, 每月由已绘制的格子建一次
+            for date, rect in self.date_rects.items():
+                cell = self.view.indexAt(rect.center())
+                if cell.isValid(): self.cell_dates[(cell.row(), cell.column())] = date
+        date = self.cell_dates.get((index.row(), index.column()))
+        return date, self.view.visualRect(index)
+
+    def tooltip_for(self, date):
+        date_str = date.toString("yyyy-MM-dd")
+        text = self.tooltip_cache.get(date_str)
+        if text is None:
+            tasks = self.month_tasks.get(date_str, [])
+            # 与 get_tasks_by_date_and_tags 相同的排序
+            tasks = sorted(tasks, key=lambda t: (-t.priority, t.id))
+            if tasks:
+                text = f"<b>{date_str}</b><br>"
+                for t in tasks:
+                    status_mark = "✅ " if t.status == "已完成" else "⬜ "
+                    star_mark = "★" * t.priority if t.priority > 0 else ""
+                    text += f"{status_mark} [{t.tag}] {t.content} <span style='color:orange'>{star_mark}</span><br>"
+            else:
+                text = "无事项"
+            self.tooltip_cache[date_str] = text
+        return text
+
     def eventFilter(self, watched, event):
         if event.type() == QEvent.Type.MouseButtonDblClick:
             self.selected_date = self.selectedDate()
             self.dayDoubleClicked.emit(self.selected_date)
             return True 
-        if event.type() == QEvent.Type.ToolTip:
-            pos = event.pos()
-            found_date = None
-            for date, rect in self.date_rects.items():
-                if rect.contains(pos):
-                    found_date = date
-                    break
+        if event.type() == QEvent.Type.ToolTip and self.view:
+            viewport = self.view.viewport()
+            pos = event.pos() if watched is viewport else viewport.mapFrom(watched, event.pos())
+            found_date, rect = self.date_at(pos)
             if found_date:
-                tasks = self.task_manager.get_tasks_by_date_and_tags(found_date.toString("yyyy-MM-dd"), self.active_tags_list)
-                if tasks:
-                    tooltip_text = f"<b>{found_date.toString('yyyy-MM-dd')}</b><br>"
-                    for t in tasks:
-                        status_mark = "✅ " if t.status == "已完成" else "⬜ "
-                        star_mark = "★" * t.priority if t.priority > 0 else ""
-                        tooltip_text += f"{status_mark} [{t.tag}] {t.content} <span style='color:orange'>{star_mark}</span><br>"
-                    QToolTip.showText(event.globalPos(), tooltip_text, watched, rect)
-                else:
-                    QToolTip.showText(event.globalPos(), "无事项", watched, rect)
+                QToolTip.showText(event.globalPos(), self.tooltip_for(found_date), viewport, rect)
                 return True
         return super().eventFilter(watched, event)
 
     def paintCell(self, painter, rect, date):
-        painter.save()
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        # 每个格子渲染成 pixmap 缓存, 键包含决定外观的全部状态, 悬停/滚动重绘时直接贴图
         self.date_rects[date] = rect
-        painter.fillRect(rect, QColor("#252525"))
-        painter.setPen(QColor("#3A3A3A")) 
-        painter.drawRect(rect)
         is_selected = (date == self.selectedDate())
         is_today = (date == QDate.currentDate())
         is_current_month = (date.month() == self.monthShown())
-        date_str = date.toString("yyyy-MM-dd")
-        task_info = self.summary_cache.get(date_str) 
+        task_info = self.summary_by_day.get(date.toJulianDay())
+        dpr = painter.device().devicePixelRatioF()
+        key = (date.toJulianDay(), is_selected, is_today, is_current_month,
+               tuple(task_info.items()) if task_info else None, rect.width(), rect.height(), dpr)
+        pixmap = self.cell_cache.get(key)
+        if pixmap is None:
+            pixmap = QPixmap(max(1, round(rect.width() * dpr)), max(1, round(rect.height() * dpr)))
+            pixmap.setDevicePixelRatio(dpr)
+            pixmap.fill(Qt.GlobalColor.transparent)
+            cell_painter = QPainter(pixmap)
+            self.render_cell(cell_painter, QRect(0, 0, rect.width(), rect.height()), date,
+                             is_selected, is_today, is_current_month, task_info)
+            cell_painter.end()
+            if len(self.cell_cache) >= self.CELL_CACHE_LIMIT: self.cell_cache.clear()
+            self.cell_cache[key] = pixmap
+        painter.drawPixmap(rect.topLeft(), pixmap)
+
+    def render_cell(self, painter, rect, date, is_selected, is_today, is_current_month, task_info):
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.fillRect(rect, QColor("#252525"))
+        painter.setPen(QColor("#3A3A3A")) 
+        painter.drawRect(rect)
         if is_today:
             painter.setPen(Qt.PenStyle.NoPen)
             painter.setBrush(QColor("#FF3B30"))
@@ -662,8 +1339,7 @@ class BigCalendarWidget(QCalendarWidget):
         if is_today: painter.setPen(QColor("white"))
         elif not is_current_month: painter.setPen(QColor("#555555")) 
         else: painter.setPen(QColor("#FFFFFF")) 
-        font = get_font(14, bold=True)
-        painter.setFont(font)
+        painter.setFont(self.font_day)
         date_rect = QRect(rect.left() + 8, rect.top() + 8, rect.width()-10, 30)
         if is_today:
              date_rect = QRect(rect.left() + 4, rect.top() + 4, 28, 28)
@@ -672,8 +1348,7 @@ class BigCalendarWidget(QCalendarWidget):
              painter.drawText(date_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop, f"{date.day()}日")
         lunar_text, is_festival = DateUtils.get_lunar_text(date)
         if lunar_text:
-            font_lunar = get_font(10)
-            painter.setFont(font_lunar)
+            painter.setFont(self.font_lunar)
             if is_festival: painter.setPen(QColor("#FF453A")) 
             elif not is_current_month: painter.setPen(QColor("#444444"))
             else: painter.setPen(QColor("#999999")) 
@@ -691,74 +1366,368 @@ class BigCalendarWidget(QCalendarWidget):
             painter.setBrush(color)
             painter.drawRect(bg_rect)
             painter.setPen(QColor("#CCCCCC"))
-            font_tag = get_font(9)
-            painter.setFont(font_tag)
+            painter.setFont(self.font_tag)
             text_rect = QRect(rect.left() + 4, rect.bottom() - 24, rect.width()-8, 20)
             display_text = task_info['tag']
             priority = task_info.get('priority', 0)
             if priority > 0:
                 display_text += " " + "★" * priority
             painter.drawText(text_rect, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, display_text)
-        painter.restore()
+            # [New] 当日完成度: 已完成/总数, 全部完成时用绿色
+            total = task_info.get('total', 0)
+            if total:
+                done = task_info.get('done', 0)
+                painter.setPen(QColor("#30D158") if done == total else QColor("#999999"))
+                painter.drawText(text_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, f"{done}/{total}")
+
+# --- 任务列表: Model / Delegate / View ---
+# 行由 delegate 直接绘制, 只有可见行产生绘制开销; 数据更新以行级增删改通知视图
+class TaskListModel(QAbstractListModel):
+    TaskRole = Qt.ItemDataRole.UserRole
 
-class TaskItemWidget(QWidget):
-    def __init__(self, task, color_hex, show_date=False):
-        super().__init__()
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(12, 10, 12, 10)
-        layout.setSpacing(12)
-        
-        bar = QFrame()
-        bar.setFixedWidth(5)
-        bar.setStyleSheet(f"background-color: {color_hex}; border-radius: 2.5px;")
-        layout.addWidget(bar)
-        
-        content_layout = QVBoxLayout()
-        content_layout.setSpacing(4)
-        
-        row1 = QHBoxLayout()
-        title = QLabel(task.content)
-        title.setFont(get_font(15, True))
-        if task.status == "已完成":
-            title.setStyleSheet("color: #777777; text-decoration: line-through;")
-        else:
-            title.setStyleSheet("color: #FFFFFF;")
-        row1.addWidget(title)
-        
-        if task.priority > 0:
-            stars = QLabel("★" * task.priority)
-            stars.setStyleSheet("color: #FFD60A; font-size: 14px;")
-            row1.addWidget(stars)
-            
-        content_layout.addLayout(row1)
-        
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tasks = []
+        self.colors = {}
+        self.show_date = False
+        self.fetcher = None # (offset, limit, deliver) -> None, 搜索结果分页
+        self.has_more = False
+        self.loading = False
+        self.pager_token = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.tasks)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not (0 <= index.row() < len(self.tasks)): return None
+        task = self.tasks[index.row()]
+        if role == self.TaskRole: return task
+        if role == Qt.ItemDataRole.DisplayRole: return task.content
+        return None
+
+    def color_for(self, task):
+        return self.colors.get(task.tag, "#888888")
+
+    def set_tasks(self, tasks, show_date=False):
+        """替换为新列表: 按 id 做行级差异更新, 顺序变化时才整体重置."""
+        self.pager_token += 1
+        self.fetcher = None
+        self.has_more = False
+        self.loading = False
+        tasks = list(tasks)
+        if show_date != self.show_date:
+            self.show_date = show_date
+            self.beginResetModel()
+            self.tasks = tasks
+            self.endResetModel()
+            return
+
+        new_ids = {t.id for t in tasks}
+        for row in range(len(self.tasks) - 1, -1, -1):
+            if self.tasks[row].id not in new_ids:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.tasks[row]
+                self.endRemoveRows()
+
+        kept_ids = {t.id for t in self.tasks}
+        if [t.id for t in self.tasks] != [t.id for t in tasks if t.id in kept_ids]:
+            self.beginResetModel()
+            self.tasks = tasks
+            self.endResetModel()
+            return
+
+        for row, task in enumerate(tasks):
+            if row < len(self.tasks) and self.tasks[row].id == task.id:
+                if self.tasks[row] != task:
+                    self.tasks[row] = task
+                    idx = self.index(row)
+                    self.dataChanged.emit(idx, idx)
+            else:
+                self.beginInsertRows(QModelIndex(), row, row)
+                self.tasks.insert(row, task)
+                self.endInsertRows()
+
+    def update_task(self, task):
+        for row, old in enumerate(self.tasks):
+            if old.id == task.id:
+                if old.snippet and (old.content, old.description) == (task.content, task.description):
+                    task = replace(task, snippet=old.snippet)
+                self.tasks[row] = task
+                idx = self.index(row)
+                self.dataChanged.emit(idx, idx)
+                return
+
+    def place_task(self, task):
+        """
+        搜索结果的行级增改: 按 search_range 的顺序 (日期, 优先级降序, id) 插入或移动。
+        排在已加载页之后的行留给后续分页, 这样 fetchMore 的偏移量仍与数据库一致。
+        """
+        key = lambda t: (t.date_str, -t.priority, t.id)
+        old_row = next((row for row, t in enumerate(self.tasks) if t.id == task.id), None)
+        if old_row is not None:
+            old = self.tasks[old_row]
+            if old.snippet and (old.content, old.description) == (task.content, task.description):
+                task = replace(task, snippet=old.snippet)
+        others = [t for t in self.tasks if t.id != task.id]
+        row = bisect.bisect_left([key(t) for t in others], key(task))
+        if row == old_row:
+            self.tasks[row] = task
+            idx = self.index(row)
+            self.dataChanged.emit(idx, idx)
+            return
+        if old_row is not None: self.remove_task(task.id)
+        if self.has_more and row == len(others): return
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.tasks.insert(row, task)
+        self.endInsertRows()
+
+    def remove_task(self, task_id):
+        for row, old in enumerate(self.tasks):
+            if old.id == task_id:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.tasks[row]
+                self.endRemoveRows()
+                return
+
+    def set_pager(self, fetcher, show_date=True):
+        """
+        分页数据源: fetcher(offset, limit, deliver) 取一页后调用 deliver(page), 可异步。
+        视图滚动到底部时通过 fetchMore 继续加载下一页。
+        """
+        self.beginResetModel()
+        self.pager_token += 1
+        self.show_date = show_date
+        self.fetcher = fetcher
+        self.tasks = []
+        self.has_more = True
+        self.loading = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.has_more and not self.loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self.has_more or self.loading: return
+        self.loading = True
+        token = self.pager_token
+        self.fetcher(len(self.tasks), SEARCH_PAGE_SIZE, lambda page: self.append_page(token, page))
+
+    def append_page(self, token, page):
+        if token != self.pager_token: return # 数据源已更换, 丢弃旧页
+        self.loading = False
+        self.has_more = len(page) == SEARCH_PAGE_SIZE
+        if not page:
+            self.layoutChanged.emit() # 刷新空结果提示
+            return
+        self.beginInsertRows(QModelIndex(), len(self.tasks), len(self.tasks) + len(page) - 1)
+        self.tasks.extend(page)
+        self.endInsertRows()
+
+
+class LiveFilter:
+    """
+    列表内筛选 (区分大小写的子串匹配)。每个查询的命中 id 集合都会缓存:
+    输入变长时只在已缓存的较短查询结果内收窄, 删字变短时从最近的已缓存超集放宽。
+    """
+    MAX_CACHED = 32
+
+    def __init__(self):
+        self.reset([])
+
+    def reset(self, tasks):
+        self.by_id = {t.id: t for t in tasks}
+        self.cache = OrderedDict([("", set(self.by_id))])
+
+    def match(self, query):
+        hit = self.cache.get(query)
+        if hit is not None:
+            self.cache.move_to_end(query)
+            return hit
+        # 任何包含 query 的结果都必然在 "query 的子串" 的结果之内, 取最长的一个作为候选
+        base = max((q for q in self.cache if q in query), key=len)
+        hit = set()
+        for task_id in self.cache[base]:
+            t = self.by_id[task_id]
+            if query in t.content or query in (t.description or ""):
+                hit.add(task_id)
+        self.cache[query] = hit
+        while len(self.cache) > self.MAX_CACHED:
+            oldest = next(q for q in self.cache if q)
+            del self.cache[oldest]
+        return hit
+
+
+class TaskItemDelegate(QStyledItemDelegate):
+    PAD_X, PAD_Y = 12, 10
+    BAR_WIDTH = 5
+    SPACING = 12
+    LINE_SPACING = 4
+    ROW_GAP = 10 # 卡片之间的间距
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.font_title = get_font(15, True)
+        self.font_title_done = QFont(self.font_title)
+        self.font_title_done.setStrikeOut(True)
+        self.font_stars = self._px_font(14)
+        self.font_desc = self._px_font(13)
+        self.font_meta = self._px_font(12)
+        self.font_meta_bold = self._px_font(12, bold=True)
+        self.height_cache = {}
+
+    @staticmethod
+    def _px_font(px, bold=False):
+        font = get_font(10, bold)
+        font.setPixelSize(px)
+        return font
+
+    def _body(self, task):
+        """返回 (文本, 是否富文本): 搜索命中片段优先, 否则为描述."""
+        if task.snippet:
+            snippet_html = html.escape(task.snippet).replace(
+                TaskManager.HIGHLIGHT_OPEN, "<span style='color:#FFD60A;'>").replace(TaskManager.HIGHLIGHT_CLOSE, "</span>")
+            return snippet_html, True
         if task.description and task.description.strip():
-            desc_lbl = QLabel(task.description)
-            desc_lbl.setWordWrap(True)
-            desc_lbl.setStyleSheet("color: #AAAAAA; font-size: 13px; margin-top: 2px; margin-bottom: 4px;")
-            content_layout.addWidget(desc_lbl)
-        
-        row2 = QHBoxLayout()
-        tag_lbl = QLabel(task.tag)
-        tag_lbl.setStyleSheet(f"color: {color_hex}; font-size: 12px; font-weight: bold;")
-        row2.addWidget(tag_lbl)
-        
-        # [New] Status Display after Tag
-        status_text = f"[{task.status}]"
-        status_lbl = QLabel(status_text)
-        status_lbl.setStyleSheet("color: #777; font-size: 12px; margin-left: 5px;")
-        row2.addWidget(status_lbl)
-        
+            return task.description, False
+        return "", False
+
+    def _body_document(self, text, width):
+        doc = QTextDocument()
+        doc.setDefaultFont(self.font_desc)
+        doc.setDocumentMargin(0)
+        doc.setDefaultStyleSheet("body { color: #AAAAAA; }")
+        doc.setHtml(f"<body>{text}</body>")
+        doc.setTextWidth(width)
+        return doc
+
+    def _content_width(self, total_width):
+        return max(10, total_width - 2 * self.PAD_X - self.BAR_WIDTH - self.SPACING)
+
+    def _body_height(self, task, width):
+        text, rich = self._body(task)
+        if not text: return 0
+        if rich: return int(self._body_document(text, width).size().height()) + 6
+        fm = QFontMetrics(self.font_desc)
+        return fm.boundingRect(QRect(0, 0, width, 100000), Qt.TextFlag.TextWordWrap, text).height() + 6
+
+    def _view_width(self, option):
+        view = self.parent()
+        if view is not None and hasattr(view, "viewport"): return view.viewport().width()
+        return option.rect.width()
+
+    def sizeHint(self, option, index):
+        task = index.data(TaskListModel.TaskRole)
+        if task is None: return super().sizeHint(option, index)
+        width = self._view_width(option)
+        key = (task.id, task.content, task.description, task.snippet, width)
+        height = self.height_cache.get(key)
+        if height is None:
+            body = self._body_height(task, self._content_width(width))
+            height = (2 * self.PAD_Y + QFontMetrics(self.font_title).height() + self.LINE_SPACING
+                      + (body + self.LINE_SPACING if body else 0)
+                      + QFontMetrics(self.font_meta).height() + self.ROW_GAP)
+            if len(self.height_cache) > 5000: self.height_cache.clear()
+            self.height_cache[key] = height
+        return QSize(width, height)
+
+    def paint(self, painter, option, index):
+        task = index.data(TaskListModel.TaskRole)
+        if task is None: return
+        model = index.model()
+        color_hex = model.color_for(task)
+        show_date = model.show_date
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        card = option.rect.adjusted(0, 0, 0, -self.ROW_GAP)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor("#333333"))
+        painter.drawRoundedRect(card, 8, 8)
+
+        inner = card.adjusted(self.PAD_X, self.PAD_Y, -self.PAD_X, -self.PAD_Y)
+        painter.setBrush(QColor(color_hex))
+        painter.drawRoundedRect(QRect(inner.left(), inner.top(), self.BAR_WIDTH, inner.height()), 2.5, 2.5)
+
+        x = inner.left() + self.BAR_WIDTH + self.SPACING
+        width = inner.right() - x
+        y = inner.top()
+
+        # 第一行: 标题 + 星级
+        done = task.status == "已完成"
+        fm_title = QFontMetrics(self.font_title)
+        stars = "★" * task.priority if task.priority > 0 else ""
+        stars_width = QFontMetrics(self.font_stars).horizontalAdvance(stars) + 6 if stars else 0
+        title = fm_title.elidedText(task.content, Qt.TextElideMode.ElideRight, max(10, width - stars_width))
+        painter.setFont(self.font_title_done if done else self.font_title)
+        painter.setPen(QColor("#777777") if done else QColor("#FFFFFF"))
+        title_rect = QRect(x, y, width, fm_title.height())
+        painter.drawText(title_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, title)
+        if stars:
+            painter.setFont(self.font_stars)
+            painter.setPen(QColor("#FFD60A"))
+            stars_x = x + fm_title.horizontalAdvance(title) + 6
+            painter.drawText(QRect(stars_x, y, stars_width, fm_title.height()), Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, stars)
+        y += fm_title.height() + self.LINE_SPACING
+
+        # 描述 / 搜索片段
+        text, rich = self._body(task)
+        if text:
+            body_height = self._body_height(task, width)
+            if rich:
+                doc = self._body_document(text, width)
+                painter.save()
+                painter.translate(x, y + 2)
+                doc.drawContents(painter, QRectF(0, 0, width, body_height))
+                painter.restore()
+            else:
+                painter.setFont(self.font_desc)
+                painter.setPen(QColor("#AAAAAA"))
+                painter.drawText(QRect(x, y + 2, width, body_height - 6), Qt.TextFlag.TextWordWrap, text)
+            y += body_height + self.LINE_SPACING
+
+        # 第二行: 标签 / 状态 / 日期
+        fm_meta = QFontMetrics(self.font_meta)
+        meta_h = fm_meta.height()
+        painter.setFont(self.font_meta_bold)
+        painter.setPen(QColor(color_hex))
+        painter.drawText(QRect(x, y, width, meta_h), Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, task.tag)
+        mx = x + QFontMetrics(self.font_meta_bold).horizontalAdvance(task.tag) + 12 + 5
+        painter.setFont(self.font_meta)
+        painter.setPen(QColor("#777777"))
+        status_text = f"[{task.status}]" + (" 🔁 重复" if task.id < 0 else "")
+        painter.drawText(QRect(mx, y, max(0, x + width - mx), meta_h), Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, status_text)
         if show_date:
-            date_lbl = QLabel(f"📅 {task.date_str}")
-            date_lbl.setStyleSheet("color: #888888; font-size: 12px; margin-left: 10px;")
-            row2.addWidget(date_lbl)
-            
-        row2.addStretch()
-        content_layout.addLayout(row2)
-        
-        layout.addLayout(content_layout)
-        self.setStyleSheet("background-color: #333333; border-radius: 8px;")
+            mx += fm_meta.horizontalAdvance(status_text) + 12 + 10
+            painter.setPen(QColor("#888888"))
+            painter.drawText(QRect(mx, y, max(0, x + width - mx), meta_h), Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, f"📅 {task.date_str}")
+        painter.restore()
+
+
+class TaskListView(QListView):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.placeholder_text = ""
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setLayoutMode(QListView.LayoutMode.Batched)
+        self.setBatchSize(100)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+
+    def resizeEvent(self, event):
+        # 宽度变化会改变描述换行后的行高
+        self.scheduleDelayedItemsLayout()
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        model = self.model()
+        if self.placeholder_text and model is not None and model.rowCount() == 0 and not getattr(model, "loading", False):
+            painter = QPainter(self.viewport())
+            painter.setPen(QColor("#888888"))
+            painter.drawText(self.viewport().rect().adjusted(0, 20, 0, 0),
+                             Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop, self.placeholder_text)
+            painter.end()
 
 class ManageMyDayApp(QMainWindow):
     def __init__(self):
@@ -770,27 +1739,58 @@ class ManageMyDayApp(QMainWindow):
         self.app_settings = QSettings("MyCompany", "ManageMyDay")
         
         self.db = TaskManager()
+        PROFILER.mark("database")
+        self.repo = TaskRepository(self.db)
+        self.repo.subscribe(self.on_task_changed)
+        self.executor = QueryExecutor(self)
         self.current_tags = [] 
         self.active_tag_names = []
         self.is_details_expanded = False 
         
         self.search_mode = False
         self.search_filters = {}
+        self.live_filter = LiveFilter()
         self.is_pinned = False # State for pin
 
         self.init_data()
         self.init_ui()
+        PROFILER.mark("build ui")
         self.init_menu()
         self.load_styles()
+        PROFILER.mark("menu+styles")
         
-        # Initialize Mini Mode
-        self.mini_widget = MiniModeWidget(self.db)
-        self.mini_widget.restore_signal.connect(self.switch_to_normal_mode)
+        # [修改] 便签窗口在第一次进入便签模式时才创建
+        self._mini_widget = None
+
+        # [New] 定时自动备份
+        self.backup_timer = QTimer(self)
+        self.backup_timer.setInterval(AUTO_BACKUP_INTERVAL_MS)
+        self.backup_timer.timeout.connect(self.auto_backup)
+        self.auto_backup_failed = False
+        self.apply_backup_settings()
+
+        # [New] 其他进程写入后仓库缓存会过期: 定时 + 窗口激活时按数据库版本号检查
+        self.watch_timer = QTimer(self)
+        self.watch_timer.setInterval(WATCH_INTERVAL_MS)
+        self.watch_timer.timeout.connect(self.repo.sync)
+        self.watch_timer.start()
         
         self.refresh_view()
+        PROFILER.mark("first refresh")
+
+    @property
+    def mini_widget(self):
+        if self._mini_widget is None:
+            self._mini_widget = MiniModeWidget(self.repo, self.executor)
+            self._mini_widget.restore_signal.connect(self.switch_to_normal_mode)
+        return self._mini_widget
+
+    def warm_up(self):
+        """首帧之后的空闲预热: 提前算好相邻年份的农历表, 翻页时不再卡顿."""
+        year = self.calendar.yearShown()
+        self.executor.submit("warm_up", LUNAR.precompute, year - 1, year + 1)
 
     def set_app_icon(self):
-        IconLoader.ensure_dir()
         icon_path = resource_path(os.path.join(IconLoader.SAVE_DIR, "Task.ico"))
         if os.path.exists(icon_path):
             app_icon = QIcon(icon_path)
@@ -947,7 +1947,7 @@ class ManageMyDayApp(QMainWindow):
         cal_layout = QVBoxLayout(self.calendar_container)
         cal_layout.setContentsMargins(10, 10, 10, 10)
 
-        self.calendar = BigCalendarWidget(self.db)
+        self.calendar = BigCalendarWidget(self.db, executor=self.executor, repository=self.repo)
         self.calendar.currentPageChanged.connect(self.update_nav_combos_from_calendar) 
         self.calendar.dayDoubleClicked.connect(self.toggle_panel_by_double_click)
         self.calendar.clicked.connect(self.on_calendar_single_click) 
@@ -988,16 +1988,24 @@ class ManageMyDayApp(QMainWindow):
         icon_search = IconLoader.get("search")
         if not icon_search.isNull():
             self.search_input.addAction(icon_search, QLineEdit.ActionPosition.LeadingPosition)
-        self.search_input.textChanged.connect(self.refresh_task_list)
+        # [修改] 输入防抖, 停顿后再在内存中筛选当天任务
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(LIVE_FILTER_DELAY_MS)
+        self.filter_timer.timeout.connect(self.apply_live_filter)
+        self.search_input.textChanged.connect(self.filter_timer.start)
         right_layout.addWidget(self.search_input)
         
         # Task List
-        self.task_list_widget = QListWidget()
-        self.task_list_widget.setObjectName("TaskArea")
-        self.task_list_widget.itemDoubleClicked.connect(self.toggle_task_complete)
-        self.task_list_widget.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        self.task_list_widget.customContextMenuRequested.connect(self.show_context_menu)
-        right_layout.addWidget(self.task_list_widget)
+        self.task_model = TaskListModel(self)
+        self.task_list_view = TaskListView()
+        self.task_list_view.setObjectName("TaskArea")
+        self.task_list_view.setModel(self.task_model)
+        self.task_list_view.setItemDelegate(TaskItemDelegate(self.task_list_view))
+        self.task_list_view.doubleClicked.connect(self.toggle_task_complete)
+        self.task_list_view.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.task_list_view.customContextMenuRequested.connect(self.show_context_menu)
+        right_layout.addWidget(self.task_list_view)
         
         # Inner Add Button
         btn_add_task_inner = QPushButton(" 添加事项")
@@ -1060,7 +2068,11 @@ class ManageMyDayApp(QMainWindow):
         act_stats = QAction(IconLoader.get("stats"), "统计分析", self)
         act_stats.triggered.connect(self.show_statistics)
         tools_menu.addAction(act_stats)
-        
+
+        act_heatmap = QAction(IconLoader.get("stats"), "年度热力图", self)
+        act_heatmap.triggered.connect(self.show_heatmap)
+        tools_menu.addAction(act_heatmap)
+
         act_backup = QAction(IconLoader.get("backup"), "本地备份", self)
         act_backup.triggered.connect(self.create_backup)
         tools_menu.addAction(act_backup)
@@ -1075,12 +2087,20 @@ class ManageMyDayApp(QMainWindow):
         about_action.triggered.connect(lambda: QMessageBox.about(self, "关于", "Manage MyDay \n\n高效的任务管理工具。\n集成日历、任务追踪与数据分析。"))
         help_menu.addAction(about_action)
 
+    def closeEvent(self, event):
+        # Release the pooled SQLite connections (checkpoints the WAL on the last close)
+        if self._mini_widget is not None: self._mini_widget.close()
+        self.backup_timer.stop()
+        self.executor.wait()
+        self.db.close()
+        super().closeEvent(event)
+
     # --- Mode Switching ---
     
     def switch_to_mini_mode(self):
-        self.mini_widget.load_data()
         self.hide()
         self.mini_widget.show()
+        self.mini_widget.check_for_changes() # 便签数据常驻, 只在过期时重新读取
         # Ensure it appears center-ish or remember position
         if not self.mini_widget.old_pos:
             screen_geo = self.screen().geometry()
@@ -1091,8 +2111,6 @@ class ManageMyDayApp(QMainWindow):
             
     def switch_to_normal_mode(self):
         self.mini_widget.hide()
-        self.refresh_task_list() # refresh main list just in case
-        self.calendar.update_cache()
         self.show()
         self.activateWindow()
 
@@ -1107,114 +2125,126 @@ class ManageMyDayApp(QMainWindow):
         return path_in_script_dir
 
     def create_backup(self):
-        backup_dir = "backups"
-        if not os.path.exists(backup_dir):
-            os.makedirs(backup_dir)
-            
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_file = os.path.join(backup_dir, f"myday_backup_{timestamp}.db")
-        source_path = self.get_db_path()
-        
-        try:
-            if not os.path.exists(source_path):
-                QMessageBox.warning(self, "提示", f"未找到数据库文件 (myday.db)。")
-                return
-            shutil.copy(source_path, backup_file)
+        # [修改] 使用 SQLite 在线备份 API, 写入中也能得到一致的副本
+        compress = self.app_settings.value("backup_compress", False, type=bool)
+
+        def on_result(backup_file):
             QMessageBox.information(self, "成功", f"数据库备份已创建:\n{backup_file}")
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"备份失败: {str(e)}")
+
+        def on_error(error):
+            QMessageBox.critical(self, "错误", f"备份失败: {str(error)}")
+
+        self.executor.submit("backup", self.db.backup, BACKUP_DIR, compress, BACKUP_KEEP,
+                             on_result=on_result, on_error=on_error)
+
+    def auto_backup(self):
+        compress = self.app_settings.value("backup_compress", False, type=bool)
+        # only_if_changed: 自上次备份以来没有写入时直接跳过
+
+        def on_result(backup_file):
+            self.auto_backup_failed = False
+
+        def on_error(error):
+            # 与手动备份一样弹窗提示, 但连续失败时只提示一次, 成功后再重新提示
+            if self.auto_backup_failed: return
+            self.auto_backup_failed = True
+            QMessageBox.warning(self, "自动备份失败", f"自动备份失败: {str(error)}\n请检查备份目录:\n{BACKUP_DIR}")
+
+        self.executor.submit("auto_backup", self.db.backup, BACKUP_DIR, compress, BACKUP_KEEP, True,
+                             on_result=on_result, on_error=on_error)
+
+    def apply_backup_settings(self):
+        if self.app_settings.value("auto_backup", True, type=bool): self.backup_timer.start()
+        else: self.backup_timer.stop()
 
     def export_data(self):
-        file_path, _ = QFileDialog.getSaveFileName(self, "导出数据", "myday_export.json", "JSON Files (*.json)")
+        # [修改] 流式导出: 后台分批读取, 可选 gzip 紧凑格式, 进度条可取消
+        file_path, selected = QFileDialog.getSaveFileName(
+            self, "导出数据", "myday_export.json", "JSON Files (*.json);;压缩 JSON (*.json.gz)")
         if not file_path: return
-            
-        source_path = self.get_db_path()
-        if not os.path.exists(source_path): return
+        compact = file_path.endswith(".gz") or selected.startswith("压缩")
+        if compact and not file_path.endswith(".gz"):
+            file_path += ".gz" if file_path.endswith(".json") else ".json.gz"
 
-        try:
-            conn = sqlite3.connect(source_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT name, color FROM tags")
-            tags_data = [{"name": row[0], "color": row[1]} for row in cursor.fetchall()]
-            
-            # Export description too
-            cursor.execute("SELECT id, date_str, content, status, tag, priority, description FROM tasks")
-            tasks_data = [
-                {"id": r[0], "date_str": r[1], "content": r[2], "status": r[3], "tag": r[4], "priority": r[5], "description": r[6]}
-                for r in cursor.fetchall()
-            ]
-            conn.close()
-            
-            export_data = {"version": "1.1", "tags": tags_data, "tasks": tasks_data}
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, ensure_ascii=False, indent=4)
-            QMessageBox.information(self, "成功", f"数据已成功导出为 JSON:\n{file_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"导出失败: {str(e)}")
+        progress = QProgressDialog("正在导出...", "取消", 0, 0, self)
+        progress.setWindowTitle("导出数据")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(300)
+
+        def on_progress(done, total):
+            progress.setMaximum(max(total, 1))
+            progress.setValue(done)
+
+        def on_result(count):
+            progress.close()
+            QMessageBox.information(self, "成功", f"已导出 {count} 条任务:\n{file_path}")
+
+        def on_error(error):
+            progress.close()
+            if not isinstance(error, ExportCancelled):
+                QMessageBox.critical(self, "错误", f"导出失败: {str(error)}")
+
+        # 取消时让执行器作废这次导出, 后台回调返回 False 后清理临时文件
+        progress.canceled.connect(lambda: self.executor.cancel("export"))
+        self.executor.submit("export", self.db.export_json, file_path, compact,
+                             on_result=on_result, on_error=on_error, on_progress=on_progress)
 
     def import_data(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "导入数据", "", "JSON Files (*.json)")
+        # [修改] 流式导入: 后台分批写入同一事务, 跳过重复任务, 出错整体回滚
+        file_path, _ = QFileDialog.getOpenFileName(self, "导入数据", "", "JSON Files (*.json *.json.gz)")
         if not file_path: return
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            if "tasks" not in data: raise ValueError("无效的数据文件格式: 缺少 tasks 字段")
-            
-            db_path = self.get_db_path()
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            if "tags" in data:
-                for tag in data["tags"]:
-                    try: cursor.execute("INSERT OR IGNORE INTO tags (name, color) VALUES (?, ?)", (tag["name"], tag["color"]))
-                    except: pass
-            
-            count = 0
-            for task in data["tasks"]:
-                cursor.execute(
-                    "INSERT INTO tasks (date_str, content, status, tag, priority, description) VALUES (?, ?, ?, ?, ?, ?)",
-                    (task["date_str"], task["content"], task["status"], task["tag"], task.get("priority", 0), task.get("description", ""))
-                )
-                count += 1
-            
-            conn.commit()
-            conn.close()
-            self.db = TaskManager() 
-            self.init_data()
-            self.refresh_view()
-            self.calendar.update_cache()
-            QMessageBox.information(self, "成功", f"成功导入 {count} 条任务！")
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"导入失败: {str(e)}")
+
+        progress = QProgressDialog("正在导入...", "取消", 0, 100, self)
+        progress.setWindowTitle("导入数据")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(300)
+        progress.setAutoClose(False)
+
+        def on_progress(done, total):
+            progress.setValue(int(done * 100 / total) if total else 0)
+
+        def on_result(result):
+            progress.close()
+            imported, skipped = result
+            self.repo.invalidate() # 发出 reset 通知, 各视图整体重载
+            message = f"成功导入 {imported} 条任务！"
+            if skipped: message += f"\n跳过 {skipped} 条重复任务"
+            QMessageBox.information(self, "成功", message)
+
+        def on_error(error):
+            progress.close()
+            if not isinstance(error, ImportCancelled):
+                QMessageBox.critical(self, "错误", f"导入失败: {str(error)}")
+
+        progress.canceled.connect(lambda: self.executor.cancel("import"))
+        self.executor.submit("import", self.db.import_json, file_path,
+                             on_result=on_result, on_error=on_error, on_progress=on_progress)
 
     def show_statistics(self):
-        source_path = self.get_db_path()
-        if not os.path.exists(source_path): return
-        try:
-            conn = sqlite3.connect(source_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT count(*) FROM tasks")
-            total = cursor.fetchone()[0]
-            cursor.execute("SELECT count(*) FROM tasks WHERE status IN ('DONE', '已完成')")
-            done = cursor.fetchone()[0]
-            cursor.execute("SELECT count(*) FROM tasks WHERE priority >= 3")
-            high_prio = cursor.fetchone()[0]
-            conn.close()
-            
-            stats = {"total": total, "done": done, "todo": total - done, "high_prio": high_prio}
-            dlg = StatsDialog(stats, self)
-            dlg.exec()
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"统计分析失败: {str(e)}")
+        # [修改] 统计来自写入时维护的汇总表, 不再全表扫描; 查询在后台执行, 对话框先打开
+        dlg = StatsDialog(self, loader=self.db.get_statistics, tag_colors=dict(self.current_tags), executor=self.executor)
+        dlg.exec()
+
+    def show_heatmap(self):
+        # [New] 整段日期区间一次分组查询, 跟随侧边栏当前勾选的标签
+        tags = list(self.active_tag_names)
+        dlg = HeatmapDialog(lambda start, end: self.db.get_daily_load(start, end, tags), self, self.executor)
+        dlg.heatmap.date_clicked.connect(lambda date: (self.calendar.setSelectedDate(date),
+                                                       self.calendar.setCurrentPage(date.year(), date.month())))
+        dlg.exec()
 
     def show_preferences(self):
         confirm = self.app_settings.value("confirm_delete", True, type=bool)
         show_cal = self.app_settings.value("show_completed_cal", True, type=bool)
-        dlg = PreferencesDialog({"confirm_delete": confirm, "show_completed_cal": show_cal}, self)
+        auto_backup = self.app_settings.value("auto_backup", True, type=bool)
+        compress = self.app_settings.value("backup_compress", False, type=bool)
+        dlg = PreferencesDialog({"confirm_delete": confirm, "show_completed_cal": show_cal,
+                                 "auto_backup": auto_backup, "backup_compress": compress}, self)
         if dlg.exec():
             new_settings = dlg.get_settings()
-            self.app_settings.setValue("confirm_delete", new_settings["confirm_delete"])
-            self.app_settings.setValue("show_completed_cal", new_settings["show_completed_cal"])
+            for key, value in new_settings.items():
+                self.app_settings.setValue(key, value)
+            self.apply_backup_settings()
 
     def reset_layout(self):
         self.right_panel.setVisible(True)
@@ -1286,9 +2316,56 @@ class ManageMyDayApp(QMainWindow):
             cb.setChecked(name in self.active_tag_names)
             cb.setStyleSheet(f"QCheckBox {{ color: {color}; font-size: 15px; }}") 
             cb.stateChanged.connect(self.on_tag_filter_changed)
+            cb.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+            cb.customContextMenuRequested.connect(lambda pos, n=name, w=cb: self.show_tag_menu(n, w.mapToGlobal(pos)))
             self.tags_layout.insertWidget(self.tags_layout.count()-1, cb) 
             self.tag_checkboxes.append((cb, name))
 
+    # [New] 标签右键菜单: 任务按标签 id 引用, 重命名只改标签表一行
+    def show_tag_menu(self, name, global_pos):
+        menu = QMenu(self)
+        act_rename = menu.addAction("重命名...")
+        merge_menu = menu.addMenu("合并到")
+        for other, _ in self.current_tags:
+            if other != name: merge_menu.addAction(other).setData(other)
+        merge_menu.setEnabled(len(self.current_tags) > 1)
+        menu.addSeparator()
+        act_delete = menu.addAction("删除标签")
+        chosen = menu.exec(global_pos)
+        if chosen is None: return
+        try:
+            if chosen == act_rename:
+                new_name, ok = QInputDialog.getText(self, "重命名标签", "新名称:", text=name)
+                new_name = new_name.strip()
+                if not ok or not new_name or new_name == name: return
+                if not self.repo.rename_tag(name, new_name):
+                    QMessageBox.warning(self, "错误", "标签名称已存在")
+            elif chosen == act_delete:
+                count = self.db.get_statistics()["by_tag"].get(name, (0, 0))[0]
+                reply = QMessageBox.question(self, "删除标签",
+                                             f"删除标签「{name}」及其下的 {count} 个事项和重复规则?\n此操作无法撤销。",
+                                             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+                if reply != QMessageBox.StandardButton.Yes: return
+                self.repo.delete_tag(name)
+            elif chosen.data():
+                target = chosen.data()
+                reply = QMessageBox.question(self, "合并标签", f"将「{name}」的全部事项移到「{target}」并删除「{name}」?",
+                                             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+                if reply != QMessageBox.StandardButton.Yes: return
+                self.repo.merge_tags(name, target)
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"标签操作失败: {str(e)}")
+
+    def reload_tags(self, renamed=None):
+        """重新读取标签但保留侧栏勾选: 取消勾选的保持取消, 重命名的沿用原状态, 外部新增的默认勾选."""
+        renamed = renamed or {}
+        known = {renamed.get(name, name) for name, _ in self.current_tags}
+        active = {renamed.get(name, name) for name in self.active_tag_names}
+        self.current_tags = [(t.name, t.color) for t in self.db.get_all_tags()]
+        self.active_tag_names = [name for name, _ in self.current_tags if name in active or name not in known]
+        self.refresh_view()
+        self.refresh_task_list()
+
     def on_tag_filter_changed(self):
         self.active_tag_names = [name for cb, name in self.tag_checkboxes if cb.isChecked()]
         self.refresh_view() 
@@ -1299,7 +2376,7 @@ class ManageMyDayApp(QMainWindow):
         if dlg.exec():
             name, color = dlg.get_data()
             if name:
-                if self.db.add_custom_tag(name, color):
+                if self.repo.add_custom_tag(name, color):
                     self.current_tags.append((name, color))
                     self.active_tag_names.append(name) 
                     self.refresh_view()
@@ -1336,64 +2413,60 @@ class ManageMyDayApp(QMainWindow):
             self.expand_panel()
             self.refresh_task_list()
 
+    def changeEvent(self, event):
+        if event.type() == QEvent.Type.ActivationChange and self.isActiveWindow():
+            self.repo.sync() # 有外部修改时发出 reset, 各视图整体重载
+        super().changeEvent(event)
+
     def refresh_task_list(self):
         if not self.is_details_expanded: return
+        # 外部有修改时 sync 触发的 reset 已经重新加载了列表
+        if self.repo.sync(): return
         
-        colors = {n: c for n, c in self.current_tags}
-        self.task_list_widget.clear()
+        self.task_model.colors = {n: c for n, c in self.current_tags}
 
         if self.search_mode:
             self.lbl_sel_date.setText("🔍 搜索结果")
+            # 一次 SQL 查询取一页, 滚动到底部时由模型继续分页, 日期范围不受限制
             f = self.search_filters
-            start = f['start_date']
-            end = f['end_date']
-            target_tag = f['tag']
-            min_prio = f['min_priority']
-            keyword = f['keyword']
-            
-            all_results = []
-            days_span = start.daysTo(end)
-            if days_span > 365: days_span = 365
-            
-            for i in range(days_span + 1):
-                curr_date = start.addDays(i)
-                d_str = curr_date.toString("yyyy-MM-dd")
-                search_tags = [target_tag] if target_tag != "全部" else self.active_tag_names
-                day_tasks = self.db.get_tasks_by_date_and_tags(d_str, search_tags)
-                for t in day_tasks:
-                    if min_prio != -1 and t.priority < min_prio: continue
-                    if keyword and (keyword not in t.content and keyword not in t.description): continue
-                    all_results.append(t)
-            
-            if not all_results:
-                item = QListWidgetItem("未找到匹配事项")
-                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                item.setFlags(Qt.ItemFlag.NoItemFlags) 
-                self.task_list_widget.addItem(item)
-            else:
-                for task in all_results:
-                    item = QListWidgetItem()
-                    widget = TaskItemWidget(task, colors.get(task.tag, "#888888"), show_date=True)
-                    item.setSizeHint(widget.sizeHint())
-                    item.setData(Qt.ItemDataRole.UserRole, task)
-                    self.task_list_widget.addItem(item)
-                    self.task_list_widget.setItemWidget(item, widget)
+            search_tags = [f['tag']] if f['tag'] != "全部" else list(self.active_tag_names)
+            start = f['start_date'].toString("yyyy-MM-dd")
+            end = f['end_date'].toString("yyyy-MM-dd")
+            self.task_list_view.placeholder_text = "未找到匹配事项"
+            self.task_model.set_pager(lambda offset, limit, deliver: self.executor.submit(
+                "task_list", self.db.search_range, start, end, search_tags, f['min_priority'], f['keyword'], limit, offset,
+                True, on_result=deliver))
         else:
             date_str = self.calendar.selectedDate().toString("yyyy-MM-dd")
             self.lbl_sel_date.setText(self.calendar.selectedDate().toString("M月d日 dddd"))
-            
-            tasks = self.db.get_tasks_by_date_and_tags(date_str, self.active_tag_names)
-            
-            keyword = self.search_input.text().strip()
-            if keyword: tasks = [t for t in tasks if (keyword in t.content or keyword in t.description)]
-            
-            for task in tasks:
-                item = QListWidgetItem()
-                widget = TaskItemWidget(task, colors.get(task.tag, "#888888"), show_date=False)
-                item.setSizeHint(widget.sizeHint())
-                item.setData(Qt.ItemDataRole.UserRole, task)
-                self.task_list_widget.addItem(item)
-                self.task_list_widget.setItemWidget(item, widget)
+            self.executor.submit("task_list", self.repo.get_tasks, date_str, list(self.active_tag_names),
+                                 on_result=self.show_day_tasks)
+
+    def matches_search(self, task):
+        """与 refresh_task_list 中 search_range 的条件一致 (关键词区分大小写)."""
+        f = self.search_filters
+        tags = [f['tag']] if f['tag'] != "全部" else self.active_tag_names
+        keyword = f['keyword']
+        return (task.tag in tags
+                and f['start_date'].toString("yyyy-MM-dd") <= task.date_str <= f['end_date'].toString("yyyy-MM-dd")
+                and task.priority >= f['min_priority']
+                and (not keyword or keyword in task.content or keyword in task.description))
+
+    def show_day_tasks(self, tasks):
+        if self.search_mode: return
+        # 模型保存当天全部任务, 列表内筛选只切换行的可见性
+        self.live_filter.reset(tasks)
+        self.task_list_view.placeholder_text = ""
+        self.task_model.set_tasks(tasks, show_date=False)
+        self.apply_live_filter()
+
+    def apply_live_filter(self):
+        if self.search_mode: return
+        visible = self.live_filter.match(self.search_input.text().strip())
+        for row, task in enumerate(self.task_model.tasks):
+            hidden = task.id not in visible
+            if self.task_list_view.isRowHidden(row) != hidden:
+                self.task_list_view.setRowHidden(row, hidden)
 
     def open_add_task_dialog(self):
         colors = {n: c for n, c in self.current_tags}
@@ -1402,10 +2475,12 @@ class ManageMyDayApp(QMainWindow):
             data = dlg.get_data()
             if data['content']:
                 date_str = self.calendar.selectedDate().toString("yyyy-MM-dd")
-                self.db.add_task(date_str, data['content'], data['status'], data['tag'], data['priority'], data['description'])
-                self.calendar.update_cache() 
-                self.refresh_task_list()
-                if self.mini_widget.isVisible(): self.mini_widget.load_data()
+                if data['repeat']:
+                    freq, interval, weekdays = data['repeat']
+                    self.repo.add_recurrence(date_str, freq, data['content'], data['tag'], data['priority'],
+                                             data['description'], interval, weekdays)
+                else:
+                    self.repo.add_task(date_str, data['content'], data['status'], data['tag'], data['priority'], data['description'])
 
     def open_edit_task_dialog(self, task):
         colors = {n: c for n, c in self.current_tags}
@@ -1413,23 +2488,18 @@ class ManageMyDayApp(QMainWindow):
         if dlg.exec():
             data = dlg.get_data()
             if data['content']:
-                self.db.update_task_info(task.id, data['content'], data['tag'], data['priority'], data['description'])
-                self.calendar.update_cache()
-                self.refresh_task_list()
-                if self.mini_widget.isVisible(): self.mini_widget.load_data()
+                self.repo.update_task_info(task.id, data['content'], data['tag'], data['priority'], data['description'])
 
-    def toggle_task_complete(self, item):
-        task = item.data(Qt.ItemDataRole.UserRole)
+    def toggle_task_complete(self, index):
+        task = index.data(TaskListModel.TaskRole)
         if not task: return
         new_status = "已完成" if task.status != "已完成" else "待完成"
-        self.db.update_task_status(task.id, new_status)
-        self.refresh_task_list()
-        if self.mini_widget.isVisible(): self.mini_widget.load_data()
+        self.repo.update_task_status(task.id, new_status)
 
     def show_context_menu(self, pos):
-        item = self.task_list_widget.itemAt(pos)
-        if not item: return
-        task = item.data(Qt.ItemDataRole.UserRole)
+        index = self.task_list_view.indexAt(pos)
+        if not index.isValid(): return
+        task = index.data(TaskListModel.TaskRole)
         if not task: return
 
         menu = QMenu(self)
@@ -1454,20 +2524,22 @@ class ManageMyDayApp(QMainWindow):
             s_menu.addAction(action)
             
         menu.addSeparator()
-        del_action = QAction("🗑️ 删除任务", self)
+        del_action = QAction("🗑️ 删除此次" if task.id < 0 else "🗑️ 删除任务", self)
         del_action.triggered.connect(lambda: self.delete_task(task.id))
         menu.addAction(del_action)
+        if task.id < 0:
+            # 重复事项: 还可以停止整个系列 (已完成/改过的单次事项保留)
+            stop_action = QAction("🔁 停止重复 (删除整个系列)", self)
+            stop_action.triggered.connect(lambda: self.stop_recurrence(task.id))
+            menu.addAction(stop_action)
         
-        menu.exec(self.task_list_widget.mapToGlobal(pos))
+        menu.exec(self.task_list_view.viewport().mapToGlobal(pos))
 
     def update_task_attr(self, task_id, attr, value):
         if attr == 'priority':
-            self.db.update_task_priority(task_id, value)
+            self.repo.update_task_priority(task_id, value)
         elif attr == 'status':
-            self.db.update_task_status(task_id, value)
-        self.refresh_task_list()
-        self.calendar.update_cache()
-        if self.mini_widget.isVisible(): self.mini_widget.load_data()
+            self.repo.update_task_status(task_id, value)
 
     def delete_task(self, task_id):
         confirm_needed = self.app_settings.value("confirm_delete", True, type=bool)
@@ -1476,13 +2548,44 @@ class ManageMyDayApp(QMainWindow):
                                          QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
                                          QMessageBox.StandardButton.No)
             if reply == QMessageBox.StandardButton.No: return
-        self.db.delete_task(task_id)
-        self.refresh_task_list()
-        self.calendar.update_cache()
-        if self.mini_widget.isVisible(): self.mini_widget.load_data()
+        self.repo.delete_task(task_id)
+
+    def stop_recurrence(self, task_id):
+        occurrence = TaskManager.parse_occurrence_id(task_id)
+        if not occurrence: return
+        reply = QMessageBox.question(self, "停止重复", "确定要删除这个重复系列吗？\n已完成或修改过的单次事项会保留。",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                                     QMessageBox.StandardButton.No)
+        if reply == QMessageBox.StandardButton.Yes:
+            self.repo.delete_recurrence(occurrence[0])
+
+    def on_task_changed(self, change):
+        """仓库变更通知: 日历只刷新受影响格子, 列表做行级更新 (便签自行订阅)."""
+        if change.kind == "reset":
+            # 标签可能被改名/合并/删除: 重新读取但保留当前勾选
+            self.reload_tags(change.renamed)
+            return
+        self.calendar.on_task_changed(change)
+        if self.is_details_expanded:
+            if self.search_mode:
+                # 新增/修改后仍符合搜索条件的就地插入或移动, 不再符合的移出结果
+                if change.kind != "deleted" and self.matches_search(change.task):
+                    self.task_model.place_task(change.task)
+                else:
+                    self.task_model.remove_task(change.task.id)
+            else:
+                date_str = self.calendar.selectedDate().toString("yyyy-MM-dd")
+                if date_str in change.dates:
+                    self.executor.submit("task_list", self.repo.get_tasks, date_str, list(self.active_tag_names),
+                                         on_result=self.show_day_tasks)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    PROFILER.mark("QApplication")
     window = ManageMyDayApp()
     window.show()
+    PROFILER.mark("show")
+    # 0ms 定时器在首次显示/绘制事件处理完之后才触发
+    QTimer.singleShot(0, lambda: PROFILER.finish(app))
+    if not PROFILER.quit_after: QTimer.singleShot(0, window.warm_up)
     sys.exit(app.exec())
\ No newline at end of file
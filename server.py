@@ -0,0 +1,410 @@
+"""
+Local JSON-over-HTTP API for the Manage MyDay task database.
+
+Lets launchers, scripts and editor plugins read and write tasks without a second
+GUI instance. Only the standard library is used; Qt is never imported.
+
+    python server.py [--db myday.db] [--port 8765]
+
+All database work runs on one dedicated thread (so one shared connection);
+GET responses are cached as encoded JSON and reused until the database
+revision changes. POST /batch runs several operations in one round trip and
+one transaction, and GET /metrics reports per-route latency percentiles.
+
+Endpoints (dates are yyyy-MM-dd, 'tag' may be repeated, default all tags):
+    GET    /tags
+    GET    /day/<date>                    tasks of one day (incl. recurring)
+    GET    /month/<yyyy-MM>               calendar summary per day
+    GET    /range?start=&end=[&min_priority=&keyword=&limit=&offset=]
+    GET    /load?start=&end=              per-day (total, done, high), end exclusive
+    GET    /search?q=[&limit=]
+    GET    /stats[?granularity=&start=&end=]
+    GET    /tasks/<id>
+    POST   /tasks                         {"date_str", "content", "tag", ...}
+    PATCH  /tasks/<id>                    any of status/content/tag/priority/description
+    DELETE /tasks/<id>
+    POST   /batch                         [{"method", "path", "body"}, ...]
+    GET    /metrics
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import sqlite3
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from task_manager import TaskManager
+
+DEFAULT_PORT = 8765
+MAX_BODY = 16 * 1024 * 1024
+log = logging.getLogger(__name__)
+REASONS = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _task_json(task) -> dict:
+    data = asdict(task)
+    if not data["snippet"]: del data["snippet"]
+    return data
+
+
+class LatencyStats:
+    """Rolling per-route latency samples (seconds) and request counters."""
+
+    def __init__(self, window: int = 2048):
+        self.window = window
+        self.samples: Dict[str, deque] = {}
+        self.counts: Dict[str, int] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def record(self, route: str, seconds: float) -> None:
+        self.samples.setdefault(route, deque(maxlen=self.window)).append(seconds)
+        self.counts[route] = self.counts.get(route, 0) + 1
+
+    @staticmethod
+    def _percentile(ordered: List[float], pct: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+    def snapshot(self) -> dict:
+        routes = {}
+        for route, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            routes[route] = {
+                "count": self.counts[route],
+                "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+                "p50_ms": round(self._percentile(ordered, 0.50) * 1000, 3),
+                "p95_ms": round(self._percentile(ordered, 0.95) * 1000, 3),
+                "p99_ms": round(self._percentile(ordered, 0.99) * 1000, 3),
+                "max_ms": round(ordered[-1] * 1000, 3),
+            }
+        return {"routes": routes, "cache": {"hits": self.cache_hits, "misses": self.cache_misses}}
+
+
+class TaskApi:
+    """
+    Synchronous request handling against one TaskManager. Every method runs on
+    the server's single database thread, so it owns exactly one connection.
+    """
+
+    def __init__(self, manager: TaskManager, cache_size: int = 512):
+        self.manager = manager
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Tuple[int, bytes]]" = OrderedDict()
+        self.stats = LatencyStats()
+
+    # --- Dispatch ---
+    def handle(self, method: str, target: str, body: Optional[bytes]) -> Tuple[int, bytes]:
+        """Serve one request, returning (status, encoded JSON body)."""
+        try:
+            if method == "GET":
+                return 200, self._cached_get(target)
+            payload = json.loads(body) if body else None
+            if method == "POST" and urlsplit(target).path == "/batch":
+                return 200, self._encode(self._batch(payload))
+            with self.manager.transaction():
+                status, result = self._route(method, target, payload)
+            return status, self._encode(result)
+        except ApiError as e:
+            return e.status, self._encode({"error": str(e)})
+        except (ValueError, TypeError, KeyError) as e:
+            return 400, self._encode({"error": f"{type(e).__name__}: {e}"})
+        except sqlite3.Error as e:
+            return 500, self._encode({"error": str(e)})
+        except Exception as e:
+            # A bug in one route must still answer; an escaping exception would drop the connection
+            log.exception("unhandled error in %s %s", method, target)
+            return 500, self._encode({"error": f"internal error: {type(e).__name__}"})
+
+    def _cached_get(self, target: str) -> bytes:
+        if urlsplit(target).path == "/metrics":
+            return self._encode(self.stats.snapshot())
+        # The revision is bumped by every committed write (this server, the GUI or the CLI)
+        revision = self.manager.get_revision()
+        entry = self._cache.get(target)
+        if entry is not None and entry[0] == revision:
+            self._cache.move_to_end(target)
+            self.stats.cache_hits += 1
+            return entry[1]
+        self.stats.cache_misses += 1
+        status, result = self._route("GET", target, None)
+        data = self._encode(result)
+        self._cache[target] = (revision, data)
+        self._cache.move_to_end(target)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return data
+
+    def _batch(self, operations) -> List[dict]:
+        """Run every operation in one transaction; the first failure rolls all of them back."""
+        if not isinstance(operations, list): raise ApiError(400, "batch body must be a JSON list")
+        results = []
+        with self.manager.transaction():
+            for index, op in enumerate(operations):
+                try:
+                    method = op.get("method", "GET").upper()
+                    status, result = self._route(method, op["path"], op.get("body"))
+                except ApiError as e:
+                    raise ApiError(e.status, f"operation {index}: {e}") from None
+                except (ValueError, TypeError, KeyError, AttributeError) as e:
+                    raise ApiError(400, f"operation {index}: {type(e).__name__}: {e}") from None
+                results.append({"status": status, "body": result})
+        return results
+
+    @staticmethod
+    def _encode(payload) -> bytes:
+        return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode("utf-8")
+
+    # --- Routes ---
+    def _route(self, method: str, target: str, body) -> Tuple[int, object]:
+        url = urlsplit(target)
+        parts = [p for p in url.path.split("/") if p]
+        query = parse_qs(url.query)
+        if not parts: raise ApiError(404, "not found")
+        head = parts[0]
+
+        if head == "tasks":
+            if len(parts) == 1:
+                if method != "POST": raise ApiError(405, "use POST /tasks")
+                return 201, self._add_task(body)
+            task_id = self._int(parts[1], "task id")
+            if method == "GET": return 200, self._get_task(task_id)
+            if method == "PATCH": return 200, self._update_task(task_id, body)
+            if method == "DELETE":
+                self._get_task(task_id)
+                self.manager.delete_task(task_id)
+                return 200, {"deleted": task_id}
+            raise ApiError(405, f"{method} not allowed on /tasks/<id>")
+
+        if method != "GET": raise ApiError(405, f"{method} not allowed on /{head}")
+        m = self.manager
+        if head == "tags":
+            return 200, [{"id": t.id, "name": t.name, "color": t.color} for t in m.get_all_tags()]
+        if head == "day" and len(parts) == 2:
+            return 200, [_task_json(t) for t in m.get_tasks_by_date_and_tags(self._date(parts[1]), self._tags(query))]
+        if head == "month" and len(parts) == 2:
+            try:
+                year, month = (int(x) for x in parts[1].split("-"))
+            except ValueError:
+                raise ApiError(400, f"invalid month (expected yyyy-MM): {parts[1]}") from None
+            if not (1 <= month <= 12 and 1 <= year <= 9999):
+                raise ApiError(400, f"invalid month (expected yyyy-MM): {parts[1]}")
+            return 200, m.get_month_task_summary(year, month, self._tags(query))
+        if head == "range":
+            tasks = m.search_range(self._date(self._param(query, "start")), self._date(self._param(query, "end")),
+                                   self._tags(query),
+                                   self._int(self._param(query, "min_priority", "-1"), "min_priority"),
+                                   self._param(query, "keyword", ""), self._limit(query),
+                                   self._int(self._param(query, "offset", "0"), "offset"), include_recurring=True)
+            return 200, [_task_json(t) for t in tasks]
+        if head == "load":
+            load = m.get_daily_load(self._date(self._param(query, "start")), self._date(self._param(query, "end")),
+                                    self._tags(query))
+            return 200, {day: {"total": t, "done": d, "high": h} for day, (t, d, h) in load.items()}
+        if head == "search":
+            return 200, [_task_json(t) for t in m.search_tasks(self._param(query, "q"), self._limit(query))]
+        if head == "stats":
+            granularity = self._param(query, "granularity", "month")
+            if granularity not in m.STAT_GRANULARITIES: raise ApiError(400, f"unknown granularity: {granularity}")
+            start, end = self._param(query, "start", None), self._param(query, "end", None)
+            stats = m.get_statistics(granularity, start and self._date(start), end and self._date(end))
+            stats["by_priority"] = {str(k): v for k, v in stats["by_priority"].items()}
+            return 200, stats
+        raise ApiError(404, f"not found: {url.path}")
+
+    def _get_task(self, task_id: int) -> dict:
+        task = self.manager.get_task(task_id)
+        if task is None: raise ApiError(404, f"no such task: {task_id}")
+        return _task_json(task)
+
+    def _add_task(self, body) -> dict:
+        if not isinstance(body, dict): raise ApiError(400, "task body must be a JSON object")
+        date_str = self._date(self._field(body, "date_str", str))
+        task_id = self.manager.add_task(date_str, self._field(body, "content", str),
+                                        self._field(body, "status", str, "") or "待完成",
+                                        self._field(body, "tag", str, "") or TaskManager.DEFAULT_TAGS[0][0],
+                                        self._field(body, "priority", int, 0), self._field(body, "description", str, ""))
+        return self._get_task(task_id)
+
+    def _update_task(self, task_id: int, body) -> dict:
+        if not isinstance(body, dict): raise ApiError(400, "update body must be a JSON object")
+        current = self._get_task(task_id)
+        kinds = {"status": str, "content": str, "tag": str, "priority": int, "description": str}
+        fields = {key: self._field(body, key, kind, current[key]) for key, kind in kinds.items()}
+        # A recurring occurrence is stored as an ordinary task first; its id changes
+        task_id = self.manager.materialize_occurrence(task_id)
+        if "status" in body:
+            self.manager.update_task_status(task_id, fields["status"])
+        if any(key in body for key in ("content", "tag", "priority", "description")):
+            self.manager.update_task_info(task_id, fields["content"], fields["tag"], fields["priority"],
+                                          fields["description"])
+        return self._get_task(task_id)
+
+    # --- Parameter helpers ---
+    @staticmethod
+    def _param(query: dict, name: str, default: Optional[str] = ...) -> Optional[str]:
+        values = query.get(name)
+        if values: return values[0]
+        if default is ...: raise ApiError(400, f"missing parameter: {name}")
+        return default
+
+    @staticmethod
+    def _int(value: str, name: str) -> int:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ApiError(400, f"invalid {name}: {value}") from None
+
+    def _limit(self, query: dict) -> Optional[int]:
+        limit = self._param(query, "limit", None)
+        return None if limit is None else self._int(limit, "limit")
+
+    @staticmethod
+    def _date(value: str) -> str:
+        try:
+            return datetime.date.fromisoformat(value).isoformat()
+        except (TypeError, ValueError):
+            raise ApiError(400, f"invalid date (expected yyyy-MM-dd): {value}") from None
+
+    @staticmethod
+    def _tags(query: dict) -> Optional[List[str]]:
+        # None is "every tag" for all TaskManager queries, no tag lookup needed
+        return query.get("tag") or None
+
+    @staticmethod
+    def _field(body: dict, name: str, kind: type, default=...):
+        """body[name] checked against kind (bool is not accepted as int); default when absent or null."""
+        value = body.get(name)
+        if value is None:
+            if default is ...: raise ApiError(400, f"missing field: {name}")
+            return default
+        if not isinstance(value, kind) or isinstance(value, bool):
+            raise ApiError(400, f"invalid {name}: expected {kind.__name__}, got {type(value).__name__}")
+        return value
+
+
+class TaskServer:
+    """
+    asyncio HTTP/1.1 front end (keep-alive, JSON only) for TaskApi. Connections
+    are handled concurrently; their database work is serialized onto a single
+    worker thread, which is also what keeps SQLite writers from contending.
+    """
+
+    def __init__(self, manager: TaskManager, host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        self.api = TaskApi(manager)
+        self.host = host
+        self.port = port
+        self._db_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="myday-db")
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1] # resolves port 0
+
+    async def serve_forever(self) -> None:
+        if self._server is None: await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        # Close the worker's connection on the worker thread itself, then stop it
+        await asyncio.get_running_loop().run_in_executor(self._db_thread, self.api.manager.close)
+        self._db_thread.shutdown(wait=True)
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line: break
+                started = time.perf_counter()
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, self.api._encode({"error": "malformed request line"}), False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""): break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              if version == "HTTP/1.1" else headers.get("connection", "").lower() == "keep-alive")
+                try:
+                    length = int(headers.get("content-length") or 0)
+                    if length < 0: raise ValueError(length)
+                except ValueError:
+                    await self._respond(writer, 400, self.api._encode({"error": "invalid Content-Length"}), False)
+                    break
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, self.api._encode({"error": "request body too large"}), False)
+                    break
+                body = await reader.readexactly(length) if length else None
+
+                status, data = await loop.run_in_executor(self._db_thread, self.api.handle, method.upper(), target, body)
+                await self._respond(writer, status, data, keep_alive)
+                self.api.stats.record(f"{method.upper()} {self._route_name(target)}", time.perf_counter() - started)
+                if not keep_alive: break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _route_name(target: str) -> str:
+        # Collapse ids/dates so metrics aggregate per endpoint
+        parts = [p for p in urlsplit(target).path.split("/") if p]
+        return "/" + "/".join(parts[:1] + ["*"] * (len(parts) > 1))
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, data: bytes, keep_alive: bool) -> None:
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + data)
+        await writer.drain()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", default=TaskManager.DB_NAME, help="database file (default: %(default)s)")
+    parser.add_argument("--host", default="127.0.0.1", help="bind address (default: localhost only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    async def run():
+        server = TaskServer(TaskManager(args.db), args.host, args.port)
+        await server.start()
+        print(f"serving {args.db} on http://{server.host}:{server.port}", file=sys.stderr)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
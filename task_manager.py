@@ -1,6 +1,20 @@
+import argparse
+import datetime
+import gzip
+import heapq
+import io
+import itertools
+import json
+import os
+import re
+import shlex
+import shutil
 import sqlite3
-from dataclasses import dataclass
-from typing import List, Tuple, Optional, Dict
+import sys
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import Callable, Iterator, List, Tuple, Optional, Dict, Union
 
 @dataclass
 class Task:
@@ -11,11 +25,107 @@ class Task:
     tag: str
     priority: int = 0
     description: str = "" # [New] Task description
+    snippet: str = "" # [New] Highlighted match excerpt, only filled by full-text searches
 
 @dataclass
 class Tag:
     name: str
     color: str
+    id: int = 0 # tags.id, what tasks reference and what tag filters match on
+
+class ExportCancelled(Exception):
+    """Raised when an export's progress callback asks it to stop."""
+
+class ImportCancelled(Exception):
+    """Raised when an import's progress callback asks it to stop (nothing is kept)."""
+
+class _ExportReader:
+    """
+    Incremental reader for export files ({"version", "tags", "tasks": [...]}),
+    plain or gzip. Top-level values are decoded whole, except the tasks array,
+    which is yielded one task at a time so memory stays bounded by one chunk.
+    """
+    CHUNK = 64 * 1024
+    WHITESPACE = re.compile(r"\s*")
+
+    def __init__(self, file_path: str):
+        self.raw = open(file_path, 'rb')
+        self.size = os.path.getsize(file_path)
+        gzipped = self.raw.read(2) == b"\x1f\x8b"
+        self.raw.seek(0)
+        binary = gzip.GzipFile(fileobj=self.raw) if gzipped else self.raw
+        self.text = io.TextIOWrapper(binary, encoding='utf-8')
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.has_tasks = False  # set once a top-level "tasks" array is reached
+
+    @property
+    def position(self) -> int:
+        """Bytes of the (possibly compressed) file consumed so far."""
+        return self.raw.tell()
+
+    def close(self) -> None:
+        self.text.close()
+        self.raw.close()
+
+    def _fill(self) -> bool:
+        if self.eof: return False
+        chunk = self.text.read(self.CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            self.pos = self.WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf): return self.buf[self.pos]
+            if not self._fill(): return ""
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char: raise ValueError(f"无效的数据文件格式: 缺少 '{char}'")
+        self.pos += 1
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A value touching the end of the buffer may be truncated (e.g. a number)
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof: raise
+            if not self._fill(): self.eof = True
+
+    def items(self):
+        """Yield ("task", dict) for each task and (key, value) for other top-level keys."""
+        self._expect("{")
+        if self._peek() == "}": return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key == "tasks" and self._peek() == "[":
+                self.pos += 1
+                self.has_tasks = True
+                if self._peek() == "]":
+                    self.pos += 1
+                else:
+                    while True:
+                        yield "task", self._value()
+                        if self._peek() == ",": self.pos += 1; continue
+                        self._expect("]")
+                        break
+            else:
+                yield key, self._value()
+            if self._peek() == ",": self.pos += 1; continue
+            self._expect("}")
+            return
 
 class TaskManager:
     DB_NAME = "myday.db"
@@ -29,13 +139,160 @@ class TaskManager:
         ("其他", "#BF5AF2"), # Purple
     ]
 
-    def __init__(self):
+    # Color for tags created implicitly (a task or import naming an unknown tag)
+    DEFAULT_TAG_COLOR = "#8E8E93"
+
+    # Statuses counted as completed ('DONE' comes from older databases)
+    DONE_STATUSES = ("已完成", "DONE")
+    # Priority at or above which a task counts as high priority in summaries/stats
+    HIGH_PRIORITY = 3
+
+    # Connection PRAGMAs applied to every pooled connection (override per instance via __init__)
+    PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,           # negative = KiB, i.e. ~16 MB page cache
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "foreign_keys": "ON",
+    }
+
+    # Markers wrapped around matched text in Task.snippet (callers swap them for real markup)
+    HIGHLIGHT_OPEN = "\x02"
+    HIGHLIGHT_CLOSE = "\x03"
+
+    # Trigram tokens are 3 characters wide, shorter keywords fall back to a plain scan
+    FTS_MIN_KEYWORD = 3
+    FTS_TRIGGERS = {
+        "tasks_fts_ai": """
+            CREATE TRIGGER tasks_fts_ai AFTER INSERT ON tasks BEGIN
+                INSERT INTO tasks_fts (rowid, content, description) VALUES (new.id, new.content, new.description);
+            END
+        """,
+        "tasks_fts_ad": """
+            CREATE TRIGGER tasks_fts_ad AFTER DELETE ON tasks BEGIN
+                INSERT INTO tasks_fts (tasks_fts, rowid, content, description) VALUES ('delete', old.id, old.content, old.description);
+            END
+        """,
+        "tasks_fts_au": """
+            CREATE TRIGGER tasks_fts_au AFTER UPDATE OF content, description ON tasks BEGIN
+                INSERT INTO tasks_fts (tasks_fts, rowid, content, description) VALUES ('delete', old.id, old.content, old.description);
+                INSERT INTO tasks_fts (rowid, content, description) VALUES (new.id, new.content, new.description);
+            END
+        """,
+    }
+
+    def __init__(self, db_name: Optional[str] = None, pragmas: Optional[Dict[str, object]] = None):
+        if db_name: self.DB_NAME = db_name
+        self.pragmas = dict(self.PRAGMAS)
+        if pragmas: self.pragmas.update(pragmas)
+        # One long-lived connection per thread, all tracked so close() can shut them down
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._conn_lock = threading.Lock()
+        self.has_fts = False
+        # name -> (id, color), shared by all threads; dropped on any tag change or rollback
+        self._tag_cache: Optional[Dict[str, Tuple[int, str]]] = None
+        self._track_revision = False
         self._init_db()
+        self._track_revision = True
 
-    def _init_db(self):
-        conn = sqlite3.connect(self.DB_NAME)
+    # --- Connection Management ---
+    def _connect(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.DB_NAME, check_same_thread=False)
+            for name, value in self.pragmas.items():
+                if value is None: continue
+                conn.execute(f"PRAGMA {name} = {value}")
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._conn_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        Yield a cursor inside a transaction on this thread's connection.
+        Nested blocks join the outermost one, which commits or rolls back.
+        """
+        conn = self._connect()
         cursor = conn.cursor()
-        
+        if self._local.depth > 0:
+            self._local.depth += 1
+            try:
+                yield cursor
+            finally:
+                self._local.depth -= 1
+            return
+        self._local.depth = 1
+        changes = conn.total_changes
+        try:
+            yield cursor
+            if self._track_revision and conn.total_changes != changes:
+                cursor.execute("UPDATE meta SET value = value + 1 WHERE key = 'revision'")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            self._tag_cache = None # may hold ids of tags created by the rolled-back work
+            raise
+        finally:
+            self._local.depth = 0
+
+    def close(self) -> None:
+        """Close every pooled connection. Threads reconnect lazily if used again."""
+        with self._conn_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+    # --- Schema Migrations ---
+    def _migrations(self):
+        """Ordered (version, step) pairs; append new steps, never reorder."""
+        return [
+            (1, self._migrate_base_schema),
+            (2, self._migrate_date_tag_index),
+            (3, self._migrate_fulltext_index),
+            (4, self._migrate_meta_table),
+            (5, self._migrate_rollup_table),
+            (6, self._migrate_recurrences),
+            (7, self._migrate_tag_ids),
+        ]
+
+    def _init_db(self):
+        # The applied schema version is recorded in PRAGMA user_version, so an
+        # up-to-date database only costs a single header read at startup.
+        conn = self._connect()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        migrations = self._migrations()
+        latest = migrations[-1][0]
+        if version < latest:
+            # Table rebuilds follow SQLite's ALTER TABLE recipe: enforcement off
+            # (it cannot change inside a transaction), foreign_key_check before commit
+            conn.execute("PRAGMA foreign_keys = OFF")
+        try:
+            with self.transaction() as cursor:
+                for target, step in migrations:
+                    if version < target:
+                        step(cursor)
+                if version < latest:
+                    if cursor.execute("PRAGMA foreign_key_check").fetchone():
+                        raise sqlite3.IntegrityError("foreign key violation after schema migration")
+                    cursor.execute(f"PRAGMA user_version = {latest}")
+                else:
+                    # Re-check in case the database moved between SQLite builds with/without FTS5
+                    self.has_fts = self._ensure_fulltext_index(cursor)
+        finally:
+            if version < latest and self.pragmas.get("foreign_keys") is not None:
+                conn.execute(f"PRAGMA foreign_keys = {self.pragmas['foreign_keys']}")
+
+    def _migrate_base_schema(self, cursor: sqlite3.Cursor) -> None:
         # 1. Tasks Table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS tasks (
@@ -71,139 +328,1443 @@ class TaskManager:
         cursor.execute("SELECT count(*) FROM tags")
         if cursor.fetchone()[0] == 0:
             cursor.executemany("INSERT INTO tags (name, color) VALUES (?, ?)", self.DEFAULT_TAGS)
-            
-        conn.commit()
-        conn.close()
+
+    def _migrate_date_tag_index(self, cursor: sqlite3.Cursor) -> None:
+        # date_str is ISO 'yyyy-MM-dd' text, so it sorts chronologically and
+        # day lookups, month ranges and tag filters can all seek this index.
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tasks_date_tag_priority ON tasks (date_str, tag, priority)"
+        )
+
+    def _migrate_fulltext_index(self, cursor: sqlite3.Cursor) -> None:
+        self.has_fts = self._ensure_fulltext_index(cursor)
+
+    def _migrate_meta_table(self, cursor: sqlite3.Cursor) -> None:
+        # 'revision' is bumped by every committed write transaction (see transaction()),
+        # letting backups and caches tell cheaply whether anything changed.
+        cursor.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        cursor.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('revision', 0)")
+
+    def _migrate_rollup_table(self, cursor: sqlite3.Cursor) -> None:
+        # Per (day, tag, priority) task/done counts, kept current by triggers on every
+        # write so statistics read a few thousand rollup rows instead of all tasks.
+        self._build_rollup(cursor, "tag", "TEXT")
+
+    def _build_rollup(self, cursor: sqlite3.Cursor, tag: str, tag_type: str) -> None:
+        """(Re)create task_rollup and its triggers keyed on the tasks column `tag`, then refill it."""
+        done = "IN ({})".format(", ".join(f"'{s}'" for s in self.DONE_STATUSES))
+        for name in ("task_rollup_ai", "task_rollup_ad", "task_rollup_au"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute("DROP TABLE IF EXISTS task_rollup")
+        cursor.execute(f"""
+            CREATE TABLE task_rollup (
+                date_str TEXT NOT NULL,
+                {tag} {tag_type} NOT NULL,
+                priority INTEGER NOT NULL,
+                total INTEGER NOT NULL,
+                done INTEGER NOT NULL,
+                PRIMARY KEY (date_str, {tag}, priority)
+            ) WITHOUT ROWID
+        """)
+        add = f"""
+            INSERT INTO task_rollup (date_str, {tag}, priority, total, done)
+            VALUES (new.date_str, new.{tag}, IFNULL(new.priority, 0), 1, new.status {done})
+            ON CONFLICT (date_str, {tag}, priority) DO UPDATE SET total = total + 1, done = done + excluded.done;
+        """
+        remove = f"""
+            UPDATE task_rollup SET total = total - 1, done = done - (old.status {done})
+            WHERE date_str = old.date_str AND {tag} = old.{tag} AND priority = IFNULL(old.priority, 0);
+            DELETE FROM task_rollup
+            WHERE date_str = old.date_str AND {tag} = old.{tag} AND priority = IFNULL(old.priority, 0) AND total <= 0;
+        """
+        cursor.execute(f"CREATE TRIGGER task_rollup_ai AFTER INSERT ON tasks BEGIN {add} END")
+        cursor.execute(f"CREATE TRIGGER task_rollup_ad AFTER DELETE ON tasks BEGIN {remove} END")
+        cursor.execute(f"""
+            CREATE TRIGGER task_rollup_au AFTER UPDATE OF date_str, {tag}, priority, status ON tasks
+            BEGIN {remove} {add} END
+        """)
+        cursor.execute(f"""
+            INSERT INTO task_rollup (date_str, {tag}, priority, total, done)
+            SELECT date_str, {tag}, IFNULL(priority, 0), COUNT(*), SUM(status {done})
+            FROM tasks GROUP BY date_str, {tag}, IFNULL(priority, 0)
+        """)
+
+    def _migrate_recurrences(self, cursor: sqlite3.Cursor) -> None:
+        # A rule is stored once; occurrences are generated per requested range.
+        # An exception row suppresses one date (deleted, or materialized into tasks).
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS recurrences (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                start_date TEXT NOT NULL,
+                end_date TEXT,
+                freq TEXT NOT NULL,
+                interval INTEGER NOT NULL DEFAULT 1,
+                weekdays TEXT NOT NULL DEFAULT '',
+                content TEXT NOT NULL,
+                tag TEXT NOT NULL,
+                priority INTEGER DEFAULT 0,
+                description TEXT DEFAULT ''
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS recurrence_exceptions (
+                recurrence_id INTEGER NOT NULL REFERENCES recurrences (id) ON DELETE CASCADE,
+                date_str TEXT NOT NULL,
+                PRIMARY KEY (recurrence_id, date_str)
+            ) WITHOUT ROWID
+        """)
+
+    def _migrate_tag_ids(self, cursor: sqlite3.Cursor) -> None:
+        # Tags get integer ids and tasks/recurrences reference them (tag_id) instead of
+        # repeating the name, so filters compare integers and a rename touches one row.
+        # SQLite cannot change a column in place: each table is rebuilt and renamed.
+        if not cursor.connection.in_transaction: cursor.execute("BEGIN")
+        default_color = self.DEFAULT_TAG_COLOR
+        cursor.execute("""
+            CREATE TABLE tags_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                color TEXT NOT NULL
+            )
+        """)
+        cursor.execute("INSERT INTO tags_new (name, color) SELECT name, color FROM tags ORDER BY rowid")
+        # Tags that tasks or rules used without ever registering them
+        cursor.execute("""
+            INSERT OR IGNORE INTO tags_new (name, color)
+            SELECT tag, ? FROM (SELECT tag FROM tasks UNION SELECT tag FROM recurrences)
+            WHERE tag NOT IN (SELECT name FROM tags_new) ORDER BY tag
+        """, (default_color,))
+        cursor.execute("DROP TABLE tags")
+        cursor.execute("ALTER TABLE tags_new RENAME TO tags")
+
+        # Keep AUTOINCREMENT's high-water mark so ids of deleted tasks/rules are never reused
+        sequences = dict(cursor.execute(
+            "SELECT name, seq FROM sqlite_sequence WHERE name IN ('tasks', 'recurrences')").fetchall())
+        cursor.execute("""
+            CREATE TABLE tasks_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date_str TEXT NOT NULL,
+                content TEXT NOT NULL,
+                status TEXT NOT NULL,
+                tag_id INTEGER NOT NULL REFERENCES tags (id),
+                priority INTEGER DEFAULT 0,
+                description TEXT DEFAULT ''
+            )
+        """)
+        cursor.execute("""
+            INSERT INTO tasks_new (id, date_str, content, status, tag_id, priority, description)
+            SELECT t.id, t.date_str, t.content, t.status, g.id, t.priority, t.description
+            FROM tasks t JOIN tags g ON g.name = t.tag
+        """)
+        cursor.execute("""
+            CREATE TABLE recurrences_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                start_date TEXT NOT NULL,
+                end_date TEXT,
+                freq TEXT NOT NULL,
+                interval INTEGER NOT NULL DEFAULT 1,
+                weekdays TEXT NOT NULL DEFAULT '',
+                content TEXT NOT NULL,
+                tag_id INTEGER NOT NULL REFERENCES tags (id),
+                priority INTEGER DEFAULT 0,
+                description TEXT DEFAULT ''
+            )
+        """)
+        cursor.execute("""
+            INSERT INTO recurrences_new (id, start_date, end_date, freq, interval, weekdays, content, tag_id,
+                                         priority, description)
+            SELECT r.id, r.start_date, r.end_date, r.freq, r.interval, r.weekdays, r.content, g.id,
+                   r.priority, r.description
+            FROM recurrences r JOIN tags g ON g.name = r.tag
+        """)
+        # Dropping tasks also drops its index and the FTS/rollup triggers, recreated below
+        cursor.execute("DROP TABLE tasks")
+        cursor.execute("ALTER TABLE tasks_new RENAME TO tasks")
+        cursor.execute("DROP TABLE recurrences")
+        cursor.execute("ALTER TABLE recurrences_new RENAME TO recurrences")
+        for name, seq in sequences.items():
+            cursor.execute("INSERT INTO sqlite_sequence (name, seq) SELECT ?, 0 WHERE NOT EXISTS "
+                           "(SELECT 1 FROM sqlite_sequence WHERE name = ?)", (name, name))
+            cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (seq, name))
+
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tasks_date_tag_priority ON tasks (date_str, tag_id, priority)"
+        )
+        self._build_rollup(cursor, "tag_id", "INTEGER")
+        # Rowids and text are unchanged; this recreates the dropped sync triggers
+        self.has_fts = self._ensure_fulltext_index(cursor)
+        self._tag_cache = None
+
+    def _ensure_fulltext_index(self, cursor: sqlite3.Cursor) -> bool:
+        """
+        Create (or repair) the external-content FTS5 index over tasks.content and
+        tasks.description. Returns False when this SQLite build has no FTS5/trigram
+        support, in which case searches fall back to substring scans.
+        """
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+                    content, description,
+                    content='tasks', content_rowid='id', tokenize='trigram'
+                )
+            """)
+            cursor.execute("SELECT rowid FROM tasks_fts LIMIT 0")
+        except sqlite3.OperationalError:
+            # Sync triggers left behind by an FTS-capable build would make every write fail here
+            for name in self.FTS_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            return False
+
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'tasks_fts_%'")
+        existing = {row[0] for row in cursor.fetchall()}
+        if existing != set(self.FTS_TRIGGERS):
+            for name, ddl in self.FTS_TRIGGERS.items():
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+                cursor.execute(ddl)
+            cursor.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+        return True
+
+    def _fts_query(self, keyword: str) -> Optional[str]:
+        """FTS5 phrase query for keyword, or None when the index can't serve it."""
+        if not self.has_fts or len(keyword) < self.FTS_MIN_KEYWORD: return None
+        return '"' + keyword.replace('"', '""') + '"'
+
+    @staticmethod
+    def _month_range(year: int, month: int) -> Tuple[str, str]:
+        """Half-open [first day, first day of next month) bounds as ISO date strings."""
+        if (year, month) == (datetime.MAXYEAR, 12): # no 10000-01-01; "10000" would also sort first
+            return f"{year}-12-01", TaskManager._next_day(f"{year}-12-31")
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return f"{year}-{month:02d}-01", f"{next_year}-{next_month:02d}-01"
 
     # --- Tag Management ---
+    # Tasks store tag_id; Task.tag is still the name, read through this join
+    TASK_COLUMNS = "t.id, t.date_str, t.content, t.status, g.name, t.priority, t.description"
+    TASK_TABLES = "tasks t JOIN tags g ON g.id = t.tag_id"
+
     def get_all_tags(self) -> List[Tag]:
-        conn = sqlite3.connect(self.DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("SELECT name, color FROM tags")
-        rows = cursor.fetchall()
-        conn.close()
-        return [Tag(*row) for row in rows]
+        cursor = self._connect().execute("SELECT name, color, id FROM tags ORDER BY id")
+        return [Tag(*row) for row in cursor.fetchall()]
+
+    def _tag_map(self, reload: bool = False) -> Dict[str, Tuple[int, str]]:
+        tags = self._tag_cache
+        if tags is None or reload:
+            tags = {name: (tag_id, color) for tag_id, name, color in
+                    self._connect().execute("SELECT id, name, color FROM tags")}
+            self._tag_cache = tags
+        return tags
+
+    def get_tag_id(self, name: str) -> Optional[int]:
+        entry = self._tag_map().get(name)
+        if entry is None: entry = self._tag_map(reload=True).get(name) # created by another connection
+        return entry[0] if entry else None
+
+    def _tag_filter(self, tags) -> Optional[List[int]]:
+        """
+        Tag ids for a filter given as tag names and/or ids; unknown names are dropped.
+        None means no filter, which is also returned when every tag is selected.
+        """
+        if tags is None: return None
+        tag_map, reloaded = self._tag_map(), False
+        ids = set()
+        for tag in tags:
+            if isinstance(tag, int):
+                ids.add(tag)
+                continue
+            if tag not in tag_map and not reloaded:
+                tag_map, reloaded = self._tag_map(reload=True), True
+            if tag in tag_map: ids.add(tag_map[tag][0])
+        if ids and len(ids) >= len(tag_map) and ids.issuperset(v[0] for v in tag_map.values()): return None
+        return sorted(ids)
+
+    def _tag_id_for_write(self, cursor: sqlite3.Cursor, name: str) -> int:
+        """Id of tag `name`, registering it with DEFAULT_TAG_COLOR if it doesn't exist yet."""
+        tag_id = self.get_tag_id(name)
+        if tag_id is None:
+            cursor.execute("INSERT INTO tags (name, color) VALUES (?, ?)", (name, self.DEFAULT_TAG_COLOR))
+            tag_id = cursor.lastrowid
+            self._tag_cache = None
+        return tag_id
 
     def add_custom_tag(self, name: str, color: str) -> bool:
         try:
-            conn = sqlite3.connect(self.DB_NAME)
-            cursor = conn.cursor()
-            cursor.execute("INSERT INTO tags (name, color) VALUES (?, ?)", (name, color))
-            conn.commit()
-            conn.close()
+            with self.transaction() as cursor:
+                cursor.execute("INSERT INTO tags (name, color) VALUES (?, ?)", (name, color))
             return True
         except sqlite3.IntegrityError:
             return False
+        finally:
+            self._tag_cache = None
+
+    def rename_tag(self, old_name: str, new_name: str) -> bool:
+        """Rename a tag; tasks reference it by id, so this updates one row. False if new_name is taken."""
+        try:
+            with self.transaction() as cursor:
+                cursor.execute("UPDATE tags SET name = ? WHERE name = ?", (new_name, old_name))
+                return cursor.rowcount > 0
+        except sqlite3.IntegrityError:
+            return False
+        finally:
+            self._tag_cache = None
+
+    def merge_tags(self, source: str, target: str) -> int:
+        """Move every task and recurring rule of tag `source` to `target`, then drop `source`. Returns tasks moved."""
+        if source == target: return 0
+        try:
+            with self.transaction() as cursor:
+                source_id, target_id = self.get_tag_id(source), self.get_tag_id(target)
+                if source_id is None or target_id is None:
+                    raise ValueError(f"no such tag: {source if source_id is None else target}")
+                cursor.execute("UPDATE tasks SET tag_id = ? WHERE tag_id = ?", (target_id, source_id))
+                moved = cursor.rowcount
+                cursor.execute("UPDATE recurrences SET tag_id = ? WHERE tag_id = ?", (target_id, source_id))
+                cursor.execute("DELETE FROM tags WHERE id = ?", (source_id,))
+                return moved
+        finally:
+            self._tag_cache = None
+
+    def delete_tag(self, name: str) -> int:
+        """Delete a tag together with its tasks and recurring rules. Returns the number of tasks deleted."""
+        try:
+            with self.transaction() as cursor:
+                tag_id = self.get_tag_id(name)
+                if tag_id is None: return 0
+                cursor.execute("DELETE FROM tasks WHERE tag_id = ?", (tag_id,))
+                deleted = cursor.rowcount
+                cursor.execute("DELETE FROM recurrence_exceptions WHERE recurrence_id IN "
+                               "(SELECT id FROM recurrences WHERE tag_id = ?)", (tag_id,))
+                cursor.execute("DELETE FROM recurrences WHERE tag_id = ?", (tag_id,))
+                cursor.execute("DELETE FROM tags WHERE id = ?", (tag_id,))
+                return deleted
+        finally:
+            self._tag_cache = None
 
     # --- Task Management ---
-    def add_task(self, date_str: str, content: str, status: str, tag: str, priority: int = 0, description: str = "") -> None:
-        conn = sqlite3.connect(self.DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO tasks (date_str, content, status, tag, priority, description) VALUES (?, ?, ?, ?, ?, ?)",
-            (date_str, content, status, tag, priority, description)
-        )
-        conn.commit()
-        conn.close()
+    def add_task(self, date_str: str, content: str, status: str, tag: str, priority: int = 0, description: str = "") -> int:
+        with self.transaction() as cursor:
+            cursor.execute(
+                "INSERT INTO tasks (date_str, content, status, tag_id, priority, description) VALUES (?, ?, ?, ?, ?, ?)",
+                (date_str, content, status, self._tag_id_for_write(cursor, tag), priority, description)
+            )
+            return cursor.lastrowid
 
+    # Updates to a recurring occurrence (negative id) materialize it first
     def update_task_status(self, task_id: int, new_status: str) -> None:
-        conn = sqlite3.connect(self.DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("UPDATE tasks SET status = ? WHERE id = ?", (new_status, task_id))
-        conn.commit()
-        conn.close()
+        with self.transaction() as cursor:
+            task_id = self.materialize_occurrence(task_id)
+            cursor.execute("UPDATE tasks SET status = ? WHERE id = ?", (new_status, task_id))
         
     def update_task_priority(self, task_id: int, priority: int) -> None:
-        conn = sqlite3.connect(self.DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("UPDATE tasks SET priority = ? WHERE id = ?", (priority, task_id))
-        conn.commit()
-        conn.close()
+        with self.transaction() as cursor:
+            task_id = self.materialize_occurrence(task_id)
+            cursor.execute("UPDATE tasks SET priority = ? WHERE id = ?", (priority, task_id))
 
     # [New] Update comprehensive task info
     def update_task_info(self, task_id: int, content: str, tag: str, priority: int, description: str) -> None:
-        conn = sqlite3.connect(self.DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE tasks SET content = ?, tag = ?, priority = ?, description = ? WHERE id = ?", 
-            (content, tag, priority, description, task_id)
-        )
-        conn.commit()
-        conn.close()
+        with self.transaction() as cursor:
+            task_id = self.materialize_occurrence(task_id)
+            cursor.execute(
+                "UPDATE tasks SET content = ?, tag_id = ?, priority = ?, description = ? WHERE id = ?", 
+                (content, self._tag_id_for_write(cursor, tag), priority, description, task_id)
+            )
 
     def delete_task(self, task_id: int) -> None:
-        conn = sqlite3.connect(self.DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-        conn.commit()
-        conn.close()
+        with self.transaction() as cursor:
+            occurrence = self.parse_occurrence_id(task_id)
+            if occurrence:
+                # Deleting one occurrence only skips that date of the series
+                cursor.execute("INSERT OR IGNORE INTO recurrence_exceptions (recurrence_id, date_str) VALUES (?, ?)",
+                               occurrence)
+            else:
+                cursor.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
 
     # --- Queries ---
-    def get_tasks_by_date_and_tags(self, date_str: str, active_tags: List[str]) -> List[Task]:
-        if not active_tags: return []
-        conn = sqlite3.connect(self.DB_NAME)
-        cursor = conn.cursor()
-        placeholders = ','.join('?' for _ in active_tags)
+    def get_task(self, task_id: int) -> Optional[Task]:
+        if task_id < 0: return self._get_occurrence(task_id)
+        row = self._connect().execute(
+            f"SELECT {self.TASK_COLUMNS} FROM {self.TASK_TABLES} WHERE t.id = ?", (task_id,)
+        ).fetchone()
+        return Task(*row) if row else None
+
+    def get_tasks_by_date_and_tags(self, date_str: str, active_tags: Optional[List[Union[str, int]]]) -> List[Task]:
+        """Tasks of one day whose tag (name or id) is in active_tags (None: every tag), recurring occurrences included."""
+        tag_ids = self._tag_filter(active_tags)
+        if tag_ids is not None and not tag_ids: return []
         # Select all fields including description
         query = f"""
-            SELECT id, date_str, content, status, tag, priority, description 
-            FROM tasks 
-            WHERE date_str = ? AND tag IN ({placeholders})
-            ORDER BY priority DESC, id ASC
-        """
-        cursor.execute(query, [date_str] + active_tags)
-        rows = cursor.fetchall()
-        conn.close()
-        return [Task(*row) for row in rows]
-
-    def search_tasks(self, keyword: str) -> List[Task]:
-        conn = sqlite3.connect(self.DB_NAME)
-        cursor = conn.cursor()
+            SELECT {self.TASK_COLUMNS}
+            FROM {self.TASK_TABLES}
+            WHERE t.date_str = ?
+        """
+        params = [date_str]
+        if tag_ids is not None:
+            query += f" AND t.tag_id IN ({','.join('?' for _ in tag_ids)})"
+            params += tag_ids
+        query += " ORDER BY t.priority DESC, t.id ASC"
+        cursor = self._connect().execute(query, params)
+        tasks = [Task(*row) for row in cursor.fetchall()]
+        occurrences = self.expand_recurrences(date_str, self._next_day(date_str), tag_ids)
+        if occurrences:
+            tasks = sorted(tasks + occurrences, key=lambda t: (-t.priority, t.id))
+        return tasks
+
+    def search_range(self, start: str, end: str, tags: Optional[List[Union[str, int]]], min_priority: int = -1,
+                     keyword: str = "", limit: Optional[int] = None, offset: int = 0,
+                     include_recurring: bool = False) -> List[Task]:
+        """
+        Tasks dated within [start, end] (inclusive ISO dates) in one indexed query.
+        tags (names or ids) =None matches every tag; min_priority of -1 disables the priority filter;
+        keyword is a case-sensitive substring match on content or description.
+        Results are ordered by date, then priority, and paged with limit/offset.
+        include_recurring merges in the recurring occurrences of the range.
+        """
+        tag_ids = self._tag_filter(tags)
+        if tag_ids is not None and not tag_ids: return []
+        fts_query = self._fts_query(keyword) if keyword else None
+        if fts_query:
+            # The trigram index narrows candidates; instr() keeps the match case-sensitive
+            query = f"""
+                SELECT {self.TASK_COLUMNS}, snippet(tasks_fts, -1, ?, ?, '…', 16)
+                FROM tasks_fts JOIN tasks t ON t.id = tasks_fts.rowid JOIN tags g ON g.id = t.tag_id
+                WHERE tasks_fts MATCH ? AND t.date_str >= ? AND t.date_str <= ?
+            """
+            params = [self.HIGHLIGHT_OPEN, self.HIGHLIGHT_CLOSE, fts_query, start, end]
+        else:
+            query = f"""
+                SELECT {self.TASK_COLUMNS}
+                FROM {self.TASK_TABLES}
+                WHERE t.date_str >= ? AND t.date_str <= ?
+            """
+            params = [start, end]
+        if tag_ids is not None:
+            query += f" AND t.tag_id IN ({','.join('?' for _ in tag_ids)})"
+            params += tag_ids
+        if min_priority is not None and min_priority >= 0:
+            query += " AND t.priority >= ?"
+            params.append(min_priority)
+        if keyword:
+            query += " AND (instr(t.content, ?) > 0 OR instr(t.description, ?) > 0)"
+            params += [keyword, keyword]
+        query += " ORDER BY t.date_str ASC, t.priority DESC, t.id ASC LIMIT ? OFFSET ?"
+        if include_recurring:
+            # Merge before paging: fetch everything up to the end of the requested page
+            params += [-1 if limit is None else offset + limit, 0]
+        else:
+            params += [-1 if limit is None else limit, offset]
+        cursor = self._connect().execute(query, params)
+        tasks = [Task(*row) for row in cursor.fetchall()]
+        if not include_recurring: return tasks
+
+        # Both streams share one order, so a page needs at most offset + limit occurrences
+        occurrences = self._iter_occurrences(start, self._next_day(end), tag_ids, min_priority, keyword)
+        if limit is not None: occurrences = itertools.islice(occurrences, offset + limit)
+        tasks = list(heapq.merge(tasks, occurrences, key=lambda t: (t.date_str, -t.priority, t.id)))
+        return tasks[offset:] if limit is None else tasks[offset:offset + limit]
+
+    def search_tasks(self, keyword: str, limit: Optional[int] = None) -> List[Task]:
+        """
+        Search content and description. With the FTS5 index, results are ranked
+        by relevance (bm25) and carry a highlighted snippet; otherwise this falls
+        back to a LIKE scan ordered by date.
+        """
+        fts_query = self._fts_query(keyword)
+        if fts_query:
+            cursor = self._connect().execute(f"""
+                SELECT {self.TASK_COLUMNS}, snippet(tasks_fts, -1, ?, ?, '…', 16)
+                FROM tasks_fts JOIN tasks t ON t.id = tasks_fts.rowid JOIN tags g ON g.id = t.tag_id
+                WHERE tasks_fts MATCH ?
+                ORDER BY rank
+                LIMIT ?
+            """, (self.HIGHLIGHT_OPEN, self.HIGHLIGHT_CLOSE, fts_query, -1 if limit is None else limit))
+            return [Task(*row) for row in cursor.fetchall()]
+
         # Search in content or description
-        cursor.execute("""
-            SELECT id, date_str, content, status, tag, priority, description 
-            FROM tasks 
-            WHERE content LIKE ? OR description LIKE ? 
-            ORDER BY date_str DESC
-        """, (f"%{keyword}%", f"%{keyword}%"))
-        rows = cursor.fetchall()
-        conn.close()
-        return [Task(*row) for row in rows]
+        cursor = self._connect().execute(f"""
+            SELECT {self.TASK_COLUMNS}
+            FROM {self.TASK_TABLES}
+            WHERE t.content LIKE ? OR t.description LIKE ?
+            ORDER BY t.date_str DESC
+            LIMIT ?
+        """, (f"%{keyword}%", f"%{keyword}%", -1 if limit is None else limit))
+        return [Task(*row) for row in cursor.fetchall()]
 
     # --- Calendar Summary ---
-    def get_month_task_summary(self, year: int, month: int, active_tags: List[str]) -> dict:
+    def get_month_task_summary(self, year: int, month: int, active_tags: Optional[List[Union[str, int]]]) -> dict:
         """
-        Get task summary for calendar view.
+        Get task summary for calendar view: one entry per day holding the
+        highest-priority task's tag/color/priority plus the day's task counts.
+        active_tags holds tag names and/or ids; None matches every tag.
         """
-        if not active_tags: return {}
+        tag_ids = self._tag_filter(active_tags)
+        if tag_ids is not None and not tag_ids: return {}
         
-        conn = sqlite3.connect(self.DB_NAME)
-        cursor = conn.cursor()
-        month_str = f"{year}-{month:02d}-%"
-        placeholders = ','.join('?' for _ in active_tags)
+        month_start, month_end = self._month_range(year, month)
+        done_placeholders = ','.join('?' for _ in self.DONE_STATUSES)
+        tag_clause = f"AND tag_id IN ({','.join('?' for _ in tag_ids)})" if tag_ids is not None else ""
         
+        # Window functions rank each day's tasks and count them in the same pass over
+        # the integer columns; only the one winning row per day joins its tag name/color.
         query = f"""
-            SELECT date_str, tag, priority 
-            FROM tasks 
-            WHERE date_str LIKE ? AND tag IN ({placeholders})
-            ORDER BY priority DESC, id ASC
+            SELECT d.date_str, g.name, d.priority, g.color, d.total, d.done, d.high, d.id
+            FROM (
+                SELECT id, date_str, tag_id, priority,
+                       ROW_NUMBER() OVER (PARTITION BY date_str ORDER BY priority DESC, id ASC) AS rn,
+                       COUNT(*) OVER (PARTITION BY date_str) AS total,
+                       SUM(status IN ({done_placeholders})) OVER (PARTITION BY date_str) AS done,
+                       SUM(priority >= ?) OVER (PARTITION BY date_str) AS high
+                FROM tasks
+                WHERE date_str >= ? AND date_str < ? {tag_clause}
+            ) d JOIN tags g ON g.id = d.tag_id
+            WHERE d.rn = 1
         """
-        cursor.execute(query, [month_str] + active_tags)
-        rows = cursor.fetchall()
-        
-        cursor.execute("SELECT name, color FROM tags")
-        tag_rows = cursor.fetchall()
-        conn.close()
-
-        tags_info = {name: color for name, color in tag_rows}
+        params = list(self.DONE_STATUSES) + [self.HIGH_PRIORITY, month_start, month_end] + (tag_ids or [])
+        rows = self._connect().execute(query, params).fetchall()
         
         summary = {}
-        for date_str, tag_name, priority in rows:
-            if date_str not in summary:
-                summary[date_str] = {
-                    'color': tags_info.get(tag_name, '#8E8E93'),
-                    'priority': priority,
-                    'tag': tag_name
-                }
+        winners = {}
+        for date_str, tag_name, priority, color, total, done, high, task_id in rows:
+            winners[date_str] = (-priority, task_id)
+            summary[date_str] = {
+                'color': color,
+                'priority': priority,
+                'tag': tag_name,
+                'total': total,
+                'done': done,
+                'high': high
+            }
+
+        # Recurring occurrences are never stored, fold them in per day. The winner is
+        # picked by the same (-priority, id) order as get_tasks_by_date_and_tags, so
+        # negative occurrence ids win priority ties.
+        occurrences = self.expand_recurrences(month_start, month_end, tag_ids)
+        if occurrences:
+            colors = {name: color for name, (_, color) in self._tag_map().items()}
+            for task in occurrences:
+                entry = summary.get(task.date_str)
+                if entry is None:
+                    entry = summary[task.date_str] = {'total': 0, 'done': 0, 'high': 0}
+                key = (-task.priority, task.id)
+                if task.date_str not in winners or key < winners[task.date_str]:
+                    winners[task.date_str] = key
+                    entry.update(color=colors.get(task.tag, self.DEFAULT_TAG_COLOR), priority=task.priority, tag=task.tag)
+                entry['total'] += 1
+                entry['done'] += task.status in self.DONE_STATUSES
+                entry['high'] += task.priority >= self.HIGH_PRIORITY
         
-        return summary
\ No newline at end of file
+        return summary
+
+    # --- Recurring Tasks ---
+    RECURRENCE_FREQS = ("daily", "weekly", "monthly")
+    # Occurrences get synthetic ids -(recurrence_id * OCCURRENCE_ID_BASE + yyyymmdd)
+    OCCURRENCE_ID_BASE = 10 ** 8
+    RECURRENCE_COLUMNS = ("id", "start_date", "end_date", "freq", "interval", "weekdays",
+                          "content", "tag", "priority", "description")
+    # Rules store tag_id; 'tag' is read as the name through a join
+    RECURRENCE_SELECT = ", ".join("g.name" if col == "tag" else f"r.{col}" for col in RECURRENCE_COLUMNS)
+    RECURRENCE_TABLES = "recurrences r JOIN tags g ON g.id = r.tag_id"
+
+    @classmethod
+    def occurrence_id(cls, recurrence_id: int, date_str: str) -> int:
+        return -(recurrence_id * cls.OCCURRENCE_ID_BASE + int(date_str.replace("-", "")))
+
+    @classmethod
+    def parse_occurrence_id(cls, task_id: int) -> Optional[Tuple[int, str]]:
+        """(recurrence_id, date_str) for a synthetic occurrence id, None for stored tasks."""
+        if task_id >= 0: return None
+        recurrence_id, ymd = divmod(-task_id, cls.OCCURRENCE_ID_BASE)
+        return recurrence_id, f"{ymd // 10000:04d}-{ymd // 100 % 100:02d}-{ymd % 100:02d}"
+
+    @staticmethod
+    def _next_day(date_str: str) -> str:
+        try:
+            return (datetime.date.fromisoformat(date_str) + datetime.timedelta(days=1)).isoformat()
+        except (ValueError, OverflowError):
+            # Malformed, or 9999-12-31: sorts after any real date with this prefix
+            return date_str + "\uffff"
+
+    def add_recurrence(self, start_date: str, freq: str, content: str, tag: str, priority: int = 0,
+                       description: str = "", interval: int = 1, weekdays: Optional[List[int]] = None,
+                       end_date: Optional[str] = None) -> int:
+        """
+        Store a recurring task. freq is daily/weekly/monthly, repeating every
+        `interval` periods from start_date until end_date (inclusive, None = forever).
+        Weekly rules fire on `weekdays` (0 = Monday), defaulting to start_date's
+        weekday; monthly rules fire on start_date's day of month (skipping months
+        that lack it).
+        """
+        if freq not in self.RECURRENCE_FREQS: raise ValueError(f"unknown frequency: {freq}")
+        if interval < 1: raise ValueError("interval must be >= 1")
+        datetime.date.fromisoformat(start_date)
+        days = ",".join(str(d) for d in sorted(set(weekdays or [])) if 0 <= d <= 6)
+        with self.transaction() as cursor:
+            cursor.execute(
+                "INSERT INTO recurrences (start_date, end_date, freq, interval, weekdays, content, tag_id, priority, description) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (start_date, end_date, freq, interval, days, content, self._tag_id_for_write(cursor, tag),
+                 priority, description))
+            return cursor.lastrowid
+
+    def get_recurrences(self) -> List[dict]:
+        """Every rule as a dict (RECURRENCE_COLUMNS) plus its 'exceptions' dates."""
+        conn = self._connect()
+        rules = [dict(zip(self.RECURRENCE_COLUMNS, row)) for row in conn.execute(
+            f"SELECT {self.RECURRENCE_SELECT} FROM {self.RECURRENCE_TABLES} ORDER BY r.id")]
+        exceptions: Dict[int, List[str]] = {}
+        for rid, date_str in conn.execute(
+                "SELECT recurrence_id, date_str FROM recurrence_exceptions ORDER BY recurrence_id, date_str"):
+            exceptions.setdefault(rid, []).append(date_str)
+        for rule in rules:
+            rule["exceptions"] = exceptions.get(rule["id"], [])
+        return rules
+
+    def delete_recurrence(self, recurrence_id: int) -> None:
+        """Stop a series. Occurrences already materialized into tasks are kept."""
+        with self.transaction() as cursor:
+            cursor.execute("DELETE FROM recurrence_exceptions WHERE recurrence_id = ?", (recurrence_id,))
+            cursor.execute("DELETE FROM recurrences WHERE id = ?", (recurrence_id,))
+
+    def _rule_dates(self, rule: tuple, start: datetime.date, until: datetime.date):
+        """Yield the dates in [start, until] (inclusive, so date.max works) on which a recurrences row fires."""
+        _, first, last, freq, interval, weekdays = rule[:6]
+        first = datetime.date.fromisoformat(first)
+        if last: until = min(until, datetime.date.fromisoformat(last))
+        start = max(start, first)
+        if start > until: return
+        interval = max(1, interval or 1)
+        if freq == "daily":
+            skip = -(-(start - first).days // interval) * interval # first step on/after start
+            if skip > (until - first).days: return
+            day = first + datetime.timedelta(days=skip)
+            while True:
+                yield day
+                if (until - day).days < interval: return
+                day += datetime.timedelta(days=interval)
+        elif freq == "weekly":
+            days = {int(d) for d in weekdays.split(",") if d} if weekdays else {first.weekday()}
+            anchor = first - datetime.timedelta(days=first.weekday()) # Monday of the first week
+            day = start
+            while True:
+                if day.weekday() in days and ((day - anchor).days // 7) % interval == 0:
+                    yield day
+                if day >= until: return
+                day += datetime.timedelta(days=1)
+        elif freq == "monthly":
+            index = (start.year - first.year) * 12 + start.month - first.month
+            index = -(-index // interval) * interval if index > 0 else 0
+            while True:
+                year, month = divmod(first.month - 1 + index, 12)
+                year, month = year + first.year, month + 1
+                if (year, month) > (until.year, until.month): break
+                try:
+                    day = datetime.date(year, month, first.day)
+                except ValueError:
+                    day = None # e.g. the 31st in a 30-day month
+                if day is not None and start <= day <= until: yield day
+                index += interval
+
+    def expand_recurrences(self, start: str, end: str, tags: Optional[List[Union[str, int]]] = None) -> List[Task]:
+        """
+        Occurrences of every rule overlapping [start, end) (ISO dates, end exclusive)
+        as Task objects with synthetic negative ids, minus exception dates.
+        Only the requested range is generated; nothing is written.
+        """
+        return list(self._iter_occurrences(start, end, self._tag_filter(tags)))
+
+    def _iter_occurrences(self, start: str, end: str, tag_ids: Optional[List[int]],
+                          min_priority: int = -1, keyword: str = ""):
+        """
+        Lazily yield the occurrences in [start, end) ordered by (date, -priority, id).
+        Rules are merged date by date, so a caller that stops early never walks the
+        rest of a long range. min_priority/keyword filter whole rules up front.
+        """
+        if tag_ids is not None and not tag_ids: return
+        query = f"""
+            SELECT {self.RECURRENCE_SELECT} FROM {self.RECURRENCE_TABLES}
+            WHERE r.start_date < ? AND (r.end_date IS NULL OR r.end_date >= ?)
+        """
+        params = [end, start]
+        if tag_ids is not None:
+            query += f" AND r.tag_id IN ({','.join('?' for _ in tag_ids)})"
+            params += tag_ids
+        if min_priority is not None and min_priority >= 0:
+            query += " AND IFNULL(r.priority, 0) >= ?"
+            params.append(min_priority)
+        if keyword:
+            query += " AND (instr(r.content, ?) > 0 OR instr(IFNULL(r.description, ''), ?) > 0)"
+            params += [keyword, keyword]
+        conn = self._connect()
+        rules = conn.execute(query, params).fetchall()
+        if not rules: return
+        skipped = set(conn.execute(
+            "SELECT recurrence_id, date_str FROM recurrence_exceptions WHERE date_str >= ? AND date_str < ?",
+            (start, end)).fetchall())
+        try:
+            start_day, end_day = datetime.date.fromisoformat(start), datetime.date.fromisoformat(end[:10])
+        except ValueError:
+            return
+        if len(end) > 10:
+            until = end_day # _next_day's "after this day" form, used past 9999-12-31
+        elif end_day > datetime.date.min:
+            until = end_day - datetime.timedelta(days=1)
+        else:
+            return
+
+        def occurrences(rule):
+            rid, content, tag, priority, description = rule[0], rule[6], rule[7], rule[8] or 0, rule[9] or ""
+            for day in self._rule_dates(rule, start_day, until):
+                date_str = day.isoformat()
+                if (rid, date_str) in skipped: continue
+                yield Task(self.occurrence_id(rid, date_str), date_str, content, "待完成", tag, priority, description)
+
+        # Each rule's stream is already in this order (ids fall as dates rise, priority is fixed)
+        yield from heapq.merge(*(occurrences(rule) for rule in rules),
+                               key=lambda t: (t.date_str, -t.priority, t.id))
+
+    def _get_occurrence(self, task_id: int) -> Optional[Task]:
+        parsed = self.parse_occurrence_id(task_id)
+        if parsed is None: return None
+        rid, date_str = parsed
+        for task in self.expand_recurrences(date_str, self._next_day(date_str)):
+            if task.id == task_id: return task
+        return None
+
+    def materialize_occurrence(self, task_id: int) -> int:
+        """
+        Store a recurring occurrence as an ordinary task (and suppress the virtual
+        one with an exception) so it can be edited/completed. Returns the stored id;
+        ids of stored tasks are returned unchanged.
+        """
+        if task_id >= 0: return task_id
+        with self.transaction() as cursor:
+            task = self._get_occurrence(task_id)
+            if task is None: raise ValueError(f"no such occurrence: {task_id}")
+            rid, date_str = self.parse_occurrence_id(task_id)
+            cursor.execute("INSERT OR IGNORE INTO recurrence_exceptions (recurrence_id, date_str) VALUES (?, ?)",
+                           (rid, date_str))
+            cursor.execute(
+                "INSERT INTO tasks (date_str, content, status, tag_id, priority, description) VALUES (?, ?, ?, ?, ?, ?)",
+                (task.date_str, task.content, task.status, self._tag_id_for_write(cursor, task.tag),
+                 task.priority, task.description))
+            return cursor.lastrowid
+
+    # --- Statistics ---
+    STAT_GRANULARITIES = ("day", "week", "month", "year")
+
+    @staticmethod
+    def _stat_bucket(date_str: str, granularity: str) -> str:
+        if granularity == "day": return date_str
+        if granularity == "month": return date_str[:7]
+        if granularity == "year": return date_str[:4]
+        year, week, _ = datetime.date.fromisoformat(date_str).isocalendar()
+        return f"{year}-W{week:02d}"
+
+    def get_statistics(self, granularity: str = "month", start: Optional[str] = None,
+                       end: Optional[str] = None) -> dict:
+        """
+        Completion aggregates from the task_rollup table in a single pass.
+
+        Returns totals ('total', 'done', 'todo', 'high_prio'), per-tag and
+        per-priority {key: (total, done)} maps, and 'trend': a chronological
+        list of (bucket, total, done) for day/week/month/year buckets.
+        Optional start/end ('yyyy-MM-dd', end exclusive) restrict the range.
+        """
+        if granularity not in self.STAT_GRANULARITIES:
+            raise ValueError(f"unknown granularity: {granularity}")
+        query = "SELECT date_str, tag_id, priority, total, done FROM task_rollup"
+        conditions, params = [], []
+        if start: conditions.append("date_str >= ?"); params.append(start)
+        if end: conditions.append("date_str < ?"); params.append(end)
+        if conditions: query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY date_str"
+
+        total = done = high = 0
+        by_tag: Dict[int, List[int]] = {} # keyed by tag id, named at the end
+        by_priority: Dict[int, List[int]] = {}
+        trend: Dict[str, List[int]] = {} # insertion order is chronological
+        last_date = last_bucket = None
+        conn = self._connect()
+        for date_str, tag, priority, count, finished in conn.execute(query, params):
+            total += count
+            done += finished
+            if priority >= self.HIGH_PRIORITY: high += count
+            for key, target in ((tag, by_tag), (priority, by_priority)):
+                entry = target.setdefault(key, [0, 0])
+                entry[0] += count
+                entry[1] += finished
+            if date_str != last_date: # rows arrive grouped by day
+                try:
+                    last_bucket = self._stat_bucket(date_str, granularity)
+                except ValueError:
+                    last_bucket = date_str # malformed date, keep it visible rather than fail
+                last_date = date_str
+            entry = trend.setdefault(last_bucket, [0, 0])
+            entry[0] += count
+            entry[1] += finished
+
+        names = dict(conn.execute("SELECT id, name FROM tags"))
+        return {
+            "total": total,
+            "done": done,
+            "todo": total - done,
+            "high_prio": high,
+            "by_tag": {names.get(k, str(k)): tuple(v) for k, v in by_tag.items()},
+            "by_priority": {k: tuple(v) for k, v in sorted(by_priority.items())},
+            "trend": [(k, v[0], v[1]) for k, v in trend.items()],
+        }
+
+    def get_daily_load(self, start: str, end: str,
+                       tags: Optional[List[Union[str, int]]] = None) -> Dict[str, Tuple[int, int, int]]:
+        """
+        Per-day (total, done, high) counts for [start, end) ('yyyy-MM-dd', end exclusive),
+        days without tasks omitted. One grouped range scan of task_rollup regardless of
+        how many tasks the range holds; recurring occurrences are added on top.
+        """
+        tag_ids = self._tag_filter(tags)
+        if tag_ids is not None and not tag_ids: return {}
+        query = """
+            SELECT date_str, SUM(total), SUM(done), SUM(CASE WHEN priority >= ? THEN total ELSE 0 END)
+            FROM task_rollup WHERE date_str >= ? AND date_str < ?
+        """
+        params = [self.HIGH_PRIORITY, start, end]
+        if tag_ids is not None:
+            query += f" AND tag_id IN ({','.join('?' for _ in tag_ids)})"
+            params += tag_ids
+        query += " GROUP BY date_str"
+        load = {date_str: (total, done, high) for date_str, total, done, high in self._connect().execute(query, params)}
+
+        for task in self.expand_recurrences(start, end, tag_ids):
+            total, done, high = load.get(task.date_str, (0, 0, 0))
+            load[task.date_str] = (total + 1, done, high + (task.priority >= self.HIGH_PRIORITY))
+        return load
+
+    def data_version(self) -> int:
+        """PRAGMA data_version of this thread's connection; it changes when any *other* connection commits."""
+        return self._connect().execute("PRAGMA data_version").fetchone()[0]
+
+    def get_revision(self) -> int:
+        """Counter bumped by each committed write transaction made through this class."""
+        return self._connect().execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0]
+
+    # --- Backup ---
+    BACKUP_PREFIX = "myday_backup_"
+
+    @classmethod
+    def list_backups(cls, backup_dir: str) -> List[str]:
+        """Backup file names in backup_dir, oldest first (names start with a timestamp)."""
+        if not os.path.isdir(backup_dir): return []
+        return sorted(name for name in os.listdir(backup_dir)
+                      if name.startswith(cls.BACKUP_PREFIX) and name.endswith((".db", ".db.gz")))
+
+    @classmethod
+    def _backup_revision(cls, name: str) -> Optional[int]:
+        # myday_backup_<timestamp>_r<revision>.db[.gz]; older backups carry no revision
+        stem = name[:-len(".gz")] if name.endswith(".gz") else name
+        _, sep, rev = stem[:-len(".db")].rpartition("_r")
+        return int(rev) if sep and rev.isdigit() else None
+
+    def backup(self, backup_dir: str = "backups", compress: bool = False, keep: int = 10,
+               only_if_changed: bool = False, pages: int = 256,
+               progress: Optional[Callable[[int, int], None]] = None) -> Optional[str]:
+        """
+        Copy the live database with the SQLite online backup API.
+
+        The copy is taken in steps of `pages` pages, so other connections keep
+        writing meanwhile, then verified with PRAGMA integrity_check before it
+        replaces anything. compress=True gzips the result. Only the newest `keep`
+        backups are retained (keep <= 0 keeps all). With only_if_changed, nothing
+        is written when the revision matches the newest backup's. Returns the
+        backup path, or None when skipped.
+        """
+        revision = self.get_revision()
+        existing = self.list_backups(backup_dir)
+        if only_if_changed and existing and self._backup_revision(existing[-1]) == revision:
+            return None
+
+        os.makedirs(backup_dir, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        name = f"{self.BACKUP_PREFIX}{timestamp}_r{revision}.db"
+        tmp_path = os.path.join(backup_dir, name + ".part")
+        final_path = os.path.join(backup_dir, name + (".gz" if compress else ""))
+
+        def on_step(status, remaining, total):
+            if progress: progress(total - remaining, total)
+
+        try:
+            target = sqlite3.connect(tmp_path)
+            try:
+                self._connect().backup(target, pages=pages, progress=on_step)
+                result = target.execute("PRAGMA integrity_check").fetchone()[0]
+                if result != "ok": raise sqlite3.DatabaseError(f"backup failed integrity check: {result}")
+                target.execute("PRAGMA journal_mode = DELETE") # standalone file, no -wal/-shm
+            finally:
+                target.close()
+            if compress:
+                with open(tmp_path, 'rb') as src, gzip.open(final_path + ".part", 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                os.replace(final_path + ".part", final_path)
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, final_path)
+        except BaseException:
+            for path in (tmp_path, final_path + ".part"):
+                if os.path.exists(path): os.remove(path)
+            raise
+
+        if keep > 0:
+            for old in self.list_backups(backup_dir)[:-keep]:
+                try:
+                    os.remove(os.path.join(backup_dir, old))
+                except OSError:
+                    pass
+        return final_path
+
+    # --- Export ---
+    EXPORT_VERSION = "1.2" # 1.2 adds "recurrences"
+    EXPORT_COLUMNS = ("id", "date_str", "content", "status", "tag", "priority", "description")
+
+    def export_json(self, file_path: str, compact: bool = False,
+                    progress: Optional[Callable[[int, int], bool]] = None, batch_size: int = 500) -> int:
+        """
+        Stream tags and tasks to a JSON file, reading the tasks table in batches.
+
+        The default layout matches json.dump(..., indent=4); compact=True writes
+        minified JSON through gzip. progress(done, total) is called after every
+        batch and may return False to cancel (ExportCancelled). Output goes to a
+        temporary file first, so a failed or cancelled export leaves file_path as
+        it was. Returns the number of tasks written.
+        """
+        if compact:
+            dumps = lambda obj: json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+        else:
+            dumps = lambda obj: json.dumps(obj, ensure_ascii=False, indent=4)
+
+        conn = self._connect()
+        own_snapshot = not conn.in_transaction
+        if own_snapshot: conn.execute("BEGIN") # one read snapshot for counts and rows
+        tmp_path = file_path + ".part"
+        try:
+            tags = [{"name": name, "color": color}
+                    for name, color in conn.execute("SELECT name, color FROM tags ORDER BY id")]
+            recurrences = self.get_recurrences()
+            total = conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+            opener = gzip.open if compact else open
+            with opener(tmp_path, 'wt', encoding='utf-8') as f:
+                head = dumps({"version": self.EXPORT_VERSION, "tags": tags, "recurrences": recurrences, "tasks": []})
+                f.write(head[:head.rindex("[]")] + "[")
+
+                # TASK_COLUMNS yields EXPORT_COLUMNS in order, with the tag name joined in
+                cursor = conn.execute(f"SELECT {self.TASK_COLUMNS} FROM {self.TASK_TABLES} ORDER BY t.id")
+                done = 0
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows: break
+                    # One dumps call per batch; strip its brackets and splice the items in.
+                    # Encoded strings never hold a raw newline, so re-indenting is a replace.
+                    items = dumps([dict(zip(self.EXPORT_COLUMNS, row)) for row in rows])
+                    items = items[1:-1] if compact else "\n    " + items[2:-2].replace("\n", "\n    ")
+                    f.write(("," if done else "") + items)
+                    done += len(rows)
+                    if progress and progress(done, total) is False:
+                        raise ExportCancelled()
+
+                f.write("]}" if compact else ("\n    ]\n}" if done else "]\n}"))
+            os.replace(tmp_path, file_path)
+            return done
+        except BaseException:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+            raise
+        finally:
+            if own_snapshot: conn.rollback()
+
+
+    # --- Import ---
+    # Imported tasks matching an existing row on these columns are skipped as duplicates
+    IMPORT_DEDUP_COLUMNS = ("date_str", "tag_id", "content", "description")
+    # (date_str, tag_id) pairs per duplicate probe; two parameters each stays under SQLite's 999 limit
+    IMPORT_PROBE_CHUNK = 400
+    # Dedup keys held in memory during an import before the probe cache is reset
+    IMPORT_KNOWN_MAX = 200000
+    # Above this many rows the FTS triggers are suspended and the new rows indexed in one statement
+    IMPORT_FTS_REBUILD_MIN = 2000
+
+    def import_json(self, file_path: str, progress: Optional[Callable[[int, int], bool]] = None,
+                    batch_size: int = 500) -> Tuple[int, int]:
+        """
+        Import an export file (plain or gzip) incrementally in one transaction.
+
+        Tasks are parsed one at a time and inserted with executemany in batches;
+        a task equal to an existing row (IMPORT_DEDUP_COLUMNS) or to one already
+        imported from the same file is skipped, so re-importing is idempotent.
+        Recurrence rules identical to an existing one are merged with it.
+        progress(bytes_read, file_size) runs after every batch and may return
+        False to cancel (ImportCancelled). Any error rolls everything back.
+        Returns (imported, skipped).
+        """
+        insert_sql = """
+            INSERT INTO tasks (date_str, content, status, tag_id, priority, description)
+            VALUES (:date_str, :content, :status, :tag_id, :priority, :description)
+        """
+        reader = _ExportReader(file_path)
+        imported = seen = 0
+        batch: List[dict] = []
+        # Dedup keys of every row stored under an already probed (date_str, tag_id) pair
+        known: set = set()
+        probed: set = set()
+        try:
+            with self.transaction() as cursor:
+                # Begin explicitly so the trigger DDL below is rolled back with everything else
+                if not cursor.connection.in_transaction: cursor.execute("BEGIN")
+
+                def flush():
+                    nonlocal imported
+                    if batch:
+                        if len(known) > self.IMPORT_KNOWN_MAX:
+                            # Bound memory; dropped pairs are re-read, including rows inserted so far
+                            known.clear()
+                            probed.clear()
+                        pairs = {(row["date_str"], row["tag_id"]) for row in batch} - probed
+                        known.update(self._import_stored_keys(cursor, list(pairs)))
+                        probed.update(pairs)
+                        rows = []
+                        for row in batch:
+                            key = tuple(row[col] for col in self.IMPORT_DEDUP_COLUMNS)
+                            if key not in known:
+                                known.add(key)
+                                rows.append(row)
+                        cursor.executemany(insert_sql, rows)
+                        imported += len(rows)
+                        batch.clear()
+                    if progress and progress(reader.position, reader.size) is False:
+                        raise ImportCancelled()
+
+                fts_after_id = None
+                for key, value in reader.items():
+                    if key == "tags":
+                        cursor.executemany("INSERT OR IGNORE INTO tags (name, color) VALUES (?, ?)",
+                                           [(tag["name"], tag["color"]) for tag in value])
+                        self._tag_cache = None
+                    elif key == "recurrences":
+                        self._import_recurrences(cursor, value)
+                    elif key == "tasks":
+                        raise ValueError("无效的数据文件格式: 缺少 tasks 字段")
+                    elif key == "task":
+                        try:
+                            row = {col: value[col] for col in ("date_str", "content", "status")}
+                            tag = value["tag"]
+                        except (KeyError, TypeError):
+                            raise ValueError(f"无效的任务记录: {value!r}") from None
+                        if not isinstance(tag, str): raise ValueError(f"无效的任务记录: {value!r}")
+                        row["tag_id"] = self._tag_id_for_write(cursor, tag)
+                        row["priority"] = value.get("priority") or 0
+                        row["description"] = value.get("description") or ""
+                        batch.append(row)
+                        seen += 1
+                        if seen == self.IMPORT_FTS_REBUILD_MIN and self.has_fts and fts_after_id is None:
+                            # Large import: one bulk index insert beats per-row trigger work
+                            for name in self.FTS_TRIGGERS: cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+                            fts_after_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()[0]
+                        if len(batch) >= batch_size: flush()
+                if not reader.has_tasks: raise ValueError("无效的数据文件格式: 缺少 tasks 字段")
+                flush()
+                if fts_after_id is not None:
+                    # Ids are AUTOINCREMENT, so everything above fts_after_id was inserted untracked
+                    for ddl in self.FTS_TRIGGERS.values(): cursor.execute(ddl)
+                    cursor.execute("INSERT INTO tasks_fts (rowid, content, description) "
+                                   "SELECT id, content, description FROM tasks WHERE id > ?", (fts_after_id,))
+        finally:
+            reader.close()
+        return imported, seen - imported
+
+    def _import_stored_keys(self, cursor: sqlite3.Cursor, pairs: List[Tuple[str, int]]) -> Iterator[tuple]:
+        """IMPORT_DEDUP_COLUMNS tuples of the stored rows under the given (date_str, tag_id) pairs."""
+        # Probed through idx_tasks_date_tag_priority; the text columns are compared by the caller
+        columns = ", ".join(self.IMPORT_DEDUP_COLUMNS)
+        for i in range(0, len(pairs), self.IMPORT_PROBE_CHUNK):
+            chunk = pairs[i:i + self.IMPORT_PROBE_CHUNK]
+            match = " OR ".join("(date_str = ? AND tag_id = ?)" for _ in chunk)
+            yield from cursor.execute(f"SELECT {columns} FROM tasks WHERE {match}",
+                                      [v for pair in chunk for v in pair])
+
+    def _import_recurrences(self, cursor: sqlite3.Cursor, rules: List[dict]) -> None:
+        fields = self.RECURRENCE_COLUMNS[1:]
+        tag_index = fields.index("tag")
+        columns = ["tag_id" if col == "tag" else col for col in fields]
+        match = " AND ".join(f"{col} IS ?" for col in columns)
+        for rule in rules:
+            try:
+                values = [rule.get(col) for col in fields]
+            except AttributeError:
+                raise ValueError(f"无效的重复规则: {rule!r}") from None
+            if not isinstance(values[tag_index], str): raise ValueError(f"无效的重复规则: {rule!r}")
+            values[tag_index] = self._tag_id_for_write(cursor, values[tag_index])
+            row = cursor.execute(f"SELECT id FROM recurrences WHERE {match}", values).fetchone()
+            if row:
+                recurrence_id = row[0]
+            else:
+                cursor.execute(f"INSERT INTO recurrences ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                               values)
+                recurrence_id = cursor.lastrowid
+            cursor.executemany("INSERT OR IGNORE INTO recurrence_exceptions (recurrence_id, date_str) VALUES (?, ?)",
+                               [(recurrence_id, d) for d in rule.get("exceptions", [])])
+
+
+@dataclass
+class TaskChange:
+    kind: str                           # "added" | "updated" | "deleted" | "reset"
+    task: Optional[Task] = None         # new state; the removed task for "deleted"
+    date_str: Optional[str] = None
+    old_date_str: Optional[str] = None  # previous day when an update moved the task
+    renamed: Optional[Dict[str, str]] = None  # old -> new tag names for a "reset" caused by a rename
+
+    @property
+    def dates(self) -> List[str]:
+        return [d for d in (self.date_str, self.old_date_str) if d]
+
+
+class TaskRepository:
+    """
+    Write-through, in-memory view of TaskManager.
+
+    Months are loaded on first access and kept indexed by id and by date -> tag,
+    so repeated reads of a day never touch SQLite. Mutations are written to the
+    database first, then applied to the index, and finally announced to
+    subscribers as a TaskChange naming the affected day(s). Safe to read from
+    worker threads; listeners run on the thread that made the change.
+    """
+
+    def __init__(self, manager: TaskManager):
+        self.manager = manager
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._clear()
+        self._data_version = manager.data_version()
+        self._revision = manager.get_revision()
+
+    def _clear(self) -> None:
+        self._by_id: Dict[int, Task] = {}
+        self._by_date: Dict[str, Dict[str, Dict[int, Task]]] = {}
+        self._loaded_months = set()
+        self._tag_colors: Optional[Dict[str, str]] = None
+
+    # --- Notifications ---
+    def subscribe(self, callback) -> None:
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback) -> None:
+        if callback in self._listeners: self._listeners.remove(callback)
+
+    def _notify(self, change: TaskChange) -> None:
+        for callback in list(self._listeners):
+            callback(change)
+
+    def invalidate(self, renamed: Optional[Dict[str, str]] = None) -> None:
+        """Drop everything cached (e.g. after a bulk import) and tell views to reload."""
+        with self._lock:
+            self._clear()
+        self.manager._tag_cache = None # tags may have changed elsewhere too
+        self._notify(TaskChange("reset", renamed=renamed))
+
+    def sync(self) -> bool:
+        """
+        Invalidate if another connection (another process, a worker-thread import)
+        has committed a write since the last call. Call from the thread that
+        created the repository. Returns True when a reset was issued.
+        """
+        # data_version moves on any foreign commit; only a revision bump means the tasks changed
+        version, revision = self.manager.data_version(), self.manager.get_revision()
+        with self._lock:
+            changed = version != self._data_version and revision != self._revision
+            self._data_version, self._revision = version, revision
+        if changed: self.invalidate()
+        return changed
+
+    # --- Index maintenance ---
+    def _ensure_month(self, date_str: str) -> None:
+        month_key = date_str[:7]
+        if month_key in self._loaded_months: return
+        year, month = int(month_key[:4]), int(month_key[5:7])
+        month_start, month_end = self.manager._month_range(year, month)
+        for task in self.manager.search_range(month_start, month_end, None, include_recurring=True):
+            if task.date_str < month_end: self._index(task)
+        self._loaded_months.add(month_key)
+
+    def _index(self, task: Task) -> None:
+        self._by_id[task.id] = task
+        self._by_date.setdefault(task.date_str, {}).setdefault(task.tag, {})[task.id] = task
+
+    def _unindex(self, task: Task) -> None:
+        self._by_id.pop(task.id, None)
+        by_tag = self._by_date.get(task.date_str, {})
+        by_tag.get(task.tag, {}).pop(task.id, None)
+
+    def _is_loaded(self, date_str: str) -> bool:
+        return date_str[:7] in self._loaded_months
+
+    # --- Reads ---
+    def tag_colors(self) -> Dict[str, str]:
+        with self._lock:
+            if self._tag_colors is None:
+                self._tag_colors = {t.name: t.color for t in self.manager.get_all_tags()}
+            return dict(self._tag_colors)
+
+    def get_task(self, task_id: int) -> Optional[Task]:
+        with self._lock:
+            task = self._by_id.get(task_id)
+        return task if task is not None else self.manager.get_task(task_id)
+
+    def get_tasks(self, date_str: str, tags: List[str]) -> List[Task]:
+        """Same result and order as TaskManager.get_tasks_by_date_and_tags, served from memory."""
+        with self._lock:
+            self._ensure_month(date_str)
+            by_tag = self._by_date.get(date_str, {})
+            tasks = [t for tag in tags for t in by_tag.get(tag, {}).values()]
+        tasks.sort(key=lambda t: (-t.priority, t.id))
+        return tasks
+
+    def day_summary(self, date_str: str, tags: List[str]) -> Optional[dict]:
+        """One calendar summary entry, shaped like get_month_task_summary values."""
+        tasks = self.get_tasks(date_str, tags)
+        if not tasks: return None
+        top = tasks[0]
+        return {
+            'color': self.tag_colors().get(top.tag, '#8E8E93'),
+            'priority': top.priority,
+            'tag': top.tag,
+            'total': len(tasks),
+            'done': sum(1 for t in tasks if t.status in TaskManager.DONE_STATUSES),
+            'high': sum(1 for t in tasks if t.priority >= TaskManager.HIGH_PRIORITY)
+        }
+
+    # --- Writes ---
+    def add_custom_tag(self, name: str, color: str) -> bool:
+        ok = self.manager.add_custom_tag(name, color)
+        if ok:
+            with self._lock:
+                if self._tag_colors is not None: self._tag_colors[name] = color
+        return ok
+
+    # Cached tasks carry tag names, so tag-wide changes simply reset the cache
+    def rename_tag(self, old_name: str, new_name: str) -> bool:
+        ok = self.manager.rename_tag(old_name, new_name)
+        if ok: self.invalidate(renamed={old_name: new_name})
+        return ok
+
+    def merge_tags(self, source: str, target: str) -> int:
+        moved = self.manager.merge_tags(source, target)
+        self.invalidate()
+        return moved
+
+    def delete_tag(self, name: str) -> int:
+        deleted = self.manager.delete_tag(name)
+        self.invalidate()
+        return deleted
+
+    def add_task(self, date_str: str, content: str, status: str, tag: str, priority: int = 0, description: str = "") -> Task:
+        task_id = self.manager.add_task(date_str, content, status, tag, priority, description)
+        task = Task(task_id, date_str, content, status, tag, priority, description)
+        with self._lock:
+            if self._is_loaded(date_str): self._index(task)
+        self._notify(TaskChange("added", task, date_str))
+        return task
+
+    def _apply_update(self, task_id: int, write, **fields) -> Optional[Task]:
+        old = self.get_task(task_id)
+        if task_id < 0 and old is not None:
+            # A recurring occurrence becomes a stored task: the virtual one disappears first
+            task_id = self.manager.materialize_occurrence(task_id)
+            with self._lock:
+                self._unindex(old)
+            self._notify(TaskChange("deleted", old, old.date_str))
+            write(task_id)
+            new = replace(old, id=task_id, **fields)
+            with self._lock:
+                if self._is_loaded(new.date_str): self._index(new)
+            self._notify(TaskChange("added", new, new.date_str))
+            return new
+        write(task_id)
+        if old is None: return None
+        new = replace(old, **fields)
+        with self._lock:
+            self._unindex(old)
+            if self._is_loaded(new.date_str): self._index(new)
+        self._notify(TaskChange("updated", new, new.date_str, old.date_str if old.date_str != new.date_str else None))
+        return new
+
+    def update_task_status(self, task_id: int, new_status: str) -> Optional[Task]:
+        return self._apply_update(task_id, lambda tid: self.manager.update_task_status(tid, new_status), status=new_status)
+
+    def update_task_priority(self, task_id: int, priority: int) -> Optional[Task]:
+        return self._apply_update(task_id, lambda tid: self.manager.update_task_priority(tid, priority), priority=priority)
+
+    def update_task_info(self, task_id: int, content: str, tag: str, priority: int, description: str) -> Optional[Task]:
+        return self._apply_update(
+            task_id, lambda tid: self.manager.update_task_info(tid, content, tag, priority, description),
+            content=content, tag=tag, priority=priority, description=description)
+
+    # Rules touch an open-ended set of days, so they simply reset the cached months
+    def add_recurrence(self, start_date: str, freq: str, content: str, tag: str, priority: int = 0,
+                       description: str = "", interval: int = 1, weekdays: Optional[List[int]] = None,
+                       end_date: Optional[str] = None) -> int:
+        recurrence_id = self.manager.add_recurrence(start_date, freq, content, tag, priority, description,
+                                                    interval, weekdays, end_date)
+        self.invalidate()
+        return recurrence_id
+
+    def delete_recurrence(self, recurrence_id: int) -> None:
+        self.manager.delete_recurrence(recurrence_id)
+        self.invalidate()
+
+    def delete_task(self, task_id: int) -> None:
+        old = self.get_task(task_id)
+        self.manager.delete_task(task_id)
+        if old is None: return
+        with self._lock:
+            self._unindex(old)
+        self._notify(TaskChange("deleted", old, old.date_str))
+
+
+# --- Command Line ---
+# python -m task_manager [--db myday.db] <command> ...; imports nothing from Qt.
+CLI_STATUSES = ("待完成", "已完成")
+
+
+def _cli_date(value: str) -> str:
+    try:
+        return datetime.date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date (expected yyyy-MM-dd): {value}") from None
+
+
+def _cli_parser() -> "argparse.ArgumentParser":
+    parser = argparse.ArgumentParser(prog="python -m task_manager",
+                                     description="Headless access to the Manage MyDay database.")
+    parser.add_argument("--db", default=TaskManager.DB_NAME, help="database file (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="add a task and print its id")
+    add.add_argument("date", type=_cli_date)
+    add.add_argument("content")
+    add.add_argument("--tag", default=TaskManager.DEFAULT_TAGS[0][0])
+    add.add_argument("--priority", type=int, default=0)
+    add.add_argument("--status", choices=CLI_STATUSES, default=CLI_STATUSES[0])
+    add.add_argument("--description", default="")
+
+    lst = commands.add_parser("list", help="list tasks dated start..end (inclusive)")
+    lst.add_argument("start", type=_cli_date)
+    lst.add_argument("end", type=_cli_date, nargs="?", help="defaults to start")
+    lst.add_argument("--tag", action="append", help="repeat to match several tags (default: all)")
+    lst.add_argument("--min-priority", type=int, default=-1)
+    lst.add_argument("--keyword", default="")
+    lst.add_argument("--limit", type=int)
+    lst.add_argument("--json", action="store_true", help="one JSON object per line")
+
+    search = commands.add_parser("search", help="full-text search over content and description")
+    search.add_argument("keyword")
+    search.add_argument("--limit", type=int)
+    search.add_argument("--json", action="store_true", help="one JSON object per line")
+
+    export = commands.add_parser("export", help="export everything to a JSON file")
+    export.add_argument("file")
+    export.add_argument("--compact", action="store_true", help="minified JSON, gzip-compressed")
+
+    imp = commands.add_parser("import", help="import a JSON export (plain or gzip)")
+    imp.add_argument("file")
+
+    stats = commands.add_parser("stats", help="print completion statistics as JSON")
+    stats.add_argument("--granularity", choices=TaskManager.STAT_GRANULARITIES, default="month")
+    stats.add_argument("--start", type=_cli_date)
+    stats.add_argument("--end", type=_cli_date, help="exclusive")
+
+    batch = commands.add_parser(
+        "batch", help="run commands read from a file or stdin inside a single transaction",
+        description="Each line is a command as typed after 'python -m task_manager' (shell quoting "
+                    "applies), or a JSON task object {\"date_str\", \"content\", \"tag\", ...} to add. "
+                    "Blank lines and lines starting with # are ignored. Any failure rolls back the whole batch.")
+    batch.add_argument("file", nargs="?", default="-", help="defaults to stdin")
+    return parser
+
+
+def _cli_print_tasks(tasks: List[Task], as_json: bool, out) -> None:
+    for task in tasks:
+        if as_json:
+            row = {col: getattr(task, col) for col in TaskManager.EXPORT_COLUMNS}
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+        else:
+            content = task.content.replace("\t", " ").replace("\n", " ")
+            out.write(f"{task.id}\t{task.date_str}\t{task.status}\t{task.priority}\t{task.tag}\t{content}\n")
+
+
+def _cli_run(manager: TaskManager, args, out) -> None:
+    if args.command == "add":
+        out.write(f"{manager.add_task(args.date, args.content, args.status, args.tag, args.priority, args.description)}\n")
+    elif args.command == "list":
+        tasks = manager.search_range(args.start, args.end or args.start, args.tag, args.min_priority,
+                                     args.keyword, args.limit, include_recurring=True)
+        _cli_print_tasks(tasks, args.json, out)
+    elif args.command == "search":
+        _cli_print_tasks(manager.search_tasks(args.keyword, args.limit), args.json, out)
+    elif args.command == "export":
+        file_path = args.file
+        if args.compact and not file_path.endswith(".gz"): file_path += ".gz"
+        out.write(f"exported {manager.export_json(file_path, compact=args.compact)} tasks to {file_path}\n")
+    elif args.command == "import":
+        imported, skipped = manager.import_json(args.file)
+        out.write(f"imported {imported} tasks, skipped {skipped} duplicates\n")
+    elif args.command == "stats":
+        stats = manager.get_statistics(args.granularity, args.start, args.end)
+        stats["by_priority"] = {str(k): v for k, v in stats["by_priority"].items()}
+        out.write(json.dumps(stats, ensure_ascii=False, indent=2) + "\n")
+    elif args.command == "batch":
+        _cli_batch(manager, args.file, out)
+
+
+def _cli_batch(manager: TaskManager, file_path: str, out) -> None:
+    parser = _cli_parser()
+    source = sys.stdin if file_path == "-" else open(file_path, 'r', encoding='utf-8')
+    added = 0
+    try:
+        # Nested add_task()/import_json() transactions join this one: a single commit at the end
+        with manager.transaction():
+            for line_no, line in enumerate(source, 1):
+                line = line.strip()
+                if not line or line.startswith("#"): continue
+                try:
+                    if line.startswith("{"):
+                        row = json.loads(line)
+                        manager.add_task(_cli_date(row.get("date_str") or row["date"]), row["content"],
+                                         row.get("status") or CLI_STATUSES[0],
+                                         row.get("tag") or TaskManager.DEFAULT_TAGS[0][0],
+                                         row.get("priority") or 0, row.get("description") or "")
+                        added += 1
+                        continue
+                    args = parser.parse_args(shlex.split(line))
+                    if args.command == "batch": raise ValueError("batch cannot be nested")
+                    if args.command == "add":
+                        manager.add_task(args.date, args.content, args.status, args.tag, args.priority, args.description)
+                        added += 1
+                    else:
+                        _cli_run(manager, args, out)
+                except SystemExit:
+                    raise ValueError(f"line {line_no}: invalid command") from None
+                except (KeyError, TypeError, ValueError, argparse.ArgumentTypeError) as e:
+                    raise ValueError(f"line {line_no}: {e}") from None
+    finally:
+        if source is not sys.stdin: source.close()
+    out.write(f"added {added} tasks\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _cli_parser().parse_args(argv)
+    manager = TaskManager(args.db)
+    try:
+        _cli_run(manager, args, sys.stdout)
+    except (OSError, ValueError, sqlite3.Error, ImportCancelled, ExportCancelled) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        manager.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
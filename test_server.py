@@ -0,0 +1,157 @@
+import asyncio
+import json
+
+import pytest
+
+from server import TaskApi, TaskServer
+
+
+@pytest.fixture
+def api(manager):
+    return TaskApi(manager)
+
+
+def call(api, method, target, body=None):
+    status, data = api.handle(method, target, None if body is None else json.dumps(body).encode("utf-8"))
+    return status, json.loads(data)
+
+
+def test_task_crud(api):
+    status, task = call(api, "POST", "/tasks", {"date_str": "2026-01-02", "content": "写报告", "tag": "学习",
+                                                "priority": 2})
+    assert status == 201 and task["tag"] == "学习" and task["status"] == "待完成"
+    assert call(api, "GET", f"/tasks/{task['id']}") == (200, task)
+
+    status, updated = call(api, "PATCH", f"/tasks/{task['id']}", {"status": "已完成", "priority": 4})
+    assert status == 200 and (updated["status"], updated["priority"], updated["content"]) == ("已完成", 4, "写报告")
+    assert call(api, "GET", "/day/2026-01-02")[1] == [updated]
+    assert call(api, "GET", "/day/2026-01-02?tag=工作")[1] == []
+
+    assert call(api, "DELETE", f"/tasks/{task['id']}") == (200, {"deleted": task["id"]})
+    assert call(api, "GET", f"/tasks/{task['id']}")[0] == 404
+
+
+@pytest.mark.parametrize("body", [
+    {"date_str": "2026-01-02", "content": "x", "tag": 5},
+    {"date_str": "2026-01-02", "content": "x", "priority": "high"},
+    {"date_str": "2026-01-02", "content": "x", "priority": True},
+    {"date_str": "2026-01-02", "content": ["x"]},
+    {"date_str": "2026-02-30", "content": "x"},
+    {"content": "x"},
+    [1, 2],
+])
+def test_add_task_rejects_invalid_fields(api, body):
+    assert call(api, "POST", "/tasks", body)[0] == 400
+    assert [t.name for t in api.manager.get_all_tags() if t.name == "5"] == []
+    assert call(api, "GET", "/range?start=2026-01-01&end=2026-12-31")[1] == []
+
+
+def test_update_task_rejects_invalid_fields(api):
+    _, task = call(api, "POST", "/tasks", {"date_str": "2026-01-02", "content": "x"})
+    assert call(api, "PATCH", f"/tasks/{task['id']}", {"status": 1})[0] == 400
+    assert call(api, "PATCH", f"/tasks/{task['id']}", {"tag": {"name": "工作"}})[0] == 400
+    assert call(api, "GET", f"/tasks/{task['id']}")[1] == task
+
+
+def test_patch_materializes_recurring_occurrence(api):
+    api.manager.add_recurrence("2026-01-01", "daily", "喝水", "健康")
+    occurrence = call(api, "GET", "/day/2026-01-03")[1][0]
+    assert occurrence["id"] < 0
+    status, stored = call(api, "PATCH", f"/tasks/{occurrence['id']}", {"status": "已完成"})
+    assert status == 200 and stored["id"] > 0 and stored["status"] == "已完成"
+    assert [t["id"] for t in call(api, "GET", "/day/2026-01-03")[1]] == [stored["id"]]
+
+
+def test_last_day_and_month_of_the_calendar(api):
+    api.manager.add_recurrence("9999-12-30", "daily", "末日", "工作")
+    assert [t["date_str"] for t in call(api, "GET", "/day/9999-12-31")[1]] == ["9999-12-31"]
+    assert call(api, "GET", "/month/9999-12")[1]["9999-12-31"]["total"] == 1
+
+
+@pytest.mark.parametrize("month", ["2026-13", "2026-00", "2026", "2026-1-1", "abcd-ef"])
+def test_month_rejects_invalid_months(api, month):
+    assert call(api, "GET", f"/month/{month}")[0] == 400
+
+
+def test_month_range_and_load(api):
+    m = api.manager
+    m.add_task("2026-03-01", "a", "已完成", "工作", 3)
+    m.add_task("2026-03-01", "b", "待完成", "生活", 1)
+    m.add_task("2026-03-05", "c", "待完成", "生活", 0)
+    status, month = call(api, "GET", "/month/2026-03")
+    assert status == 200 and month == m.get_month_task_summary(2026, 3, None)
+    assert month["2026-03-01"]["total"] == 2
+    assert set(call(api, "GET", "/month/2026-03?tag=生活")[1]) == {"2026-03-01", "2026-03-05"}
+    assert [t["content"] for t in call(api, "GET", "/range?start=2026-03-01&end=2026-03-31&min_priority=1")[1]] == ["a", "b"]
+    assert call(api, "GET", "/load?start=2026-03-01&end=2026-03-05")[1] == {"2026-03-01": {"total": 2, "done": 1, "high": 1}}
+    assert call(api, "GET", "/range?start=2026-03-01")[0] == 400
+    assert call(api, "GET", "/stats?granularity=hour")[0] == 400
+
+
+def test_get_responses_are_cached_until_a_write(api):
+    call(api, "GET", "/day/2026-01-02")
+    call(api, "GET", "/day/2026-01-02")
+    assert (api.stats.cache_hits, api.stats.cache_misses) == (1, 1)
+    call(api, "POST", "/tasks", {"date_str": "2026-01-02", "content": "x"})
+    assert len(call(api, "GET", "/day/2026-01-02")[1]) == 1
+    assert (api.stats.cache_hits, api.stats.cache_misses) == (1, 2)
+
+
+def test_batch_is_atomic(api):
+    ok = [{"method": "POST", "path": "/tasks", "body": {"date_str": "2026-01-02", "content": "a"}},
+          {"method": "GET", "path": "/day/2026-01-02"}]
+    status, results = call(api, "POST", "/batch", ok)
+    assert status == 200 and [r["status"] for r in results] == [201, 200]
+    assert [t["content"] for t in results[1]["body"]] == ["a"]
+
+    revision = api.manager.get_revision()
+    bad = [{"method": "POST", "path": "/tasks", "body": {"date_str": "2026-01-03", "content": "b"}},
+           {"method": "POST", "path": "/tasks", "body": {"date_str": "2026-01-03", "content": "c", "tag": 1}}]
+    status, error = call(api, "POST", "/batch", bad)
+    assert status == 400 and error["error"].startswith("operation 1")
+    assert call(api, "GET", "/day/2026-01-03")[1] == []
+    assert api.manager.get_revision() == revision
+    assert call(api, "POST", "/batch", {"method": "GET"})[0] == 400
+
+
+def _exchange(manager, raw: bytes) -> bytes:
+    async def run():
+        server = TaskServer(manager, port=0)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            writer.write(raw)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return response
+        finally:
+            await server.close()
+    return asyncio.run(run())
+
+
+def test_server_round_trip(manager):
+    body = json.dumps({"date_str": "2026-01-02", "content": "网络"}).encode("utf-8")
+    response = _exchange(manager, b"POST /tasks HTTP/1.1\r\nContent-Length: %d\r\nConnection: close\r\n\r\n%s"
+                         % (len(body), body))
+    head, _, payload = response.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 201")
+    assert json.loads(payload)["content"] == "网络"
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-5"])
+def test_server_rejects_malformed_content_length(manager, length):
+    response = _exchange(manager, b"POST /tasks HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 400")
+    assert b"Content-Length" in response.partition(b"\r\n\r\n")[2]
+
+
+def test_unexpected_errors_answer_500(manager, monkeypatch, caplog):
+    def broken(*args):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(manager, "get_tasks_by_date_and_tags", broken)
+    response = _exchange(manager, b"GET /day/2026-01-02 HTTP/1.1\r\nConnection: close\r\n\r\n")
+    head, _, payload = response.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 500")
+    assert json.loads(payload) == {"error": "internal error: RuntimeError"}
+    assert "GET /day/2026-01-02" in caplog.text
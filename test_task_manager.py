@@ -0,0 +1,471 @@
+import gzip
+import json
+import sqlite3
+
+import pytest
+
+import task_manager
+from task_manager import ImportCancelled, TaskManager, TaskRepository
+
+
+def _rollup_rows(m: TaskManager):
+    """task_rollup as stored, and as recomputed from tasks; the triggers must keep them equal."""
+    conn = m._connect()
+    done = ", ".join(f"'{s}'" for s in m.DONE_STATUSES)
+    expected = conn.execute(f"""
+        SELECT date_str, tag_id, IFNULL(priority, 0), COUNT(*), SUM(status IN ({done}))
+        FROM tasks GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+    """).fetchall()
+    actual = conn.execute("SELECT date_str, tag_id, priority, total, done FROM task_rollup ORDER BY 1, 2, 3").fetchall()
+    return actual, expected
+
+
+def _latest_version(m: TaskManager) -> int:
+    return m._migrations()[-1][0]
+
+
+# --- Migrations ---
+def test_fresh_database_is_at_latest_version(manager):
+    conn = manager._connect()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == _latest_version(manager)
+    assert [t.name for t in manager.get_all_tags()] == [name for name, _ in TaskManager.DEFAULT_TAGS]
+    assert manager.get_revision() == 0
+
+
+def test_migrates_legacy_database(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, date_str TEXT NOT NULL,
+                            content TEXT NOT NULL, status TEXT NOT NULL, tag TEXT NOT NULL);
+        CREATE TABLE tags (name TEXT PRIMARY KEY, color TEXT NOT NULL);
+        INSERT INTO tags VALUES ('工作', '#5E5CE6'), ('生活', '#30D158');
+        INSERT INTO tasks (id, date_str, content, status, tag) VALUES
+            (3, '2025-05-01', '写周报', '已完成', '工作'),
+            (7, '2025-05-01', '买菜', '待完成', '生活'),
+            (9, '2025-05-02', '旧数据', 'DONE', '未登记');
+    """)
+    conn.commit()
+    conn.close()
+
+    m = TaskManager(path)
+    try:
+        conn = m._connect()
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == _latest_version(m)
+        assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+        # Ids survive the table rebuild; an unregistered tag is created with the default color
+        assert [(t.id, t.tag, t.priority, t.description) for t in m.search_range("2025-05-01", "2025-05-02", None)] == [
+            (3, "工作", 0, ""), (7, "生活", 0, ""), (9, "未登记", 0, "")]
+        assert {t.name: t.color for t in m.get_all_tags()}["未登记"] == TaskManager.DEFAULT_TAG_COLOR
+        actual, expected = _rollup_rows(m)
+        assert actual == expected
+        stats = m.get_statistics()
+        assert (stats["total"], stats["done"]) == (3, 2)
+        assert stats["by_tag"] == {"工作": (1, 1), "生活": (1, 0), "未登记": (1, 1)}
+        if m.has_fts:
+            assert [t.id for t in m.search_tasks("写周报")] == [3]
+        assert m.add_task("2025-05-03", "新任务", "待完成", "工作") == 10
+    finally:
+        m.close()
+
+
+class _V6Manager(TaskManager):
+    """Stops at schema version 6: tags keyed by name, tasks/recurrences holding tag text."""
+
+    def _migrations(self):
+        return super()._migrations()[:6]
+
+
+def test_migrates_tag_names_to_ids(tmp_path):
+    path = str(tmp_path / "v6.db")
+    _V6Manager(path).close()
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        INSERT INTO tasks (id, date_str, content, status, tag, priority, description) VALUES
+            (1, '2026-02-02', 'a', '待完成', '工作', 1, ''),
+            (2, '2026-02-02', 'b', '已完成', '旧标签', 4, 'x'),
+            (5, '2026-02-03', 'c', '待完成', '生活', 0, '');
+        DELETE FROM tasks WHERE id = 5;
+        INSERT INTO recurrences (id, start_date, freq, interval, weekdays, content, tag, priority)
+            VALUES (4, '2026-02-01', 'daily', 1, '', '喝水', '规则标签', 2);
+        INSERT INTO recurrence_exceptions VALUES (4, '2026-02-02');
+    """)
+    conn.commit()
+    conn.close()
+
+    m = TaskManager(path)
+    try:
+        conn = m._connect()
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == _latest_version(m)
+        assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(tasks)")]
+        assert "tag_id" in columns and "tag" not in columns
+        names = [t.name for t in m.get_all_tags()]
+        assert names[:5] == [name for name, _ in TaskManager.DEFAULT_TAGS]
+        assert set(names[5:]) == {"旧标签", "规则标签"}
+        assert [t.id for t in m.get_all_tags()] == list(range(1, 8)) # no AUTOINCREMENT gaps
+
+        tasks = m.get_tasks_by_date_and_tags("2026-02-02", None)
+        assert [(t.id, t.tag) for t in tasks] == [(2, "旧标签"), (1, "工作")] # exception skips the occurrence
+        occurrences = m.expand_recurrences("2026-02-01", "2026-02-04")
+        assert [(t.date_str, t.tag) for t in occurrences] == [("2026-02-01", "规则标签"), ("2026-02-03", "规则标签")]
+        actual, expected = _rollup_rows(m)
+        assert actual == expected
+        # The AUTOINCREMENT high-water mark is kept: deleted ids are not reused
+        assert m.add_task("2026-02-04", "d", "待完成", "工作") == 6
+        assert m.add_recurrence("2026-02-04", "daily", "e", "工作") == 5
+    finally:
+        m.close()
+
+
+# --- Rollup triggers ---
+def test_rollup_follows_every_write(manager):
+    a = manager.add_task("2026-03-01", "a", "待完成", "工作", 1)
+    b = manager.add_task("2026-03-01", "b", "已完成", "工作", 1)
+    manager.add_task("2026-03-02", "c", "待完成", "生活", 4)
+    manager.update_task_status(a, "已完成")
+    manager.update_task_priority(b, 3)
+    manager.update_task_info(a, "a2", "学习", 2, "")
+    manager.delete_task(b)
+    manager.merge_tags("学习", "生活")
+    actual, expected = _rollup_rows(manager)
+    assert actual == expected
+    assert manager.get_daily_load("2026-03-01", "2026-03-03") == {"2026-03-01": (1, 1, 0), "2026-03-02": (1, 0, 1)}
+
+
+# --- Tags ---
+def test_rename_merge_and_delete_tags(manager):
+    task_id = manager.add_task("2026-04-01", "a", "待完成", "学习")
+    manager.add_recurrence("2026-04-01", "daily", "r", "学习")
+    assert manager.rename_tag("学习", "进修")
+    assert not manager.rename_tag("进修", "工作") # name taken
+    assert manager.get_task(task_id).tag == "进修"
+    assert manager.get_tasks_by_date_and_tags("2026-04-01", ["学习"]) == []
+
+    assert manager.merge_tags("进修", "工作") == 1
+    assert manager.get_tag_id("进修") is None
+    assert {t.tag for t in manager.get_tasks_by_date_and_tags("2026-04-01", ["工作"])} == {"工作"}
+    assert len(manager.get_tasks_by_date_and_tags("2026-04-01", ["工作"])) == 2
+
+    assert manager.delete_tag("工作") == 1
+    assert manager.get_task(task_id) is None
+    assert manager.get_recurrences() == []
+    assert manager._connect().execute("PRAGMA foreign_key_check").fetchall() == []
+
+
+# --- Recurring tasks ---
+def test_recurrence_expansion(manager):
+    manager.add_recurrence("2026-01-01", "daily", "daily", "工作", interval=2, end_date="2026-01-09")
+    manager.add_recurrence("2026-01-05", "weekly", "weekly", "工作", interval=2, weekdays=[0, 2])
+    manager.add_recurrence("2026-01-31", "monthly", "monthly", "工作")
+    by_rule = {}
+    for task in manager.expand_recurrences("2026-01-01", "2026-06-01"):
+        by_rule.setdefault(task.content, []).append(task.date_str)
+    assert by_rule["daily"] == ["2026-01-01", "2026-01-03", "2026-01-05", "2026-01-07", "2026-01-09"]
+    assert by_rule["weekly"][:4] == ["2026-01-05", "2026-01-07", "2026-01-19", "2026-01-21"]
+    assert by_rule["monthly"] == ["2026-01-31", "2026-03-31", "2026-05-31"] # months without a 31st are skipped
+    # A window in the middle of a series only generates its own dates
+    assert [t.date_str for t in manager.expand_recurrences("2026-01-04", "2026-01-06", ["工作"])] == [
+        "2026-01-05", "2026-01-05"]
+    assert manager.expand_recurrences("2026-01-01", "2026-02-01", ["生活"]) == []
+    with pytest.raises(ValueError):
+        manager.add_recurrence("2026-01-01", "hourly", "x", "工作")
+
+
+def test_recurrences_at_the_last_representable_date(manager):
+    manager.add_recurrence("9999-12-25", "daily", "daily", "工作", interval=3)
+    manager.add_recurrence("9999-01-31", "monthly", "monthly", "工作")
+    manager.add_recurrence("9999-12-27", "weekly", "weekly", "工作")
+    stored = manager.add_task("9999-12-31", "stored", "待完成", "工作", 1)
+    assert [t.content for t in manager.get_tasks_by_date_and_tags("9999-12-31", None)] == ["stored", "monthly", "daily"]
+    tasks = manager.search_range("9999-12-20", "9999-12-31", None, include_recurring=True)
+    assert [(t.date_str, t.content) for t in tasks] == [
+        ("9999-12-25", "daily"), ("9999-12-27", "weekly"), ("9999-12-28", "daily"),
+        ("9999-12-31", "stored"), ("9999-12-31", "monthly"), ("9999-12-31", "daily")]
+    assert manager.get_month_task_summary(9999, 12, None)["9999-12-31"]["total"] == 3
+    occurrence = TaskManager.occurrence_id(manager.get_recurrences()[0]["id"], "9999-12-31")
+    assert manager.get_task(occurrence).content == "daily"
+    assert manager.materialize_occurrence(occurrence) > stored
+
+
+def test_occurrence_delete_and_materialize(manager):
+    rid = manager.add_recurrence("2026-01-01", "daily", "喝水", "健康", priority=1)
+    first = TaskManager.occurrence_id(rid, "2026-01-01")
+    second = TaskManager.occurrence_id(rid, "2026-01-02")
+    assert TaskManager.parse_occurrence_id(second) == (rid, "2026-01-02")
+    assert manager.get_task(second).content == "喝水"
+
+    manager.delete_task(first)
+    assert manager.get_tasks_by_date_and_tags("2026-01-01", None) == []
+
+    manager.update_task_status(second, "已完成")
+    stored = manager.get_tasks_by_date_and_tags("2026-01-02", None)
+    assert len(stored) == 1 and stored[0].id > 0 and stored[0].status == "已完成"
+    # Stopping the series keeps what was materialized
+    manager.delete_recurrence(rid)
+    assert manager.get_tasks_by_date_and_tags("2026-01-02", None) == stored
+    assert manager.get_tasks_by_date_and_tags("2026-01-03", None) == []
+
+
+def test_recurring_tasks_in_range_search_and_summary(manager):
+    manager.add_task("2026-01-10", "stored", "待完成", "工作", 1)
+    manager.add_recurrence("2026-01-10", "weekly", "周会", "生活", priority=1)
+    tasks = manager.search_range("2026-01-01", "2026-01-31", None, include_recurring=True)
+    assert [(t.date_str, t.content) for t in tasks] == [
+        ("2026-01-10", "周会"), ("2026-01-10", "stored"), ("2026-01-17", "周会"),
+        ("2026-01-24", "周会"), ("2026-01-31", "周会")]
+    assert manager.search_range("2026-01-01", "2026-01-31", None, limit=2, offset=1, include_recurring=True) == tasks[1:3]
+    assert [t.content for t in manager.search_range("2026-01-01", "2026-01-31", None)] == ["stored"]
+
+    summary = manager.get_month_task_summary(2026, 1, None)
+    assert summary["2026-01-10"]["total"] == 2
+    assert summary["2026-01-17"]["total"] == 1
+
+
+def test_paged_range_search_over_an_open_ended_rule(manager):
+    manager.add_recurrence("2026-01-01", "daily", "喝水 记录", "工作")
+    manager.add_recurrence("2026-01-01", "weekly", "周会", "生活", priority=1, weekdays=[0, 3])
+    manager.add_task("2026-01-05", "stored", "待完成", "工作", 2)
+    full = manager.search_range("2026-01-01", "2026-12-31", None, include_recurring=True)
+    for offset in (0, 3, 40):
+        assert manager.search_range("2026-01-01", "2026-12-31", None, limit=7, offset=offset,
+                                    include_recurring=True) == full[offset:offset + 7]
+    # Pages only expand as far as they read, so a centuries-wide range is cheap
+    page = manager.search_range("2026-01-01", "2999-12-31", None, 1, "周", 3, 0, True)
+    assert [(t.date_str, t.content) for t in page] == [
+        ("2026-01-01", "周会"), ("2026-01-05", "周会"), ("2026-01-08", "周会")]
+
+
+def test_month_summary_matches_repository_day_summary(manager):
+    # Equal priorities: both paths must pick the same winner (occurrence ids sort first)
+    manager.add_task("2026-01-19", "stored", "待完成", "工作", 2)
+    manager.add_task("2026-01-19", "done", "已完成", "学习", 0)
+    manager.add_recurrence("2026-01-05", "weekly", "rule", "生活", priority=2)
+    repo = TaskRepository(manager)
+    tags = [t.name for t in manager.get_all_tags()]
+    for active in (tags, ["工作", "学习"], ["生活"]):
+        summary = manager.get_month_task_summary(2026, 1, active)
+        for day in range(1, 32):
+            date_str = f"2026-01-{day:02d}"
+            assert summary.get(date_str) == repo.day_summary(date_str, active), (date_str, active)
+    assert manager.get_month_task_summary(2026, 1, tags)["2026-01-19"]["tag"] == "生活"
+
+
+# --- Import / export ---
+def _populate(m: TaskManager) -> None:
+    m.add_task("2026-05-01", "报告", "已完成", "工作", 3, "第一行\n第二行")
+    m.add_task("2026-05-01", '含"引号"', "待完成", "自定义")
+    m.add_task("2026-05-02", "跑步", "待完成", "健康", 1)
+    rid = m.add_recurrence("2026-05-01", "daily", "喝水", "健康")
+    m.delete_task(TaskManager.occurrence_id(rid, "2026-05-03"))
+
+
+def _expected_export(m: TaskManager) -> dict:
+    conn = m._connect()
+    return {
+        "version": m.EXPORT_VERSION,
+        "tags": [{"name": n, "color": c} for n, c in conn.execute("SELECT name, color FROM tags ORDER BY id")],
+        "recurrences": m.get_recurrences(),
+        "tasks": [dict(zip(m.EXPORT_COLUMNS, row)) for row in
+                  conn.execute(f"SELECT {m.TASK_COLUMNS} FROM {m.TASK_TABLES} ORDER BY t.id")],
+    }
+
+
+@pytest.mark.parametrize("task_count", [0, 5])
+def test_export_layout_matches_json_dump(manager, tmp_path, task_count):
+    for i in range(task_count):
+        manager.add_task(f"2026-05-{i + 1:02d}", f"任务 {i}", "待完成", "工作", i, "a\tb" if i % 2 else "")
+    path = str(tmp_path / "out.json")
+    assert manager.export_json(path, batch_size=2) == task_count
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == json.dumps(_expected_export(manager), ensure_ascii=False, indent=4)
+    assert manager.export_json(path + ".gz", compact=True, batch_size=2) == task_count
+    with gzip.open(path + ".gz", "rt", encoding="utf-8") as f:
+        assert f.read() == json.dumps(_expected_export(manager), ensure_ascii=False, separators=(",", ":"))
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_import_round_trip_is_idempotent(manager, tmp_path, compact):
+    _populate(manager)
+    path = str(tmp_path / ("out.json.gz" if compact else "out.json"))
+    manager.export_json(path, compact=compact)
+
+    target = TaskManager(str(tmp_path / "target.db"))
+    try:
+        assert target.import_json(path, batch_size=2) == (3, 0)
+        assert target.import_json(path) == (0, 3)
+        assert _expected_export(target)["tasks"] == _expected_export(manager)["tasks"]
+        rules = target.get_recurrences()
+        assert len(rules) == 1 and rules[0]["exceptions"] == ["2026-05-03"]
+        assert {t.name: t.color for t in target.get_all_tags()}["自定义"] == TaskManager.DEFAULT_TAG_COLOR
+        actual, expected = _rollup_rows(target)
+        assert actual == expected
+    finally:
+        target.close()
+
+
+def _write_export(path, tasks, tags=()):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": TaskManager.EXPORT_VERSION, "tags": list(tags), "tasks": tasks}, f, ensure_ascii=False)
+
+
+def test_import_skips_duplicates_within_file(manager, tmp_path):
+    path = str(tmp_path / "dup.json")
+    task = {"date_str": "2026-06-01", "content": "x", "status": "待完成", "tag": "工作"}
+    _write_export(path, [task, dict(task, status="已完成"), dict(task, content="y")])
+    assert manager.import_json(path) == (2, 1)
+
+
+def test_import_error_rolls_everything_back(manager, tmp_path):
+    manager.add_task("2026-06-01", "existing", "待完成", "工作")
+    revision = manager.get_revision()
+    path = str(tmp_path / "bad.json")
+    good = {"date_str": "2026-06-02", "content": "x", "status": "待完成", "tag": "新标签"}
+    _write_export(path, [good, {"date_str": "2026-06-03"}], tags=[{"name": "文件标签", "color": "#000000"}])
+    with pytest.raises(ValueError):
+        manager.import_json(path, batch_size=1)
+    assert [t.content for t in manager.search_range("2026-01-01", "2026-12-31", None)] == ["existing"]
+    assert manager.get_tag_id("新标签") is None and manager.get_tag_id("文件标签") is None
+    assert manager.get_revision() == revision
+
+
+@pytest.mark.parametrize("data", [{"version": 1, "tags": [{"name": "文件标签", "color": "#000000"}]},
+                                  {"tags": [], "tasks": {"date_str": "2026-06-01"}},
+                                  {"tasks": None}])
+def test_import_requires_a_tasks_array(manager, tmp_path, data):
+    path = tmp_path / "no_tasks.json"
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    with pytest.raises(ValueError, match="缺少 tasks 字段"):
+        manager.import_json(str(path))
+    assert manager.get_tag_id("文件标签") is None
+
+
+def test_import_cancel_keeps_nothing(manager, tmp_path):
+    path = str(tmp_path / "many.json")
+    _write_export(path, [{"date_str": "2026-06-01", "content": str(i), "status": "待完成", "tag": "工作"}
+                         for i in range(10)])
+    with pytest.raises(ImportCancelled):
+        manager.import_json(path, progress=lambda done, total: False, batch_size=3)
+    assert manager.search_range("2026-06-01", "2026-06-01", None) == []
+
+
+def test_large_import_keeps_fulltext_index(manager, tmp_path):
+    if not manager.has_fts: pytest.skip("SQLite build without FTS5 trigram")
+    manager.IMPORT_FTS_REBUILD_MIN = 4 # suspend the triggers part-way through the file
+    before = manager.add_task("2026-06-01", "已有记录", "待完成", "工作")
+    path = str(tmp_path / "big.json")
+    _write_export(path, [{"date_str": "2026-06-02", "content": f"导入记录 {i:03d}", "status": "待完成", "tag": "工作"}
+                         for i in range(20)])
+    assert manager.import_json(path, batch_size=3) == (20, 0)
+    conn = manager._connect()
+    conn.execute("INSERT INTO tasks_fts (tasks_fts, rank) VALUES ('integrity-check', 1)")
+    assert [t.content for t in manager.search_tasks("导入记录 019")] == ["导入记录 019"]
+    assert [t.id for t in manager.search_tasks("已有记录")] == [before]
+    # The sync triggers are back: later writes are indexed again
+    manager.add_task("2026-06-03", "之后新增", "待完成", "工作")
+    assert len(manager.search_tasks("之后新增")) == 1
+    assert manager.import_json(path) == (0, 20)
+
+
+# --- Backup ---
+def test_backup_only_if_changed_and_rotation(manager, tmp_path):
+    backups = str(tmp_path / "backups")
+    first = manager.backup(backups, keep=2, only_if_changed=True)
+    assert first is not None
+    assert manager.backup(backups, keep=2, only_if_changed=True) is None # nothing written since
+
+    for i in range(3):
+        manager.add_task("2026-07-01", f"t{i}", "待完成", "工作")
+        assert manager.backup(backups, keep=2, only_if_changed=True) is not None
+    names = TaskManager.list_backups(backups)
+    assert len(names) == 2
+    assert TaskManager._backup_revision(names[-1]) == manager.get_revision()
+    conn = sqlite3.connect(f"{backups}/{names[-1]}")
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 3
+    finally:
+        conn.close()
+
+
+def test_compressed_backup_is_a_valid_database(manager, tmp_path):
+    manager.add_task("2026-07-01", "a", "待完成", "工作")
+    path = manager.backup(str(tmp_path / "backups"), compress=True)
+    assert path.endswith(".db.gz")
+    restored = tmp_path / "restored.db"
+    with gzip.open(path, "rb") as src:
+        restored.write_bytes(src.read())
+    conn = sqlite3.connect(str(restored))
+    try:
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        assert conn.execute("SELECT content FROM tasks").fetchall() == [("a",)]
+    finally:
+        conn.close()
+
+
+# --- Repository ---
+def test_repository_sync_ignores_commits_without_a_revision_bump(manager):
+    repo = TaskRepository(manager)
+    changes = []
+    repo.subscribe(changes.append)
+    assert not repo.sync()
+
+    other = sqlite3.connect(manager.DB_NAME)
+    other.execute("INSERT INTO meta (key, value) VALUES ('probe', 1)")
+    other.commit()
+    other.close()
+    assert not repo.sync()
+
+    writer = TaskManager(manager.DB_NAME)
+    try:
+        writer.add_task("2026-08-01", "elsewhere", "待完成", "工作")
+    finally:
+        writer.close()
+    assert repo.sync()
+    assert [c.kind for c in changes] == ["reset"]
+
+
+def test_repository_rename_reset_carries_the_rename(manager):
+    repo = TaskRepository(manager)
+    changes = []
+    repo.subscribe(changes.append)
+    repo.rename_tag("学习", "进修")
+    assert changes[-1].kind == "reset" and changes[-1].renamed == {"学习": "进修"}
+    assert "进修" in repo.tag_colors()
+
+
+# --- Command line ---
+def _task_count(path: str) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_cli_batch_runs_in_one_transaction(tmp_path, capsys):
+    db = str(tmp_path / "cli.db")
+    script = tmp_path / "ok.txt"
+    script.write_text('# comment\nadd 2026-09-01 "写 报告" --tag 学习 --priority 2\n'
+                      '{"date_str": "2026-09-02", "content": "json 行"}\n\n', encoding="utf-8")
+    assert task_manager.main(["--db", db, "batch", str(script)]) == 0
+    assert "added 2 tasks" in capsys.readouterr().out
+    assert _task_count(db) == 2
+
+
+def test_cli_batch_failure_rolls_back(tmp_path, capsys):
+    db = str(tmp_path / "cli.db")
+    script = tmp_path / "bad.txt"
+    script.write_text('add 2026-09-01 first\nadd not-a-date second\n', encoding="utf-8")
+    assert task_manager.main(["--db", db, "batch", str(script)]) == 1
+    assert "line 2" in capsys.readouterr().err
+    assert _task_count(db) == 0
+
+
+def test_cli_list_includes_recurring(tmp_path, capsys):
+    db = str(tmp_path / "cli.db")
+    m = TaskManager(db)
+    m.add_recurrence("2026-09-01", "daily", "每日", "工作")
+    m.close()
+    assert task_manager.main(["--db", db, "list", "2026-09-01", "2026-09-02", "--json"]) == 0
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(r["date_str"], r["content"]) for r in rows] == [("2026-09-01", "每日"), ("2026-09-02", "每日")]